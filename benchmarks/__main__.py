@@ -0,0 +1,77 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+import benchmarks
+
+BENCHMARKS = ("latency", "throughput", "fan_out", "projector_fan_out", "memory", "startup")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=benchmarks.SRC_DIR
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmarks of the trigger pipeline, results are printed as json")
+    parser.add_argument("--quick", action="store_true", help="fewer samples, for a smoke test")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument("--output", type=Path, help="write the results to a file instead of stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="dptmc-bench-") as workdir:
+        # config snapshots and the journal of the benchmarks stay out of the installation
+        os.environ["HOME"] = workdir
+        os.environ["RUNTIME_DIRECTORY"] = workdir
+        results = run(Path(workdir), args.only, args.quick)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "quick": args.quick,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        args.output.write_text(output + "\n")
+
+
+def run(workdir: Path, names: list[str], quick: bool) -> Dict[str, Any]:
+    # imported here, the paths of the service are read from the environment on import
+    from .pipeline import edge_to_output_latency, output_fan_out, projector_fan_out, trigger_throughput
+    from .resources import memory_per_pin, startup_time
+
+    samples = 100 if quick else 2000
+    runs: Dict[str, Callable[[], Any]] = {
+        "latency": lambda: edge_to_output_latency(workdir, samples),
+        "throughput": lambda: trigger_throughput(workdir, 0.5 if quick else 3),
+        "fan_out": lambda: output_fan_out(workdir, samples // 4),
+        "projector_fan_out": lambda: projector_fan_out(workdir, 10 if quick else 100),
+        "memory": lambda: memory_per_pin(workdir),
+        "startup": lambda: startup_time(workdir, 1 if quick else 5),
+    }
+    results: Dict[str, Any] = {}
+    for name in names:
+        print(f"running {name}", file=sys.stderr)
+        results[name] = runs[name]()
+    return results
+
+
+if __name__ == "__main__":
+    main()
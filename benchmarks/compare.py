@@ -0,0 +1,53 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+
+# counts and settings of a run, not results
+IGNORED_KEYS = ("samples", "rounds", "bank_size")
+
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Iterator[Tuple[str, float]]:
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from flatten(value, path)
+        elif isinstance(value, (int, float)) and key not in IGNORED_KEYS:
+            yield path, float(value)
+
+
+def is_regression(path: str, change: float, threshold: float) -> bool:
+    # rates get better when they grow, durations and sizes when they shrink
+    if path.endswith("_per_second"):
+        return change < -threshold
+    return change > threshold
+
+
+def main():
+    parser = argparse.ArgumentParser(description="compares two benchmark results, e.g. of two commits")
+    parser.add_argument("before", type=Path)
+    parser.add_argument("after", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change reported as regression")
+    args = parser.parse_args()
+
+    before = json.loads(args.before.read_text())
+    after = json.loads(args.after.read_text())
+    print(f"{before.get('commit') or '?'} -> {after.get('commit') or '?'}")
+
+    after_values = dict(flatten(after["results"]))
+    regressions = 0
+    for path, old in flatten(before["results"]):
+        new = after_values.get(path)
+        if new is None:
+            continue
+        change = (new - old) / old if old else 0.0
+        regressed = is_regression(path, change, args.threshold)
+        regressions += regressed
+        print(f"{'!' if regressed else ' '} {path:<48}{old:>12.1f}{new:>12.1f}{change:>+9.1%}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
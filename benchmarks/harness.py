@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Coroutine, Dict, Iterable, Sequence, Tuple
+
+import tomlkit
+
+from gpio import SimulatedBackend
+from logger import stop_logging
+from media_control import MediaControl
+
+# every benchmark runs with these project settings on top of the defaults. the rate limits, the device state
+# cache and the watchdog would otherwise decide the result, not the code path that is measured
+BENCH_PROJECT: Dict[str, Any] = {
+    "name": "benchmark",
+    "gpio_backend": "simulated",
+    "input_mode": "edge",
+    "config_reload_interval": 0,
+    "log_level": "ERROR",
+    "metrics_port": 0,
+    "device_state_ttl": 0,
+    "trigger_rate_limit": 0,
+    "global_trigger_rate_limit": 0,
+    "loop_watchdog_interval": 0,
+    "loop_lag_warning": 0,
+}
+
+
+# === CONFIG ===
+def input_pin(gpio_pin: int, triggered_pins: Sequence[str] = (), **options: Any) -> Dict[str, Any]:
+    pin = {"id": f"I#{gpio_pin}", "type": "input", "gpio_pin": gpio_pin, "triggered_pins": list(triggered_pins)}
+    return pin | options
+
+
+def output_pin(gpio_pin: int, trigger_method: str = "while_input", **options: Any) -> Dict[str, Any]:
+    pin = {"id": f"O#{gpio_pin}", "type": "output", "gpio_pin": gpio_pin, "trigger_method": trigger_method}
+    return pin | options
+
+
+def virtual_pin(number: int, ip_address: str, **options: Any) -> Dict[str, Any]:
+    return {
+        "id": f"V#{number}",
+        "type": "virtual",
+        "gpio_pin": -number,
+        "ip_address": ip_address,
+        "virtual_trigger_method": "pjlink_power_on",
+    } | options
+
+
+def mixed_pins(pin_count: int) -> Dict[str, list[Dict[str, Any]]]:
+    # a venue shaped config: 40% inputs, 40% outputs, 20% projectors, every input triggers an output and a
+    # projector and blocks the output of the next input
+    input_count = max(1, pin_count * 2 // 5)
+    output_count = max(1, pin_count * 2 // 5)
+    virtual_count = max(1, pin_count - input_count - output_count)
+    inputs = []
+    for number in range(input_count):
+        output_gpio = input_count + 1 + number % output_count
+        next_output_gpio = input_count + 1 + (number + 1) % output_count
+        inputs.append(
+            input_pin(
+                number + 1,
+                [f"O#{output_gpio}", f"V#{number % virtual_count + 1}"],
+                pins_to_block=[f"O#{next_output_gpio}"],
+            )
+        )
+    outputs = [output_pin(input_count + 1 + number, "pulse") for number in range(output_count)]
+    virtuals = [virtual_pin(number + 1, f"10.0.{number // 250}.{number % 250 + 1}") for number in range(virtual_count)]
+    return {"InputPins": inputs, "OutputPins": outputs, "VirtualPins": virtuals}
+
+
+def write_config(path: Path, pins: Dict[str, list[Dict[str, Any]]], **project: Any) -> Path:
+    sections = {section: configs for section, configs in pins.items() if configs}
+    # a state snapshot per config, a benchmark must not restore the outputs another one left on
+    state_path = str(path.with_suffix(".state.json"))
+    document = {"Project": BENCH_PROJECT | {"state_path": state_path} | project, **sections}
+    path.write_text(tomlkit.dumps(document))
+    return path
+
+
+# === GPIO ===
+class TimedBackend(SimulatedBackend):
+    # simulated gpio bank that reports when an output reached a level, the write is the end of a measurement
+    _waiters: Dict[int, Tuple[bool, asyncio.Future[float]]]
+
+    def __init__(self):
+        super().__init__()
+        self._waiters = {}
+
+    # === METHODS ===
+    def wait_for(self, gpio_pin: int, level: bool) -> asyncio.Future[float]:
+        # resolves with the time.perf_counter of the write that set the level
+        future: asyncio.Future[float] = asyncio.get_running_loop().create_future()
+        self._waiters[gpio_pin] = (level, future)
+        return future
+
+    def write(self, gpio_pin: int, level: bool):
+        super().write(gpio_pin, level)
+        self._resolve((gpio_pin,))
+
+    def write_bank(self, gpio_pins: Sequence[int], levels: int):
+        super().write_bank(gpio_pins, levels)
+        self._resolve(gpio_pins)
+
+    def _resolve(self, gpio_pins: Iterable[int]):
+        now = time.perf_counter()
+        for gpio_pin in gpio_pins:
+            waiter = self._waiters.get(gpio_pin)
+            if waiter is not None and self.read(gpio_pin) == waiter[0]:
+                del self._waiters[gpio_pin]
+                if not waiter[1].done():
+                    waiter[1].set_result(now)
+
+
+# === PJLINK ===
+class FakeProjector:
+    # answers the pjlink commands the service sends, without authentication
+    _address: str
+    _power: str
+    _server: asyncio.Server | None
+    _writers: set[asyncio.StreamWriter]
+    _waiter: asyncio.Future[float] | None
+    _commands: int
+
+    def __init__(self, address: str):
+        self._address = address
+        self._power = "0"
+        self._server = None
+        self._writers = set()
+        self._waiter = None
+        self._commands = 0
+
+    # === PROPERTIES ===
+    @property
+    def address(self):
+        return self._address
+
+    @property
+    def commands(self):
+        return self._commands
+
+    # === METHODS ===
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self._address, 4352)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            # the handlers see the end of the stream and return, a cancelled handler would be logged as error
+            for writer in self._writers:
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def wait_for_command(self) -> asyncio.Future[float]:
+        # resolves with the time.perf_counter when the next power command arrived
+        self._waiter = asyncio.get_running_loop().create_future()
+        return self._waiter
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._writers.add(writer)
+        writer.write(b"PJLINK 0\r")
+        try:
+            while line := await reader.readuntil(b"\r"):
+                writer.write(self._answer(line.decode().strip()).encode() + b"\r")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _answer(self, command: str) -> str:
+        # e.g. %1POWR 1 -> %1POWR=OK, %1POWR ? -> %1POWR=1
+        name, _, param = command.partition(" ")
+        if name != "%1POWR":
+            return f"{name}=ERR1"
+        if param == "?":
+            return f"{name}={self._power}"
+
+        self._power = param
+        self._commands += 1
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(time.perf_counter())
+        return f"{name}=OK"
+
+
+# === MEDIA CONTROL ===
+class BenchControl:
+    # a media control on the simulated gpio bank, driven from coroutines on its own event loop
+    _media_control: MediaControl
+    _backend: TimedBackend
+
+    def __init__(self, config_path: Path):
+        self._backend = TimedBackend()
+        self._media_control = MediaControl("benchmark", config_path, backend=self._backend)
+
+    # === PROPERTIES ===
+    @property
+    def media_control(self):
+        return self._media_control
+
+    @property
+    def backend(self):
+        return self._backend
+
+    @property
+    def loop(self):
+        return self._media_control.event_loop
+
+    # === METHODS ===
+    def run[T](self, coroutine: Coroutine[Any, Any, T]) -> T:
+        return self.loop.run_until_complete(coroutine)
+
+    async def settle(self):
+        # lets the last edges and the activations they started finish, a retrigger while active would be ignored
+        pins = self._media_control.pins.values()
+        while any(pin.activation is not None for pin in pins) or any(
+            pin.is_triggered != self._backend.read(pin.gpio_pin) for pin in self._media_control.get_input_pins()
+        ):
+            await asyncio.sleep(0)
+
+    def close(self):
+        self.run(self._shutdown())
+        self.loop.close()
+        if self._media_control.journal is not None:
+            self._media_control.journal.close()
+        stop_logging()
+
+    async def _shutdown(self):
+        self._media_control.status_poller.stop()
+        await self._media_control.pjlink_pool.close()
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# === RESULTS ===
+def summarize(samples: Sequence[float], unit: float = 1e6, suffix: str = "us") -> Dict[str, float]:
+    # percentiles of durations in seconds, by default in microseconds
+    ordered = sorted(samples)
+
+    def percentile(fraction: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * unit, 1)
+
+    return {
+        "samples": len(ordered),
+        f"min_{suffix}": round(ordered[0] * unit, 1),
+        f"p50_{suffix}": percentile(0.5),
+        f"p90_{suffix}": percentile(0.9),
+        f"p99_{suffix}": percentile(0.99),
+        f"max_{suffix}": round(ordered[-1] * unit, 1),
+        f"mean_{suffix}": round(statistics.fmean(ordered) * unit, 1),
+    }
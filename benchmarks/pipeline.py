@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+from .harness import BenchControl, FakeProjector, input_pin, output_pin, summarize, virtual_pin, write_config
+
+FAN_OUT_SIZES = (1, 10, 100)
+# first gpio of the triggered outputs, below are the inputs
+OUTPUT_BASE = 100
+PJLINK_TIMEOUT = 10
+
+
+def edge_to_output_latency(workdir: Path, samples: int) -> Dict[str, Any]:
+    # one input, one while_input output: time from the input edge to the gpio write of the output, for the
+    # press and for the release
+    pins = {"InputPins": [input_pin(1, ["O#2"])], "OutputPins": [output_pin(2)]}
+    bench = BenchControl(write_config(workdir / "latency.toml", pins))
+
+    async def measure():
+        backend = bench.backend
+        press_latencies: list[float] = []
+        release_latencies: list[float] = []
+        for sample in range(samples + samples // 10):
+            high = backend.wait_for(2, True)
+            pressed_at = time.perf_counter()
+            backend.set_input(1, True)
+            press_done = await high
+            low = backend.wait_for(2, False)
+            released_at = time.perf_counter()
+            backend.set_input(1, False)
+            release_done = await low
+            await bench.settle()
+            # the first runs warm up caches and lazily created objects
+            if sample >= samples // 10:
+                press_latencies.append(press_done - pressed_at)
+                release_latencies.append(release_done - released_at)
+        return {"press": summarize(press_latencies), "release": summarize(release_latencies)}
+
+    try:
+        return bench.run(measure())
+    finally:
+        bench.close()
+
+
+def trigger_throughput(workdir: Path, duration: float, bank_size: int = 16) -> Dict[str, Any]:
+    # a bank of inputs pressed and released together as fast as the outputs follow
+    pins = {
+        "InputPins": [input_pin(gpio, [f"O#{OUTPUT_BASE + gpio}"]) for gpio in range(1, bank_size + 1)],
+        "OutputPins": [output_pin(OUTPUT_BASE + gpio) for gpio in range(1, bank_size + 1)],
+    }
+    bench = BenchControl(write_config(workdir / "throughput.toml", pins))
+
+    async def switch(level: bool):
+        backend = bench.backend
+        outputs = [backend.wait_for(OUTPUT_BASE + gpio, level) for gpio in range(1, bank_size + 1)]
+        for gpio in range(1, bank_size + 1):
+            backend.set_input(gpio, level)
+        await asyncio.gather(*outputs)
+
+    async def measure():
+        rounds = 0
+        writes = bench.backend.write_count
+        started_at = time.perf_counter()
+        while time.perf_counter() - started_at < duration:
+            await switch(True)
+            await switch(False)
+            await bench.settle()
+            rounds += 1
+        elapsed = time.perf_counter() - started_at
+        return {
+            "bank_size": bank_size,
+            "rounds": rounds,
+            "triggers_per_second": round(rounds * bank_size / elapsed, 1),
+            "gpio_writes_per_round": round((bench.backend.write_count - writes) / rounds, 2),
+        }
+
+    try:
+        return bench.run(measure())
+    finally:
+        bench.close()
+
+
+def output_fan_out(workdir: Path, samples: int) -> Dict[str, Any]:
+    # one input triggers n outputs: time from the edge until the last output is written
+    results: Dict[str, Any] = {}
+    for size in FAN_OUT_SIZES:
+        output_gpios = range(OUTPUT_BASE, OUTPUT_BASE + size)
+        pins = {
+            "InputPins": [input_pin(1, [f"O#{gpio}" for gpio in output_gpios])],
+            "OutputPins": [output_pin(gpio) for gpio in output_gpios],
+        }
+        bench = BenchControl(write_config(workdir / f"fan_out_{size}.toml", pins))
+        try:
+            results[str(size)] = bench.run(_measure_output_fan_out(bench, output_gpios, samples))
+        finally:
+            bench.close()
+    return results
+
+
+async def _measure_output_fan_out(bench: BenchControl, output_gpios: range, samples: int) -> Dict[str, Any]:
+    backend = bench.backend
+    durations: list[float] = []
+    for sample in range(samples + 1):
+        outputs = [backend.wait_for(gpio, True) for gpio in output_gpios]
+        pressed_at = time.perf_counter()
+        backend.set_input(1, True)
+        written_at = max(await asyncio.gather(*outputs))
+        backend.set_input(1, False)
+        await bench.settle()
+        if sample > 0:
+            durations.append(written_at - pressed_at)
+    return summarize(durations)
+
+
+def projector_fan_out(workdir: Path, samples: int) -> Dict[str, Any]:
+    # one input triggers n projectors over pjlink: time from the edge until the last projector got its power
+    # command, and until all projectors answered and the input activation ended
+    results: Dict[str, Any] = {}
+    for size in FAN_OUT_SIZES:
+        projectors = [FakeProjector(f"127.0.1.{number}") for number in range(1, size + 1)]
+        pins = {
+            "InputPins": [input_pin(1, [f"V#{number}" for number in range(1, size + 1)], wait_for_triggered_pins=True)],
+            "VirtualPins": [virtual_pin(number, projector.address) for number, projector in enumerate(projectors, 1)],
+        }
+        bench = BenchControl(write_config(workdir / f"projector_fan_out_{size}.toml", pins))
+        try:
+            results[str(size)] = bench.run(_measure_projector_fan_out(bench, projectors, samples))
+        finally:
+            bench.close()
+    return results
+
+
+async def _measure_projector_fan_out(
+    bench: BenchControl, projectors: list[FakeProjector], samples: int
+) -> Dict[str, Any]:
+    await asyncio.gather(*(projector.start() for projector in projectors))
+    commanded: list[float] = []
+    answered: list[float] = []
+    connect = 0.0
+    try:
+        for sample in range(samples + 1):
+            commands = [projector.wait_for_command() for projector in projectors]
+            pressed_at = time.perf_counter()
+            bench.backend.set_input(1, True)
+            # a failed command never arrives, the timeout ends the benchmark instead of hanging
+            commanded_at = max(await asyncio.wait_for(asyncio.gather(*commands), PJLINK_TIMEOUT))
+            await bench.settle()
+            answered_at = time.perf_counter()
+            bench.backend.set_input(1, False)
+            await bench.settle()
+            # the first trigger opens the connections, later ones reuse them
+            if sample == 0:
+                connect = answered_at - pressed_at
+                continue
+            commanded.append(commanded_at - pressed_at)
+            answered.append(answered_at - pressed_at)
+    finally:
+        await asyncio.gather(*(projector.stop() for projector in projectors))
+    return {"connect_ms": round(connect * 1000, 2), "commanded": summarize(commanded), "answered": summarize(answered)}
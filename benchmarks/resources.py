@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import gc
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict
+
+from .harness import BenchControl, mixed_pins, write_config
+
+MEMORY_SIZES = (100, 1000)
+STARTUP_SIZES = (10, 100, 1000)
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+
+def memory_per_pin(workdir: Path) -> Dict[str, Any]:
+    # python heap of a media control with n pins minus the heap of one with the smallest config, per pin.
+    # the gpio bank, the mmap of the journal and the sockets are not python allocations
+    smallest = mixed_pins(0)
+    baseline = _traced_memory(write_config(workdir / "memory_0.toml", smallest))
+    results: Dict[str, Any] = {}
+    for size in MEMORY_SIZES:
+        pins = mixed_pins(size)
+        pin_count = _pin_count(pins) - _pin_count(smallest)
+        used = _traced_memory(write_config(workdir / f"memory_{size}.toml", pins)) - baseline
+        results[str(size)] = {"bytes": used, "bytes_per_pin": round(used / pin_count)}
+    return results
+
+
+def _pin_count(pins: Dict[str, list[Dict[str, Any]]]) -> int:
+    return sum(len(configs) for configs in pins.values())
+
+
+def _traced_memory(config_path: Path) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        bench = BenchControl(config_path)
+        gc.collect()
+        used, _ = tracemalloc.get_traced_memory()
+        bench.close()
+    finally:
+        tracemalloc.stop()
+    return used
+
+
+def startup_time(workdir: Path, runs: int) -> Dict[str, Any]:
+    # a fresh interpreter per run, from the first import until the event loop runs with all inputs live.
+    # cold runs parse the config file, warm runs load the config snapshot of the previous run
+    results: Dict[str, Any] = {}
+    for size in STARTUP_SIZES:
+        config_path = write_config(workdir / f"startup_{size}.toml", mixed_pins(size))
+        home = workdir / f"startup_home_{size}"
+        cold = [_start(config_path, home, clear_snapshot=True) for _ in range(runs)]
+        warm = [_start(config_path, home, clear_snapshot=False) for _ in range(runs)]
+        results[str(size)] = {"cold": _median_startup(cold), "warm": _median_startup(warm)}
+    return results
+
+
+def _start(config_path: Path, home: Path, clear_snapshot: bool) -> Dict[str, Any]:
+    if clear_snapshot:
+        for snapshot in home.glob(".cache/*/config_snapshots/*.json"):
+            snapshot.unlink()
+    environment = os.environ | {"HOME": str(home), "RUNTIME_DIRECTORY": str(home)}
+    started_at = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", str(config_path)],
+        cwd=REPO_DIR,
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    process_time = time.perf_counter() - started_at
+    if process.returncode != 0:
+        raise RuntimeError(f"startup benchmark failed: {process.stderr.strip()}")
+    # the last line is the report, log records may come before it
+    report: Dict[str, Any] = json.loads(process.stdout.strip().splitlines()[-1])
+    report["process"] = process_time
+    return report
+
+
+def _median_startup(reports: list[Dict[str, Any]]) -> Dict[str, Any]:
+    stages = {stage for report in reports for stage in report["stages"]}
+    return {
+        "process_ms": round(statistics.median(report["process"] for report in reports) * 1000, 1),
+        "total_ms": round(statistics.median(report["total"] for report in reports) * 1000, 1),
+        "stages_ms": {
+            stage: round(statistics.median(report["stages"].get(stage, 0) for report in reports) * 1000, 1)
+            for stage in sorted(stages)
+        },
+    }
@@ -0,0 +1,22 @@
+# started in a fresh interpreter by resources.startup_time, prints the startup stages as one json line
+import sys
+
+import benchmarks  # noqa: F401  puts src on the path
+from startup_timer import StartupTimer  # noqa: E402, I001
+
+startup_timer = StartupTimer()
+
+import json  # noqa: E402
+
+from logger import stop_logging  # noqa: E402
+from media_control import MediaControl  # noqa: E402
+
+startup_timer.mark("imports")
+controller = MediaControl("benchmark", sys.argv[1], startup_timer=startup_timer)
+loop = controller.event_loop
+# stops after the iteration that marked the event loop stage
+loop.call_soon(loop.call_soon, loop.stop)
+controller.start_event_loop()
+stop_logging()
+
+print(json.dumps({"stages": dict(startup_timer.stages), "total": startup_timer.total}))
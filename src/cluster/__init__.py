@@ -0,0 +1,6 @@
+from .messages import ClusterError as ClusterError
+from .messages import ClusterMessage as ClusterMessage
+from .node import DEFAULT_CLUSTER_PORT as DEFAULT_CLUSTER_PORT
+from .node import ClusterNode as ClusterNode
+from .node import ClusterPeer as ClusterPeer
+from .protocol import ClusterProtocol as ClusterProtocol
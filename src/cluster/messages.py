@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+from typing import Any, Dict
+
+type ClusterMessage = Dict[str, Any]
+
+# a message is one datagram: [16 byte hmac when a secret is set] + compact json
+MAC_SIZE = 16
+MAX_DATAGRAM_SIZE = 65507
+
+
+class ClusterError(Exception):
+    pass
+
+
+def encode_message(message: ClusterMessage, secret: bytes) -> bytes:
+    payload = json.dumps(message, separators=(",", ":")).encode()
+    if not secret:
+        return payload
+    return hmac.digest(secret, payload, hashlib.sha256)[:MAC_SIZE] + payload
+
+
+def decode_message(datagram: bytes, secret: bytes) -> ClusterMessage:
+    # raises ClusterError for datagrams that are not from a node of the cluster
+    payload = datagram
+    if secret:
+        mac, payload = datagram[:MAC_SIZE], datagram[MAC_SIZE:]
+        if not hmac.compare_digest(mac, hmac.digest(secret, payload, hashlib.sha256)[:MAC_SIZE]):
+            raise ClusterError("bad message signature")
+    try:
+        message = json.loads(payload)
+    except ValueError as e:
+        raise ClusterError(f"malformed message: {e}") from None
+    if not isinstance(message, dict) or not isinstance(message.get("node"), str):
+        raise ClusterError("malformed message")
+    return message  # type: ignore
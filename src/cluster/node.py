@@ -0,0 +1,379 @@
+from __future__ import annotations
+
+import asyncio
+import socket
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Mapping, Tuple
+
+from logger import get_logger
+from metrics import CLUSTER_RETRANSMITS, CLUSTER_ROUND_TRIP
+
+from .messages import ClusterError, ClusterMessage, decode_message, encode_message
+
+if TYPE_CHECKING:
+    from .protocol import ClusterProtocol
+
+type PeerAddress = Tuple[str, int]
+
+logger = get_logger("cluster")
+
+DEFAULT_CLUSTER_PORT = 7450
+# first retransmit of an unanswered message, doubles up to the maximum until the cluster timeout is reached
+RETRANSMIT_INTERVAL = 0.01
+MAX_RETRANSMIT_INTERVAL = 0.2
+# replies kept per peer, a retransmitted message is answered with the same reply instead of running twice
+REPLY_WINDOW = 1024
+
+
+def parse_peer_address(address: str, default_port: int = DEFAULT_CLUSTER_PORT) -> PeerAddress:
+    host, separator, port = address.rpartition(":")
+    if not separator:
+        return address, default_port
+    return host, int(port)
+
+
+class ClusterPeer:
+    _name: str
+    _address: PeerAddress
+    _epoch: int | None  # start time of the running instance of the peer, changes when it restarts
+    _last_seen: float
+    _is_up: bool
+    _replies: OrderedDict[int, ClusterMessage]
+
+    def __init__(self, name: str, address: PeerAddress):
+        self._name = name
+        self._address = address
+        self._epoch = None
+        self._last_seen = 0
+        self._is_up = False
+        self._replies = OrderedDict()
+
+    # === PROPERTIES ===
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def address(self):
+        return self._address
+
+    @address.setter
+    def address(self, value: PeerAddress):
+        self._address = value
+
+    @property
+    def epoch(self):
+        return self._epoch
+
+    @property
+    def last_seen(self):
+        return self._last_seen
+
+    @property
+    def is_up(self):
+        return self._is_up
+
+    # === METHODS ===
+    def seen(self, epoch: int) -> bool:
+        # True if this is the first message of a new instance of the peer
+        self._last_seen = time.monotonic()
+        self._is_up = True
+        if epoch == self._epoch:
+            return False
+        self._epoch = epoch
+        self._replies.clear()
+        return True
+
+    def check_alive(self, timeout: float) -> bool:
+        # False once when the peer stopped answering
+        if self._is_up and time.monotonic() - self._last_seen > timeout:
+            self._is_up = False
+            return False
+        return True
+
+    def reply_for(self, seq: int) -> ClusterMessage | None:
+        return self._replies.get(seq)
+
+    def remember(self, seq: int, reply: ClusterMessage):
+        self._replies[seq] = reply
+        if len(self._replies) > REPLY_WINDOW:
+            self._replies.popitem(last=False)
+
+
+class PendingMessage:
+    # a message waiting for its ack, retransmitted until the ack arrives or the cluster timeout is reached
+    peer: ClusterPeer
+    seq: int
+    datagram: bytes
+    future: asyncio.Future[ClusterMessage]
+    sent_at: float
+    attempts: int
+    handle: asyncio.TimerHandle | None
+
+    def __init__(
+        self, peer: ClusterPeer, seq: int, datagram: bytes, future: asyncio.Future[ClusterMessage], sent_at: float
+    ):
+        self.peer = peer
+        self.seq = seq
+        self.datagram = datagram
+        self.future = future
+        self.sent_at = sent_at
+        self.attempts = 0
+        self.handle = None
+
+
+class ClusterNode:
+    # udp link to the other controllers of a venue. commands carry a sequence number, are retransmitted until
+    # the peer acks them and are run once per sequence number, heartbeats tell when a peer is up or restarted
+    _protocol: ClusterProtocol
+    _name: str
+    _host: str
+    _port: int
+    _peers: Dict[str, ClusterPeer]
+    _secret: bytes
+    _timeout: float
+    _heartbeat_interval: float
+    _epoch: int
+    _next_seq: int
+    _pending: Dict[int, PendingMessage]
+    _loop: asyncio.AbstractEventLoop | None
+    _transport: asyncio.DatagramTransport | None
+    _heartbeat_task: asyncio.Task[None] | None
+
+    def __init__(
+        self,
+        protocol: ClusterProtocol,
+        name: str = "",
+        host: str = "0.0.0.0",
+        port: int = DEFAULT_CLUSTER_PORT,
+        peers: Mapping[str, str] | None = None,
+        secret: str = "",
+        timeout: float = 1,
+        heartbeat_interval: float = 1,
+    ):
+        self._protocol = protocol
+        self._name = name
+        self._host = host
+        self._port = port
+        self._peers = {
+            peer_name: ClusterPeer(peer_name, parse_peer_address(address, port))
+            for peer_name, address in (peers or {}).items()
+        }
+        self._secret = secret.encode()
+        self._timeout = timeout
+        self._heartbeat_interval = heartbeat_interval
+        # start time in ms, late datagrams of a previous instance are told apart from a restart
+        self._epoch = time.time_ns() // 1_000_000
+        self._next_seq = 0
+        self._pending = {}
+        self._loop = None
+        self._transport = None
+        self._heartbeat_task = None
+
+    # === PROPERTIES ===
+    @property
+    def protocol(self):
+        return self._protocol
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def epoch(self):
+        return self._epoch
+
+    @property
+    def peers(self):
+        return self._peers
+
+    @property
+    def pending(self):
+        return self._pending
+
+    @property
+    def is_enabled(self):
+        return bool(self._name)
+
+    @property
+    def is_running(self):
+        return self._transport is not None
+
+    # === METHODS ===
+    def start(self, loop: asyncio.AbstractEventLoop):
+        if self.is_enabled:
+            self._loop = loop
+            loop.create_task(self._serve())
+
+    async def stop(self):
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        for pending in list(self._pending.values()):
+            self._fail(pending, ClusterError("cluster node stopped"))
+
+    def request(self, peer_name: str, message: ClusterMessage) -> asyncio.Future[ClusterMessage]:
+        # resolves with the ack of the peer, fails with a ClusterError if the peer does not answer in time
+        loop = self._loop if self._loop is not None else asyncio.get_running_loop()
+        future: asyncio.Future[ClusterMessage] = loop.create_future()
+        peer = self._peers.get(peer_name)
+        if peer is None:
+            future.set_exception(ClusterError(f"unknown cluster node {peer_name}"))
+            return future
+        if self._transport is None:
+            future.set_exception(ClusterError("cluster is not running"))
+            return future
+
+        self._next_seq += 1
+        datagram = encode_message(
+            {**message, "node": self._name, "epoch": self._epoch, "seq": self._next_seq}, self._secret
+        )
+        pending = PendingMessage(peer, self._next_seq, datagram, future, loop.time())
+        self._pending[pending.seq] = pending
+        self._transmit(pending)
+        return future
+
+    def send(self, peer_name: str, message: ClusterMessage):
+        # like request, for messages nobody waits for, a lost message is logged
+        self.request(peer_name, message).add_done_callback(self._on_sent)
+
+    def broadcast(self, message: ClusterMessage):
+        for peer_name in self._peers:
+            self.send(peer_name, message)
+
+    def _on_sent(self, future: asyncio.Future[ClusterMessage]):
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning("cluster message lost: %s", future.exception())
+
+    def _transmit(self, pending: PendingMessage):
+        assert self._loop is not None
+        if pending.future.done():
+            # the waiter gave up
+            self._pending.pop(pending.seq, None)
+            return
+        remaining = pending.sent_at + self._timeout - self._loop.time()
+        if remaining <= 0 or self._transport is None:
+            self._fail(pending, ClusterError(f"cluster node {pending.peer.name} did not answer"))
+            return
+
+        if pending.attempts > 0:
+            CLUSTER_RETRANSMITS.inc(pending.peer.name)
+        self._transport.sendto(pending.datagram, pending.peer.address)
+        delay = min(MAX_RETRANSMIT_INTERVAL, RETRANSMIT_INTERVAL * 2**pending.attempts, remaining)
+        pending.attempts += 1
+        pending.handle = self._loop.call_later(delay, self._transmit, pending)
+
+    def _fail(self, pending: PendingMessage, error: ClusterError):
+        self._pending.pop(pending.seq, None)
+        if pending.handle is not None:
+            pending.handle.cancel()
+        if not pending.future.done():
+            pending.future.set_exception(error)
+
+    async def _serve(self):
+        assert self._loop is not None
+        try:
+            # resolved once, sendto would look up host names for every datagram
+            for peer in self._peers.values():
+                host, port = peer.address
+                [(*_, address), *_] = await self._loop.getaddrinfo(host, port, family=socket.AF_INET)
+                peer.address = address
+            self._transport, _ = await self._loop.create_datagram_endpoint(
+                lambda: ClusterDatagramProtocol(self), local_addr=(self._host, self._port)
+            )
+        except OSError as e:
+            logger.error("could not start cluster node %s: %s", self._name, e)
+            return
+        logger.info("cluster node %s listening on %s:%s", self._name, self._host, self._port)
+        self._heartbeat_task = self._loop.create_task(self._heartbeat())
+
+    async def _heartbeat(self):
+        hello = encode_message({"kind": "hello", "node": self._name, "epoch": self._epoch}, self._secret)
+        while self._transport is not None:
+            for peer in self._peers.values():
+                self._transport.sendto(hello, peer.address)
+                if not peer.check_alive(3 * self._heartbeat_interval):
+                    logger.warning("cluster node %s is down", peer.name)
+            await asyncio.sleep(self._heartbeat_interval)
+
+    # --- Receiving ---
+
+    def datagram_received(self, datagram: bytes, address: PeerAddress):
+        try:
+            message = decode_message(datagram, self._secret)
+        except ClusterError as e:
+            logger.debug("dropped datagram from %s: %s", address, e)
+            return
+        peer = self._peers.get(message["node"])
+        if peer is None:
+            logger.debug("dropped datagram of unknown cluster node %s", message["node"])
+            return
+
+        epoch = message.get("epoch", 0)
+        if peer.epoch is not None and epoch < peer.epoch:
+            return
+        was_up = peer.is_up
+        if peer.seen(epoch):
+            logger.info("cluster node %s is up", peer.name)
+            self._protocol.on_peer_restart(peer.name)
+        elif not was_up:
+            logger.info("cluster node %s is back", peer.name)
+
+        match message.get("kind"):
+            case "hello":
+                pass
+            case "ack":
+                self._on_ack(peer, message)
+            case _:
+                self._on_command(peer, message, address)
+
+    def _on_command(self, peer: ClusterPeer, message: ClusterMessage, address: PeerAddress):
+        seq = message.get("seq")
+        if not isinstance(seq, int) or self._transport is None:
+            return
+        reply = peer.reply_for(seq)
+        if reply is None:
+            reply = {"kind": "ack", "node": self._name, "epoch": self._epoch, "seq": seq}
+            try:
+                reply["result"] = self._protocol.handle(peer.name, message)
+                reply["ok"] = True
+            except Exception as e:
+                reply["ok"] = False
+                reply["error"] = str(e)
+            peer.remember(seq, reply)
+        # duplicates are acked again, the first ack may have been lost
+        self._transport.sendto(encode_message(reply, self._secret), address)
+
+    def _on_ack(self, peer: ClusterPeer, message: ClusterMessage):
+        pending = self._pending.get(message.get("seq", 0))
+        if pending is None or pending.peer is not peer:
+            return
+        del self._pending[pending.seq]
+        if pending.handle is not None:
+            pending.handle.cancel()
+        assert self._loop is not None
+        CLUSTER_ROUND_TRIP.observe(self._loop.time() - pending.sent_at, peer.name)
+        if pending.future.done():
+            return
+        if message.get("ok"):
+            pending.future.set_result(message)
+        else:
+            pending.future.set_exception(ClusterError(f"cluster node {peer.name}: {message.get('error')}"))
+
+
+class ClusterDatagramProtocol(asyncio.DatagramProtocol):
+    _node: ClusterNode
+
+    def __init__(self, node: ClusterNode):
+        self._node = node
+
+    def datagram_received(self, data: bytes, addr: PeerAddress):
+        self._node.datagram_received(data, addr)
+
+    def error_received(self, exc: Exception):
+        # e.g. icmp port unreachable while a peer is down, the retransmit timer handles it
+        logger.debug("cluster socket error: %s", exc)
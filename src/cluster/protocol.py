@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, Tuple
+
+from pins import NODE_SEPARATOR, InputPin, PinEvent, RemotePin, split_pin_id
+
+from .messages import ClusterError
+
+if TYPE_CHECKING:
+    from media_control import MediaControl, PinUnion
+
+    from .messages import ClusterMessage
+
+
+class ClusterProtocol:
+    # runs the commands of other nodes against the media control and keeps the pins of other nodes mirrored
+    _media_control: MediaControl
+    _remote_pins: Dict[str, RemotePin]
+    _applied: Dict[Tuple[str, str], int]  # (node, pin id) -> seq of the last command applied to the pin
+    _state_seqs: Dict[str, int]  # remote pin id -> seq of the last replicated state applied to the proxy
+    _changed_states: Dict[str, bool]  # pin id -> blocked, replicated to all nodes at the end of the loop iteration
+
+    def __init__(self, media_control: MediaControl):
+        self._media_control = media_control
+        self._remote_pins = {}
+        self._applied = {}
+        self._state_seqs = {}
+        self._changed_states = {}
+
+    # === PROPERTIES ===
+    @property
+    def remote_pins(self):
+        return self._remote_pins
+
+    # === METHODS ===
+    def remote_pin(self, pin_id: str) -> RemotePin:
+        # one proxy per pin of another node, kept across config reloads
+        remote_pin = self._remote_pins.get(pin_id)
+        if remote_pin is None:
+            node, remote_id = split_pin_id(pin_id)
+            remote_pin = RemotePin(node, remote_id, self._media_control.cluster)
+            self._remote_pins[pin_id] = remote_pin
+        return remote_pin
+
+    def handle(self, node: str, message: ClusterMessage) -> Any:
+        kind = message.get("kind")
+        if kind == "state":
+            self._apply_states(node, message["seq"], message.get("pins", {}))
+            return None
+
+        pin = self._get_pin(message.get("pin"))
+        # datagrams may overtake each other, an older command must not undo a newer one
+        key = (node, pin.id)
+        if self._applied.get(key, 0) > message["seq"]:
+            return {"stale": True}
+        self._applied[key] = message["seq"]
+
+        match kind:
+            case "trigger":
+                if isinstance(pin, InputPin):
+                    raise ClusterError(f"input pin {pin.id} can not be triggered")
+                # the node only sends a release for a started press
+                result = self._media_control.press_pin(pin)
+                return {"started": result.status == "started", "status": result.status}
+            case "release":
+                self._media_control.release_pin(pin)
+            case "block":
+                pin.block()
+            case "unblock":
+                pin.unblock()
+            case _:
+                raise ClusterError(f"unknown command {kind}")
+        return None
+
+    def on_peer_restart(self, node: str):
+        # the node lost its state: tell it which of our pins are blocked and assert our blocks of its pins again
+        for key in [key for key in self._applied if key[0] == node]:
+            del self._applied[key]
+        for pin_id in [pin_id for pin_id in self._state_seqs if split_pin_id(pin_id)[0] == node]:
+            del self._state_seqs[pin_id]
+        cluster = self._media_control.cluster
+        states = {pin.id: pin.is_blocked for pin in self._media_control.pins.values()}
+        cluster.send(node, {"kind": "state", "pins": states})
+        for remote_pin in self._remote_pins.values():
+            if remote_pin.node == node and remote_pin.is_held:
+                cluster.send(node, {"kind": "block", "pin": remote_pin.remote_id})
+
+    def publish(self, pin: PinUnion, event: PinEvent):
+        # block changes of one loop iteration go out as one message
+        if event not in (PinEvent.BLOCK, PinEvent.UNBLOCK):
+            return
+        if not self._changed_states:
+            self._media_control.event_loop.call_soon(self._flush_states)
+        self._changed_states[pin.id] = event == PinEvent.BLOCK
+
+    def _flush_states(self):
+        states = self._changed_states
+        self._changed_states = {}
+        # e.g. blocks restored at startup, the peers get the full state once they are seen
+        if self._media_control.cluster.is_running:
+            self._media_control.cluster.broadcast({"kind": "state", "pins": states})
+
+    def _apply_states(self, node: str, seq: int, states: Dict[str, bool]):
+        for pin_id, is_blocked in states.items():
+            remote_pin = self._remote_pins.get(f"{node}{NODE_SEPARATOR}{pin_id}")
+            if remote_pin is None or self._state_seqs.get(remote_pin.id, 0) > seq:
+                continue
+            self._state_seqs[remote_pin.id] = seq
+            remote_pin.apply_remote_state(is_blocked)
+
+    def _get_pin(self, pin_id: Any) -> PinUnion:
+        pin = self._media_control.get_pin_by_id(pin_id) if isinstance(pin_id, str) else None
+        if pin is None:
+            raise ClusterError(f"unknown pin {pin_id}")
+        return pin
@@ -1,9 +1,17 @@
 from typing import TYPE_CHECKING
 
+from .config_analysis import ConfigReport as ConfigReport
+from .config_analysis import analyze_config as analyze_config
+from .config_diff import ConfigDiff as ConfigDiff
+from .config_diff import diff_config as diff_config
 from .config_parser import ConfigParser as ConfigParser
+from .config_watcher import ConfigWatcher as ConfigWatcher
 
 if TYPE_CHECKING:
     from .config_parser import Config as Config
+    from .config_parser import InputMode as InputMode
     from .config_parser import InputPinConfig as InputPinConfig
     from .config_parser import OutputPinConfig as OutputPinConfig
+    from .config_parser import SceneConfig as SceneConfig
+    from .config_parser import SceneStepConfig as SceneStepConfig
     from .config_parser import VirtualPinConfig as VirtualPinConfig
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, NamedTuple
+
+from pins import is_remote_pin_id, split_pin_id
+
+if TYPE_CHECKING:
+    from .config_parser import Config, PinConfig, Project, SceneConfig
+
+SECTION_TYPES = {"InputPins": "input", "OutputPins": "output", "VirtualPins": "virtual"}
+ID_PREFIXES = {"input": "I", "output": "O", "virtual": "V"}
+
+
+class ConfigReport(NamedTuple):
+    errors: list[str]  # the config can not be applied
+    warnings: list[str]  # the config works, but probably not as intended
+
+    @property
+    def is_valid(self):
+        return not self.errors
+
+
+def expected_pin_id(pin_config: PinConfig) -> str:
+    # media control derives the pin id from the type and the gpio pin
+    return f"{ID_PREFIXES.get(pin_config['type'], '?')}#{abs(pin_config['gpio_pin'])}"
+
+
+def analyze_config(config: Config) -> ConfigReport:
+    # static checks of the pin graph, run before a config is applied. the trigger graph has no loops: only inputs
+    # trigger pins and scenes, nothing triggers an input and scenes do not start scenes
+    report = ConfigReport([], [])
+    pin_configs = _check_pins(config, report)
+    scene_steps = {scene["id"]: [step["pin"] for step in scene["steps"]] for scene in config["Scenes"]}
+
+    # edges from pins and scenes to the pins and scenes they trigger
+    triggers: Dict[str, list[str]] = {}
+    for pin_id, pin_config in pin_configs.items():
+        _check_relations(pin_config, pin_configs, scene_steps, config["Project"], report)
+        triggers[pin_id] = [*pin_config.get("triggered_pins", []), *pin_config.get("triggered_scenes", [])]  # type: ignore
+    for scene_config in config["Scenes"]:
+        _check_scene(scene_config, pin_configs, report)
+        triggers[scene_config["id"]] = scene_steps[scene_config["id"]]
+
+    triggered = {target for targets in triggers.values() for target in targets}
+    for pin_id, pin_config in pin_configs.items():
+        if pin_config["type"] != "input":
+            if config["Project"]["cluster_node"]:
+                # may be triggered by another node of the cluster
+                continue
+            if pin_id not in triggered:
+                report.warnings.append(f"pin {pin_id} is never triggered by an input or a scene")
+        elif not (triggers[pin_id] or pin_config["pins_to_block"] or pin_config["pins_to_unblock"]):
+            report.warnings.append(f"input pin {pin_id} has no effect")
+
+    return report
+
+
+def _check_pins(config: Config, report: ConfigReport) -> Dict[str, PinConfig]:
+    pin_configs: Dict[str, PinConfig] = {}
+    for section, pin_type in SECTION_TYPES.items():
+        for pin_config in config[section]:  # type: ignore
+            pin_id = pin_config["id"]
+            if pin_config["type"] != pin_type:
+                report.errors.append(f"pin {pin_id} of type {pin_config['type']} is listed in {section}")
+            if pin_type == "virtual" and pin_config["gpio_pin"] > 0:
+                report.errors.append(f"virtual pin {pin_id} needs a negative gpio_pin")
+            if pin_id != expected_pin_id(pin_config):
+                report.errors.append(f"pin {pin_id} has to be called {expected_pin_id(pin_config)}")
+            if pin_id in pin_configs:
+                report.errors.append(f"pin {pin_id} is configured twice")
+            pin_configs[pin_id] = pin_config
+    return pin_configs
+
+
+def _check_relations(
+    pin_config: PinConfig,
+    pin_configs: Dict[str, PinConfig],
+    scene_steps: Dict[str, list[str]],
+    project: Project,
+    report: ConfigReport,
+):
+    pin_id = pin_config["id"]
+    for relation in ("pins_to_block", "pins_to_unblock", "triggered_pins"):
+        for target_id in pin_config.get(relation, []):  # type: ignore
+            target = pin_configs.get(target_id)
+            if is_remote_pin_id(target_id):
+                _check_remote_pin(pin_id, relation, target_id, project, report)
+            elif target is None:
+                report.errors.append(f"pin {pin_id}: {relation} references unknown pin {target_id}")
+            elif relation == "triggered_pins" and target["type"] == "input":
+                report.errors.append(f"pin {pin_id} can not trigger input pin {target_id}")
+            elif target_id == pin_id:
+                report.warnings.append(f"pin {pin_id}: {relation} references the pin itself")
+
+    for target_id in sorted(set(pin_config["pins_to_block"]) & set(pin_config["pins_to_unblock"])):
+        report.errors.append(f"pin {pin_id} blocks and unblocks {target_id}")
+
+    for scene_id in pin_config.get("triggered_scenes", []):  # type: ignore
+        if scene_id not in scene_steps:
+            report.errors.append(f"pin {pin_id} triggers unknown scene {scene_id}")
+
+
+def _check_remote_pin(pin_id: str, relation: str, target_id: str, project: Project, report: ConfigReport):
+    node, remote_id = split_pin_id(target_id)
+    if not project["cluster_node"]:
+        report.errors.append(f"pin {pin_id}: {relation} references {target_id}, but cluster_node is not set")
+    elif node == project["cluster_node"]:
+        report.errors.append(f"pin {pin_id}: {relation} references its own node, use {remote_id}")
+    elif node not in project["cluster_peers"]:
+        report.errors.append(f"pin {pin_id}: {relation} references unknown cluster node {node}")
+    elif relation == "triggered_pins" and remote_id.startswith(f"{ID_PREFIXES['input']}#"):
+        report.errors.append(f"pin {pin_id} can not trigger input pin {target_id}")
+
+
+def _check_scene(scene_config: SceneConfig, pin_configs: Dict[str, PinConfig], report: ConfigReport):
+    scene_id = scene_config["id"]
+    steps = scene_config["steps"]
+    for position, step in enumerate(steps, 1):
+        step_pin = pin_configs.get(step["pin"])
+        if step_pin is None:
+            report.errors.append(f"scene {scene_id} references unknown pin {step['pin']}")
+        elif step_pin["type"] == "input":
+            report.errors.append(f"scene {scene_id} can not trigger input pin {step['pin']}")
+        elif step["action"] == "press" and step["wait"] and step_pin.get("trigger_method") == "while_input":
+            # the activation of a pressed while_input pin lasts until the pin is released
+            releases = [
+                later_position
+                for later_position, later_step in enumerate(steps[position:], position + 1)
+                if later_step["pin"] == step["pin"] and later_step["action"] in ("release", "cancel")
+            ]
+            if releases:
+                report.errors.append(
+                    f"scene {scene_id} waits in step {position} for {step['pin']}, "
+                    f"which is only released by its own step {releases[0]}"
+                )
+            else:
+                report.warnings.append(
+                    f"scene {scene_id} waits in step {position} until {step['pin']} is released over the api"
+                )
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, NamedTuple
+
+if TYPE_CHECKING:
+    from .config_parser import Config, PinConfig
+
+
+class ConfigDiff(NamedTuple):
+    added: list[PinConfig]
+    removed: list[PinConfig]
+    changed: list[PinConfig]  # same pin, other parameters changed
+    project_changed: bool
+    scenes_changed: bool
+
+    @property
+    def is_empty(self):
+        return not (self.added or self.removed or self.changed or self.project_changed or self.scenes_changed)
+
+
+def _pin_configs(config: Config) -> Dict[str, PinConfig]:
+    return {
+        pin_config["id"]: pin_config
+        for pin_config in config["InputPins"] + config["OutputPins"] + config["VirtualPins"]
+    }
+
+
+def diff_config(old: Config, new: Config) -> ConfigDiff:
+    old_pins = _pin_configs(old)
+    new_pins = _pin_configs(new)
+
+    added: list[PinConfig] = []
+    removed: list[PinConfig] = []
+    changed: list[PinConfig] = []
+
+    for pin_id, old_pin in old_pins.items():
+        if pin_id not in new_pins:
+            removed.append(old_pin)
+
+    for pin_id, new_pin in new_pins.items():
+        old_pin = old_pins.get(pin_id)
+        if old_pin is None:
+            added.append(new_pin)
+        elif old_pin["type"] != new_pin["type"] or old_pin["gpio_pin"] != new_pin["gpio_pin"]:
+            # a different pin behind the same id, set it up again
+            removed.append(old_pin)
+            added.append(new_pin)
+        elif old_pin != new_pin:
+            changed.append(new_pin)
+
+    return ConfigDiff(
+        added, removed, changed, old["Project"] != new["Project"], old.get("Scenes", []) != new.get("Scenes", [])
+    )
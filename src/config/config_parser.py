@@ -1,19 +1,76 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import os
 from datetime import datetime
 from pathlib import Path
-from typing import TYPE_CHECKING, Literal, Sequence, TypedDict
+from typing import TYPE_CHECKING, Any, Literal, Sequence, TypedDict
 
-import tomlkit
+from logger import get_logger
+
+from .config_analysis import analyze_config
 
 if TYPE_CHECKING:
+    from gpio import BackendName
     from pins.input_pin import InputPin
     from pins.output_pin import OutputPin, OutputTriggerMethods
-    from pins.pin import Pin
+    from pins.pin import Pin, PinType, RetriggerPolicy
     from pins.virtual_pin import VirtualPin, VirtualTriggerMethod
+    from scenes import PreemptPolicy, SceneStepAction
+
+    type InputMode = Literal["edge", "poll"]
+    type LogLevel = Literal["DEBUG", "INFO", "WARNING", "ERROR"]
 
     class Project(TypedDict):
         name: str
+        gpio_backend: BackendName
+        input_mode: InputMode
+        scan_interval: float
+        config_reload_interval: float
+        log_level: LogLevel
+        log_levels: dict[PinType, LogLevel]
+        log_rate_limit: float
+        log_burst: int
+        metrics_host: str
+        metrics_port: int
+        pjlink_keepalive_interval: float
+        pjlink_idle_timeout: float
+        pjlink_status_interval: float
+        pjlink_timeout: float
+        pjlink_retries: int
+        pjlink_retry_delay: float
+        pjlink_retry_max_delay: float
+        pjlink_failure_threshold: int
+        pjlink_probe_interval: float
+        device_state_ttl: float
+        max_concurrent_outputs: int
+        max_concurrent_virtual_pins: int
+        trigger_rate_limit: float
+        trigger_burst: int
+        global_trigger_rate_limit: float
+        global_trigger_burst: int
+        journal_path: str
+        journal_capacity: int
+        control_host: str
+        control_port: int
+        control_socket: str
+        control_http_port: int
+        cluster_node: str
+        cluster_host: str
+        cluster_port: int
+        cluster_peers: dict[str, str]
+        cluster_secret: str
+        cluster_timeout: float
+        cluster_heartbeat_interval: float
+        realtime: bool
+        realtime_priority: int
+        realtime_cpus: list[int]
+        realtime_lock_memory: bool
+        loop_watchdog_interval: float
+        loop_lag_warning: float
+        state_path: str
+        state_interval: float
 
     class PinConfig(TypedDict):
         id: str
@@ -22,10 +79,17 @@ if TYPE_CHECKING:
         display_name: str
         pins_to_block: list[str]
         pins_to_unblock: list[str]
+        retrigger_policy: RetriggerPolicy
 
     class InputPinConfig(PinConfig):
         activation_delay: int
         triggered_pins: list[str]
+        triggered_scenes: list[str]
+        wait_for_triggered_pins: bool
+        debounce_settle_time: float
+        debounce_stable_samples: int
+        min_press_time: float
+        min_release_time: float
 
     class OutputPinConfig(PinConfig):
         hold_time: int
@@ -36,11 +100,25 @@ if TYPE_CHECKING:
         virtual_trigger_method: VirtualTriggerMethod
         password: str
 
+    class SceneStepConfig(TypedDict):
+        pin: str
+        action: SceneStepAction
+        delay: float
+        wait: bool
+
+    class SceneConfig(TypedDict):
+        id: str
+        display_name: str
+        group: str
+        on_preempt: PreemptPolicy
+        steps: list[SceneStepConfig]
+
     class Config(TypedDict):
         Project: Project
         InputPins: list[InputPinConfig]
         OutputPins: list[OutputPinConfig]
         VirtualPins: list[VirtualPinConfig]
+        Scenes: list[SceneConfig]
 
     class LoadedConfig(Config, total=False): ...
 
@@ -50,6 +128,61 @@ if TYPE_CHECKING:
 
     class LoadedVirtualPinConfig(VirtualPinConfig, total=False): ...
 
+    class LoadedSceneConfig(SceneConfig, total=False): ...
+
+    class LoadedSceneStepConfig(SceneStepConfig, total=False): ...
+
+
+DEFAULT_PROJECT_CONFIG: Project = {
+    "name": "",
+    "gpio_backend": "rpi",
+    "input_mode": "edge",
+    "scan_interval": 0.1,
+    "config_reload_interval": 2,
+    "log_level": "INFO",
+    "log_levels": {},
+    "log_rate_limit": 5,
+    "log_burst": 20,
+    "metrics_host": "127.0.0.1",
+    "metrics_port": 9478,
+    "pjlink_keepalive_interval": 20,
+    "pjlink_idle_timeout": 3600,
+    "pjlink_status_interval": 0,
+    "pjlink_timeout": 5,
+    "pjlink_retries": 2,
+    "pjlink_retry_delay": 0.5,
+    "pjlink_retry_max_delay": 5,
+    "pjlink_failure_threshold": 3,
+    "pjlink_probe_interval": 30,
+    "device_state_ttl": 10,
+    "max_concurrent_outputs": 0,
+    "max_concurrent_virtual_pins": 8,
+    "trigger_rate_limit": 10,
+    "trigger_burst": 20,
+    "global_trigger_rate_limit": 200,
+    "global_trigger_burst": 400,
+    "journal_path": "",
+    "journal_capacity": 65536,
+    "control_host": "127.0.0.1",
+    "control_port": 0,
+    "control_socket": "",
+    "control_http_port": 0,
+    "cluster_node": "",
+    "cluster_host": "0.0.0.0",
+    "cluster_port": 7450,
+    "cluster_peers": {},
+    "cluster_secret": "",
+    "cluster_timeout": 1,
+    "cluster_heartbeat_interval": 1,
+    "realtime": False,
+    "realtime_priority": 10,
+    "realtime_cpus": [],
+    "realtime_lock_memory": True,
+    "loop_watchdog_interval": 0.1,
+    "loop_lag_warning": 0.05,
+    "state_path": "",
+    "state_interval": 0.1,
+}
 
 DEFAULT_PIN_CONFIG: PinConfig = {
     "id": "",
@@ -58,9 +191,20 @@ DEFAULT_PIN_CONFIG: PinConfig = {
     "display_name": "",
     "pins_to_block": [],
     "pins_to_unblock": [],
+    "retrigger_policy": "ignore",
 }
 
-DEFAULT_INPUT_PIN_CONFIG: InputPinConfig = {**DEFAULT_PIN_CONFIG, "activation_delay": 0, "triggered_pins": []}
+DEFAULT_INPUT_PIN_CONFIG: InputPinConfig = {
+    **DEFAULT_PIN_CONFIG,
+    "activation_delay": 0,
+    "triggered_pins": [],
+    "triggered_scenes": [],
+    "wait_for_triggered_pins": False,
+    "debounce_settle_time": 0,
+    "debounce_stable_samples": 1,
+    "min_press_time": 0,
+    "min_release_time": 0,
+}
 
 DEFAULT_OUTPUT_PIN_CONFIG: OutputPinConfig = {**DEFAULT_PIN_CONFIG, "hold_time": 0, "trigger_method": "pulse"}
 
@@ -71,12 +215,44 @@ DEFAULT_VIRTUAL_PIN_CONFIG: VirtualPinConfig = {
     "password": "",
 }
 
+DEFAULT_SCENE_CONFIG: SceneConfig = {"id": "", "display_name": "", "group": "", "on_preempt": "abort", "steps": []}
+
+DEFAULT_SCENE_STEP_CONFIG: SceneStepConfig = {"pin": "", "action": "trigger", "delay": 0, "wait": False}
+
+
+logger = get_logger("config")
+
+# parsed and validated configs are cached here, one file per config path, an unchanged config file skips tomlkit
+# on startup
+DEFAULT_SNAPSHOT_DIRECTORY = Path.home() / ".cache" / "dpt-media-control" / "config_snapshots"
+
+# defaults are part of the snapshot key, changed defaults invalidate old snapshots
+DEFAULTS_FINGERPRINT = json.dumps(
+    [
+        DEFAULT_PROJECT_CONFIG,
+        DEFAULT_INPUT_PIN_CONFIG,
+        DEFAULT_OUTPUT_PIN_CONFIG,
+        DEFAULT_VIRTUAL_PIN_CONFIG,
+        DEFAULT_SCENE_CONFIG,
+        DEFAULT_SCENE_STEP_CONFIG,
+    ],
+    sort_keys=True,
+).encode()
+
 
 class ConfigParser:
     config_file_path: Path
+    snapshot_path: Path | None
 
-    def __init__(self, config_file_path: str | Path):
+    def __init__(
+        self, config_file_path: str | Path, snapshot_directory: str | Path | None = DEFAULT_SNAPSHOT_DIRECTORY
+    ):
         self.config_file_path = Path(config_file_path)
+        self.snapshot_path = None
+        if snapshot_directory is not None:
+            # keyed by the resolved path, two configs must not replace each other's snapshot
+            path_hash = hashlib.sha256(str(self.config_file_path.resolve()).encode()).hexdigest()[:16]
+            self.snapshot_path = Path(snapshot_directory) / f"{path_hash}.json"
         self.init_check()
 
     def init_check(self):
@@ -98,23 +274,76 @@ class ConfigParser:
         new_config: VirtualPinConfig = {**DEFAULT_VIRTUAL_PIN_CONFIG, **loaded_config}
         return new_config
 
+    def __map_populate_scene_config(self, loaded_config: LoadedSceneConfig) -> SceneConfig:
+        new_config: SceneConfig = {**DEFAULT_SCENE_CONFIG, **loaded_config}
+        new_config["steps"] = [{**DEFAULT_SCENE_STEP_CONFIG, **step} for step in new_config["steps"]]
+        return new_config
+
     def load_config(self) -> Config:
         with open(self.config_file_path, "rb") as f:
-            config = tomlkit.load(f)
-            config_dict: LoadedConfig = config.unwrap()  # type: ignore
-
-            if "InputPins" not in config_dict:
-                config_dict["InputPins"] = []
-            if "OutputPins" not in config_dict:
-                config_dict["OutputPins"] = []
-            if "VirtualPins" not in config_dict:
-                config_dict["VirtualPins"] = []
-
-            config_dict["InputPins"] = list(map(self.__map_populate_input_pin_config, config_dict["InputPins"]))
-            config_dict["OutputPins"] = list(map(self.__map_populate_output_pin_config, config_dict["OutputPins"]))
-            config_dict["VirtualPins"] = list(map(self.__map_populate_virtual_pin_config, config_dict["VirtualPins"]))
-
-            return config_dict  # type: ignore
+            content = f.read()
+            mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+
+        content_hash = hashlib.sha256(DEFAULTS_FINGERPRINT + content).hexdigest()
+        snapshot = self.__load_snapshot(mtime_ns, content_hash)
+        if snapshot is not None:
+            return snapshot
+
+        config = self.parse_config(content)
+        # an invalid config must not replace the snapshot of the last valid one
+        if analyze_config(config).is_valid:
+            self.__save_snapshot(mtime_ns, content_hash, config)
+        return config
+
+    def parse_config(self, content: bytes) -> Config:
+        import tomlkit
+
+        config = tomlkit.loads(content.decode())
+        config_dict: LoadedConfig = config.unwrap()  # type: ignore
+
+        config_dict["Project"] = {**DEFAULT_PROJECT_CONFIG, **config_dict.get("Project", {})}
+        if "InputPins" not in config_dict:
+            config_dict["InputPins"] = []
+        if "OutputPins" not in config_dict:
+            config_dict["OutputPins"] = []
+        if "VirtualPins" not in config_dict:
+            config_dict["VirtualPins"] = []
+        if "Scenes" not in config_dict:
+            config_dict["Scenes"] = []
+
+        config_dict["InputPins"] = list(map(self.__map_populate_input_pin_config, config_dict["InputPins"]))
+        config_dict["OutputPins"] = list(map(self.__map_populate_output_pin_config, config_dict["OutputPins"]))
+        config_dict["VirtualPins"] = list(map(self.__map_populate_virtual_pin_config, config_dict["VirtualPins"]))
+        config_dict["Scenes"] = list(map(self.__map_populate_scene_config, config_dict["Scenes"]))
+
+        return config_dict  # type: ignore
+
+    def __load_snapshot(self, mtime_ns: int, content_hash: str) -> Config | None:
+        if self.snapshot_path is None:
+            return None
+        try:
+            with open(self.snapshot_path, "r") as f:
+                snapshot: dict[str, Any] = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if snapshot.get("mtime_ns") != mtime_ns or snapshot.get("hash") != content_hash:
+            return None
+        return snapshot["config"]
+
+    def __save_snapshot(self, mtime_ns: int, content_hash: str, config: Config):
+        if self.snapshot_path is None:
+            return
+        snapshot = {"mtime_ns": mtime_ns, "hash": content_hash, "config": config}
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            # write to a temporary file first, a crash must not leave a half written snapshot
+            tmp_path = self.snapshot_path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f, separators=(",", ":"))
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            logger.warning("could not save config snapshot: %s", e)
 
     def save_config(self, config: Config, with_timestamp: bool = False):
         config_file_path = self.config_file_path
@@ -125,6 +354,8 @@ class ConfigParser:
             config_file_path = Path(
                 self.config_file_path.parent, f"{timstamp}_{self.config_file_path.stem}{self.config_file_path.suffix}"
             )
+        import tomlkit
+
         with open(config_file_path, "w") as f:
             # convert config to tomlkit document
             tomlkit.dump(config, f)  # type: ignore
@@ -133,8 +364,57 @@ class ConfigParser:
         return [pin.id for pin in pins]
 
     def config_to_toml(self, config: Config):
+        import tomlkit
+
         toml_project_table = tomlkit.table()
         toml_project_table.add("name", config["Project"]["name"])
+        toml_project_table.add("gpio_backend", config["Project"]["gpio_backend"])
+        toml_project_table.add("input_mode", config["Project"]["input_mode"])
+        toml_project_table.add("scan_interval", config["Project"]["scan_interval"])
+        toml_project_table.add("config_reload_interval", config["Project"]["config_reload_interval"])
+        toml_project_table.add("log_level", config["Project"]["log_level"])
+        toml_project_table.add("log_levels", config["Project"]["log_levels"])
+        toml_project_table.add("log_rate_limit", config["Project"]["log_rate_limit"])
+        toml_project_table.add("log_burst", config["Project"]["log_burst"])
+        toml_project_table.add("metrics_host", config["Project"]["metrics_host"])
+        toml_project_table.add("metrics_port", config["Project"]["metrics_port"])
+        toml_project_table.add("pjlink_keepalive_interval", config["Project"]["pjlink_keepalive_interval"])
+        toml_project_table.add("pjlink_idle_timeout", config["Project"]["pjlink_idle_timeout"])
+        toml_project_table.add("pjlink_status_interval", config["Project"]["pjlink_status_interval"])
+        toml_project_table.add("pjlink_timeout", config["Project"]["pjlink_timeout"])
+        toml_project_table.add("pjlink_retries", config["Project"]["pjlink_retries"])
+        toml_project_table.add("pjlink_retry_delay", config["Project"]["pjlink_retry_delay"])
+        toml_project_table.add("pjlink_retry_max_delay", config["Project"]["pjlink_retry_max_delay"])
+        toml_project_table.add("pjlink_failure_threshold", config["Project"]["pjlink_failure_threshold"])
+        toml_project_table.add("pjlink_probe_interval", config["Project"]["pjlink_probe_interval"])
+        toml_project_table.add("device_state_ttl", config["Project"]["device_state_ttl"])
+        toml_project_table.add("max_concurrent_outputs", config["Project"]["max_concurrent_outputs"])
+        toml_project_table.add("max_concurrent_virtual_pins", config["Project"]["max_concurrent_virtual_pins"])
+        toml_project_table.add("trigger_rate_limit", config["Project"]["trigger_rate_limit"])
+        toml_project_table.add("trigger_burst", config["Project"]["trigger_burst"])
+        toml_project_table.add("global_trigger_rate_limit", config["Project"]["global_trigger_rate_limit"])
+        toml_project_table.add("global_trigger_burst", config["Project"]["global_trigger_burst"])
+        toml_project_table.add("journal_path", config["Project"]["journal_path"])
+        toml_project_table.add("journal_capacity", config["Project"]["journal_capacity"])
+        toml_project_table.add("control_host", config["Project"]["control_host"])
+        toml_project_table.add("control_port", config["Project"]["control_port"])
+        toml_project_table.add("control_socket", config["Project"]["control_socket"])
+        toml_project_table.add("control_http_port", config["Project"]["control_http_port"])
+        toml_project_table.add("cluster_node", config["Project"]["cluster_node"])
+        toml_project_table.add("cluster_host", config["Project"]["cluster_host"])
+        toml_project_table.add("cluster_port", config["Project"]["cluster_port"])
+        toml_project_table.add("cluster_peers", config["Project"]["cluster_peers"])
+        toml_project_table.add("cluster_secret", config["Project"]["cluster_secret"])
+        toml_project_table.add("cluster_timeout", config["Project"]["cluster_timeout"])
+        toml_project_table.add("cluster_heartbeat_interval", config["Project"]["cluster_heartbeat_interval"])
+        toml_project_table.add("realtime", config["Project"]["realtime"])
+        toml_project_table.add("realtime_priority", config["Project"]["realtime_priority"])
+        toml_project_table.add("realtime_cpus", config["Project"]["realtime_cpus"])
+        toml_project_table.add("realtime_lock_memory", config["Project"]["realtime_lock_memory"])
+        toml_project_table.add("loop_watchdog_interval", config["Project"]["loop_watchdog_interval"])
+        toml_project_table.add("loop_lag_warning", config["Project"]["loop_lag_warning"])
+        toml_project_table.add("state_path", config["Project"]["state_path"])
+        toml_project_table.add("state_interval", config["Project"]["state_interval"])
 
         toml_input_pins_array = tomlkit.array()
 
@@ -146,8 +426,15 @@ class ConfigParser:
             toml_input_pin_table.add("gpio_pin", input_pin["gpio_pin"])
             toml_input_pin_table.add("activation_delay", input_pin["activation_delay"])
             toml_input_pin_table.add("pins_to_trigger", input_pin["triggered_pins"])
+            toml_input_pin_table.add("triggered_scenes", input_pin["triggered_scenes"])
+            toml_input_pin_table.add("wait_for_triggered_pins", input_pin["wait_for_triggered_pins"])
+            toml_input_pin_table.add("debounce_settle_time", input_pin["debounce_settle_time"])
+            toml_input_pin_table.add("debounce_stable_samples", input_pin["debounce_stable_samples"])
+            toml_input_pin_table.add("min_press_time", input_pin["min_press_time"])
+            toml_input_pin_table.add("min_release_time", input_pin["min_release_time"])
             toml_input_pin_table.add("pins_to_block", input_pin["pins_to_block"])
             toml_input_pin_table.add("pins_to_unblock", input_pin["pins_to_unblock"])
+            toml_input_pin_table.add("retrigger_policy", input_pin["retrigger_policy"])
 
             toml_input_pins_array.append(toml_input_pin_table)  # type: ignore
 
@@ -162,6 +449,7 @@ class ConfigParser:
             toml_output_pin_table.add("hold_time", output_pin["hold_time"])
             toml_output_pin_table.add("pins_to_block", output_pin["pins_to_block"])
             toml_output_pin_table.add("pins_to_unblock", output_pin["pins_to_unblock"])
+            toml_output_pin_table.add("retrigger_policy", output_pin["retrigger_policy"])
 
             toml_output_pins_array.append(toml_output_pin_table)  # type: ignore
 
@@ -176,15 +464,33 @@ class ConfigParser:
             toml_virtual_pin_table.add("password", virtual_pin["password"])
             toml_virtual_pin_table.add("pins_to_block", virtual_pin["pins_to_block"])
             toml_virtual_pin_table.add("pins_to_unblock", virtual_pin["pins_to_unblock"])
+            toml_virtual_pin_table.add("retrigger_policy", virtual_pin["retrigger_policy"])
 
             toml_virtual_pins_array.append(toml_virtual_pin_table)  # type: ignore
 
+        toml_scenes_array = tomlkit.array()
+        for scene in config["Scenes"]:
+            toml_scene_table = tomlkit.table()
+            toml_scene_table.add("id", scene["id"])
+            toml_scene_table.add("display_name", scene["display_name"])
+            toml_scene_table.add("group", scene["group"])
+            toml_scene_table.add("on_preempt", scene["on_preempt"])
+            toml_steps_array = tomlkit.array()
+            for step in scene["steps"]:
+                toml_step_table = tomlkit.inline_table()
+                toml_step_table.update(step)
+                toml_steps_array.append(toml_step_table)  # type: ignore
+            toml_scene_table.add("steps", toml_steps_array)
+
+            toml_scenes_array.append(toml_scene_table)  # type: ignore
+
         doc = tomlkit.document()
 
         doc.add("Project", toml_project_table)
         doc.add("InputPins", toml_input_pins_array)
         doc.add("OutputPins", toml_output_pins_array)
         doc.add("VirtualPins", toml_virtual_pins_array)
+        doc.add("Scenes", toml_scenes_array)
 
         return doc
 
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from pathlib import Path
+from typing import Callable, Tuple
+
+from logger import get_logger
+
+type FileStamp = Tuple[int, int]  # (mtime_ns, size)
+
+logger = get_logger("config")
+
+
+class ConfigWatcher:
+    # polls the mtime of the config file, inotify is not available without extra dependencies
+    _path: Path
+    _interval: float
+    _stamp: FileStamp | None
+    _task: asyncio.Task[None] | None
+
+    def __init__(self, path: str | Path, interval: float = 2):
+        self._path = Path(path)
+        self._interval = interval
+        self._stamp = self._read_stamp()
+        self._task = None
+
+    # === PROPERTIES ===
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def interval(self):
+        return self._interval
+
+    # === METHODS ===
+    def start(self, loop: asyncio.AbstractEventLoop, on_change: Callable[[], None]):
+        if self._task is None and self._interval > 0:
+            self._task = loop.create_task(self._watch(on_change))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def has_changed(self) -> bool:
+        stamp = self._read_stamp()
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        return True
+
+    def _read_stamp(self) -> FileStamp | None:
+        try:
+            stat = os.stat(self._path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    async def _watch(self, on_change: Callable[[], None]):
+        while True:
+            await asyncio.sleep(self._interval)
+            if self.has_changed():
+                try:
+                    on_change()
+                except Exception:
+                    # a bug of the reload, not an invalid config: logged with its traceback, the watcher keeps going
+                    logger.exception("config reload crashed")
@@ -0,0 +1,5 @@
+from .protocol import ControlError as ControlError
+from .protocol import ControlProtocol as ControlProtocol
+from .protocol import Subscription as Subscription
+from .protocol import pin_status as pin_status
+from .server import ControlServer as ControlServer
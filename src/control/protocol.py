@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import json
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict
+
+from logger import get_logger
+
+if TYPE_CHECKING:
+    from media_control import MediaControl, PinUnion
+    from pins import PinEvent
+
+type ControlReply = Dict[str, Any]
+
+# one request line may hold several commands, separated by ";"
+COMMAND_SEPARATOR = ";"
+
+OUTPUT_LEVELS = {"0": False, "1": True, "off": False, "on": True}
+
+logger = get_logger("control")
+
+
+class ControlError(Exception):
+    pass
+
+
+def pin_status(pin: PinUnion) -> Dict[str, Any]:
+    return {
+        "id": pin.id,
+        "type": pin.pin_type,
+        "display_name": pin.display_name,
+        "state": pin.state,
+        "is_blocked": pin.is_blocked,
+        "is_triggered": pin.is_triggered,
+    }
+
+
+def encode_event(pin: PinUnion, event: PinEvent) -> bytes:
+    message = {"event": event.name.lower(), "time": time.time(), **pin_status(pin)}
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+def encode_reply(replies: list[ControlReply], batched: bool) -> bytes:
+    reply = replies if batched else replies[0]
+    return json.dumps(reply, separators=(",", ":")).encode() + b"\n"
+
+
+class Subscription:
+    # event stream of one client, an empty pin filter subscribes to all pins
+    _send: Callable[[bytes], None]
+    _pin_ids: set[str]
+
+    def __init__(self, send: Callable[[bytes], None]):
+        self._send = send
+        self._pin_ids = set()
+
+    # === PROPERTIES ===
+    @property
+    def pin_ids(self):
+        return self._pin_ids
+
+    # === METHODS ===
+    def matches(self, pin_id: str):
+        return not self._pin_ids or pin_id in self._pin_ids
+
+    def send(self, message: bytes):
+        self._send(message)
+
+
+class ControlProtocol:
+    # parses and runs control commands against the media control, shared by the line and the http server
+    _media_control: MediaControl
+    _subscriptions: list[Subscription]
+
+    def __init__(self, media_control: MediaControl):
+        self._media_control = media_control
+        self._subscriptions = []
+
+    # === PROPERTIES ===
+    @property
+    def subscriptions(self):
+        return self._subscriptions
+
+    # === METHODS ===
+    def execute_line(self, line: str, subscription: Subscription | None = None) -> bytes | None:
+        commands = [command for command in line.split(COMMAND_SEPARATOR) if command.strip()]
+        if not commands:
+            return None
+        replies = [self.execute(command, subscription) for command in commands]
+        return encode_reply(replies, len(commands) > 1)
+
+    def execute(self, command: str, subscription: Subscription | None = None) -> ControlReply:
+        [verb, *arguments] = command.split()
+        return self.execute_arguments(verb, arguments, subscription)
+
+    def execute_arguments(
+        self, verb: str, arguments: list[str], subscription: Subscription | None = None
+    ) -> ControlReply:
+        # arguments are not split again, e.g. a pin id of an url path
+        verb = verb.lower()
+        try:
+            result = self._dispatch(verb, arguments, subscription)
+        except ControlError as e:
+            return {"ok": False, "command": verb, "error": str(e)}
+        except Exception:
+            # a bug must not drop the client, it gets an error reply like for a bad command
+            logger.exception("control command %s failed", verb)
+            return {"ok": False, "command": verb, "error": "internal error"}
+        return {"ok": True, "command": verb, "result": result}
+
+    def _dispatch(self, verb: str, arguments: list[str], subscription: Subscription | None) -> Any:
+        match verb:
+            case "trigger" | "release":
+                command = self._trigger if verb == "trigger" else self._release
+                return [command(pin_id) for pin_id in self._require_pin_ids(arguments)]
+            case "set":
+                return self._set_outputs(arguments)
+            case "state":
+                pin_ids = arguments or list(self._media_control.pin_index.by_id)
+                return [pin_status(self._get_pin(pin_id)) for pin_id in pin_ids]
+            case "subscribe":
+                return self._subscribe(arguments, subscription)
+            case "unsubscribe":
+                if subscription is not None:
+                    self.unsubscribe(subscription)
+                return None
+            case "scene" | "abort" | "pause" | "resume":
+                return [self._scene_command(verb, scene_id) for scene_id in self._require_scene_ids(arguments)]
+            case "scenes":
+                return self._scene_status()
+            case "ping":
+                return "pong"
+            case _:
+                raise ControlError(f"unknown command {verb}")
+
+    def _set_outputs(self, assignments: list[str]):
+        # set O#17=1 O#18=0, all levels are written together
+        if not assignments:
+            raise ControlError("missing pin levels")
+        levels: Dict[str, bool] = {}
+        for assignment in assignments:
+            pin_id, _, level = assignment.partition("=")
+            if level not in OUTPUT_LEVELS:
+                raise ControlError(f"bad level in {assignment}, expected <pin>=0 or <pin>=1")
+            if self._get_pin(pin_id).pin_type != "output":
+                raise ControlError(f"{pin_id} is not an output pin")
+            levels[pin_id] = OUTPUT_LEVELS[level]
+        self._media_control.set_outputs(levels)
+        return [{"id": pin_id, "level": level} for pin_id, level in levels.items()]
+
+    def _subscribe(self, pin_ids: list[str], subscription: Subscription | None):
+        if subscription is None:
+            raise ControlError("subscribe needs a line connection")
+        for pin_id in pin_ids:
+            self._get_pin(pin_id)
+        subscription.pin_ids.update(pin_ids)
+        if subscription not in self._subscriptions:
+            self._subscriptions.append(subscription)
+        return sorted(subscription.pin_ids)
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.pin_ids.clear()
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+
+    def publish(self, pin: PinUnion, event: PinEvent):
+        if not self._subscriptions:
+            return
+        message: bytes | None = None
+        # slow subscribers may be dropped while sending
+        for subscription in tuple(self._subscriptions):
+            if subscription.matches(pin.id):
+                # encoded once for all subscribers
+                if message is None:
+                    message = encode_event(pin, event)
+                subscription.send(message)
+
+    def _require_pin_ids(self, pin_ids: list[str]):
+        if not pin_ids:
+            raise ControlError("missing pin id")
+        for pin_id in pin_ids:
+            self._get_pin(pin_id)
+        return pin_ids
+
+    def _require_scene_ids(self, scene_ids: list[str]):
+        if not scene_ids:
+            raise ControlError("missing scene id")
+        for scene_id in scene_ids:
+            if scene_id not in self._media_control.sequencer.scenes:
+                raise ControlError(f"unknown scene {scene_id}")
+        return scene_ids
+
+    def _scene_command(self, verb: str, scene_id: str):
+        sequencer = self._media_control.sequencer
+        match verb:
+            case "scene":
+                sequencer.start(scene_id)
+                changed = True
+            case "abort":
+                changed = sequencer.abort(scene_id)
+            case "pause":
+                changed = sequencer.pause(scene_id)
+            case _:
+                changed = sequencer.resume(scene_id)
+        return {"id": scene_id, "changed": changed}
+
+    def _scene_status(self):
+        sequencer = self._media_control.sequencer
+        status: list[Dict[str, Any]] = []
+        for scene in sequencer.scenes.values():
+            run = sequencer.runs.get(scene.id)
+            state = "idle" if run is None else "paused" if run.is_paused else "running"
+            next_step = run.next_step if run is not None else None
+            status.append({"id": scene.id, "display_name": scene.display_name, "state": state, "next_step": next_step})
+        return status
+
+    def _get_pin(self, pin_id: str) -> PinUnion:
+        pin = self._media_control.get_pin_by_id(pin_id)
+        if pin is None:
+            raise ControlError(f"unknown pin {pin_id}")
+        return pin
+
+    def _trigger(self, pin_id: str):
+        result = self._media_control.press_pin(self._get_pin(pin_id))
+        return {"id": pin_id, "started": result.status == "started", "status": result.status}
+
+    def _release(self, pin_id: str):
+        self._media_control.release_pin(self._get_pin(pin_id))
+        return {"id": pin_id}
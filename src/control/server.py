@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from typing import TYPE_CHECKING
+from urllib.parse import unquote
+
+from logger import get_logger
+
+from .protocol import ControlProtocol, Subscription, encode_reply
+
+if TYPE_CHECKING:
+    from .protocol import ControlReply
+
+logger = get_logger("control")
+
+# a subscriber that stops reading is dropped once this much output is queued for it
+MAX_SUBSCRIBER_BUFFER = 1 << 20
+# larger bodies are answered with 413, the same limit as a line of the line protocol
+MAX_HTTP_BODY = 1 << 16
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Content Too Large"}
+
+
+class ControlServer:
+    # line protocol over tcp and/or a unix socket, optional http/json front. runs on the media control event loop,
+    # asyncio sets TCP_NODELAY on its tcp sockets so single commands are not held back
+    _protocol: ControlProtocol
+    _host: str
+    _port: int
+    _socket_path: str
+    _http_port: int
+    _servers: list[asyncio.Server]
+
+    def __init__(
+        self,
+        protocol: ControlProtocol,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        socket_path: str = "",
+        http_port: int = 0,
+    ):
+        self._protocol = protocol
+        self._host = host
+        self._port = port
+        self._socket_path = socket_path
+        self._http_port = http_port
+        self._servers = []
+
+    # === PROPERTIES ===
+    @property
+    def protocol(self):
+        return self._protocol
+
+    @property
+    def is_enabled(self):
+        return self._port > 0 or bool(self._socket_path) or self._http_port > 0
+
+    # === METHODS ===
+    def start(self, loop: asyncio.AbstractEventLoop):
+        if self.is_enabled:
+            loop.create_task(self._serve())
+
+    async def stop(self):
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers.clear()
+        if self._socket_path and os.path.exists(self._socket_path):
+            os.unlink(self._socket_path)
+
+    async def _serve(self):
+        try:
+            if self._port > 0:
+                self._servers.append(await asyncio.start_server(self._handle_line_client, self._host, self._port))
+                logger.info("control api listening on %s:%s", self._host, self._port)
+            if self._socket_path:
+                if os.path.exists(self._socket_path):
+                    os.unlink(self._socket_path)
+                self._servers.append(await asyncio.start_unix_server(self._handle_line_client, self._socket_path))
+                logger.info("control api listening on %s", self._socket_path)
+            if self._http_port > 0:
+                self._servers.append(await asyncio.start_server(self._handle_http_client, self._host, self._http_port))
+                logger.info("control api listening on http://%s:%s", self._host, self._http_port)
+        except OSError as e:
+            logger.error("could not start control api: %s", e)
+
+    # --- Line Protocol ---
+
+    async def _handle_line_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        def send(message: bytes):
+            if writer.transport.get_write_buffer_size() > MAX_SUBSCRIBER_BUFFER:
+                logger.warning("dropping slow control subscriber")
+                self._protocol.unsubscribe(subscription)
+                writer.close()
+                return
+            writer.write(message)
+
+        subscription = Subscription(send)
+        try:
+            while line := await reader.readline():
+                reply = self._protocol.execute_line(line.decode(errors="replace"), subscription)
+                if reply is not None:
+                    writer.write(reply)
+                    await writer.drain()
+        except (asyncio.LimitOverrunError, ValueError) as e:
+            # a line over the stream limit
+            logger.warning("dropping control client: %s", e)
+        except ConnectionError:
+            pass
+        finally:
+            self._protocol.unsubscribe(subscription)
+            writer.close()
+
+    # --- HTTP ---
+
+    async def _handle_http_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            # keep alive, touch panels send many small requests
+            while request_line := await asyncio.wait_for(reader.readline(), 60):
+                headers: dict[str, str] = {}
+                while (header := await asyncio.wait_for(reader.readline(), 5)) not in (b"\r\n", b"\n", b""):
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                content_length = int(headers.get("content-length", 0))
+                close = headers.get("connection", "").lower() == "close"
+
+                parts = request_line.decode("latin-1").split()
+                if content_length > MAX_HTTP_BODY:
+                    # the body is not read, the connection can not be used for another request
+                    status, payload = 413, b'{"ok":false,"error":"request body too large"}\n'
+                    close = True
+                else:
+                    body = await reader.readexactly(content_length)
+                    if len(parts) < 2:
+                        status, payload = 400, b'{"ok":false,"error":"bad request"}\n'
+                    else:
+                        status, payload = self._route_http(parts[0], parts[1], body)
+
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode()
+                    + payload
+                )
+                await writer.drain()
+                if close:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        except ValueError:
+            # a line over the stream limit or a bad content-length
+            pass
+        finally:
+            writer.close()
+
+    def _route_http(self, method: str, target: str, body: bytes) -> tuple[int, bytes]:
+        # GET /pins, GET /pins/<id>, POST /pins/<id>/trigger, POST /pins/<id>/release, POST /commands
+        path = [unquote(part) for part in target.split("?")[0].strip("/").split("/")]
+        # a decoded path segment is one argument, "O%2312%20O%2313" is not two pins
+        match method, path:
+            case "GET", ["pins"]:
+                return self._http_reply(self._protocol.execute_arguments("state", []))
+            case "GET", ["pins", pin_id]:
+                return self._http_reply(self._protocol.execute_arguments("state", [pin_id]))
+            case "POST", ["pins", pin_id, ("trigger" | "release") as verb]:
+                return self._http_reply(self._protocol.execute_arguments(verb, [pin_id]))
+            case "POST", ["commands"]:
+                # a json list of commands or one command per line, answered in one response
+                try:
+                    commands = json.loads(body) if body.lstrip().startswith(b"[") else body.decode().splitlines()
+                except ValueError:
+                    return 400, b'{"ok":false,"error":"bad request"}\n'
+                if not all(isinstance(command, str) for command in commands):
+                    return 400, b'{"ok":false,"error":"expected a list of command strings"}\n'
+                replies = [self._protocol.execute(command) for command in commands if command.strip()]
+                return 200, encode_reply(replies, True)
+            case (("GET" | "POST"), _):
+                return 404, b'{"ok":false,"error":"not found"}\n'
+            case _:
+                return 405, b'{"ok":false,"error":"method not allowed"}\n'
+
+    def _http_reply(self, reply: ControlReply) -> tuple[int, bytes]:
+        return (200 if reply["ok"] else 404), encode_reply([reply], False)
@@ -0,0 +1,21 @@
+from typing import Literal
+
+from .backend import EdgeCallback as EdgeCallback
+from .backend import GpioBackend as GpioBackend
+from .output_batch import OutputBatch as OutputBatch
+from .simulated_backend import SimulatedBackend as SimulatedBackend
+
+type BackendName = Literal["rpi", "simulated"]
+
+
+def create_backend(name: BackendName) -> GpioBackend:
+    if name == "simulated":
+        return SimulatedBackend()
+
+    if name == "rpi":
+        # only import RPi.GPIO when it is actually used, it is not available off a Pi
+        from .rpi_backend import RpiGpioBackend
+
+        return RpiGpioBackend()
+
+    raise ValueError(f"unknown gpio backend {name}")
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Callable, Sequence
+
+type EdgeCallback = Callable[[int], None]
+
+
+class GpioBackend(ABC):
+    # all gpio access of media control goes through a backend, pins are addressed by their BCM number. a backend
+    # that misses one of the abstract methods fails when it is created, not on the first gpio edge
+
+    @abstractmethod
+    def setup_input(self, gpio_pin: int): ...
+
+    @abstractmethod
+    def setup_output(self, gpio_pin: int, level: bool = False): ...
+
+    @abstractmethod
+    def is_setup(self, gpio_pin: int) -> bool: ...
+
+    @abstractmethod
+    def read(self, gpio_pin: int) -> bool: ...
+
+    @abstractmethod
+    def write(self, gpio_pin: int, level: bool): ...
+
+    def read_bank(self, gpio_pins: Sequence[int]) -> int:
+        # bit n of the result is the level of gpio_pins[n], backends with a group read should override this
+        levels = 0
+        for bit, gpio_pin in enumerate(gpio_pins):
+            if self.read(gpio_pin):
+                levels |= 1 << bit
+        return levels
+
+    def write_bank(self, gpio_pins: Sequence[int], levels: int):
+        # bit n of levels is written to gpio_pins[n], backends with a group write should override this
+        for bit, gpio_pin in enumerate(gpio_pins):
+            self.write(gpio_pin, bool(levels >> bit & 1))
+
+    def add_edge_callback(self, gpio_pin: int, callback: EdgeCallback):
+        # callback may be called from any thread, raises RuntimeError if edges can't be detected
+        raise RuntimeError("edge detection is not supported by this backend")
+
+    def remove_edge_callback(self, gpio_pin: int):
+        # optional, a backend without edge detection has no callbacks to remove
+        return
+
+    def cleanup(self, gpio_pin: int | None = None):
+        # optional, a backend without hardware state has nothing to release
+        return
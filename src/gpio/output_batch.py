@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Dict, Mapping
+
+from logger import get_logger
+from metrics import OUTPUT_BATCH_SIZE
+
+if TYPE_CHECKING:
+    from .backend import GpioBackend
+
+logger = get_logger("gpio")
+
+
+class OutputBatch:
+    # output levels set during one loop iteration are committed together, relays driven by the same input switch
+    # at once instead of staggered by the order their tasks happen to run in
+    _backend: GpioBackend
+    _loop: asyncio.AbstractEventLoop
+    _pending: Dict[int, bool]  # gpio pin -> level, the last level set in this iteration wins
+    _flush_handle: asyncio.Handle | None
+
+    def __init__(self, backend: GpioBackend, loop: asyncio.AbstractEventLoop):
+        self._backend = backend
+        self._loop = loop
+        self._pending = {}
+        self._flush_handle = None
+
+    # === PROPERTIES ===
+    @property
+    def backend(self):
+        return self._backend
+
+    @property
+    def pending(self):
+        return self._pending
+
+    # === METHODS ===
+    def write(self, gpio_pin: int, level: bool):
+        self._pending[gpio_pin] = level
+        if self._flush_handle is None:
+            # runs after every callback that is ready in this iteration
+            self._flush_handle = self._loop.call_soon(self.flush)
+
+    def write_many(self, levels: Mapping[int, bool]):
+        self._pending.update(levels)
+        # written right away, together with anything else pending
+        self.flush()
+
+    def discard(self, gpio_pin: int):
+        # the pin is cleaned up before the batch is committed
+        self._pending.pop(gpio_pin, None)
+
+    def flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+
+        pending = self._pending
+        self._pending = {}
+        OUTPUT_BATCH_SIZE.observe(len(pending))
+        if len(pending) == 1:
+            [(gpio_pin, level)] = pending.items()
+            self._write(gpio_pin, level)
+            return
+
+        gpio_pins = list(pending)
+        levels = 0
+        for bit, level in enumerate(pending.values()):
+            if level:
+                levels |= 1 << bit
+        try:
+            self._backend.write_bank(gpio_pins, levels)
+        except Exception as e:
+            # one bad pin must not keep the others from switching
+            logger.warning("group write of gpio %s failed, writing pins one by one: %s", gpio_pins, e)
+            for gpio_pin, level in pending.items():
+                self._write(gpio_pin, level)
+
+    def _write(self, gpio_pin: int, level: bool):
+        try:
+            self._backend.write(gpio_pin, level)
+        except Exception as e:
+            logger.error("write of gpio %s failed: %s", gpio_pin, e)
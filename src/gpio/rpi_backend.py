@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+import RPi.GPIO as GPIO
+
+from .backend import EdgeCallback, GpioBackend
+
+
+class RpiGpioBackend(GpioBackend):
+    # RPi.GPIO api as provided by rpi-lgpio
+
+    def __init__(self):
+        GPIO.setmode(GPIO.BCM)
+
+    def setup_input(self, gpio_pin: int):
+        GPIO.setup(gpio_pin, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
+
+    def setup_output(self, gpio_pin: int, level: bool = False):
+        GPIO.setup(gpio_pin, GPIO.OUT, initial=GPIO.HIGH if level else GPIO.LOW)
+
+    def is_setup(self, gpio_pin: int) -> bool:
+        return GPIO.gpio_function(gpio_pin) != GPIO.UNKNOWN
+
+    def read(self, gpio_pin: int) -> bool:
+        return bool(GPIO.input(gpio_pin))
+
+    def write(self, gpio_pin: int, level: bool):
+        GPIO.output(gpio_pin, GPIO.HIGH if level else GPIO.LOW)
+
+    def write_bank(self, gpio_pins: Sequence[int], levels: int):
+        # one call for the whole bank, RPi.GPIO accepts lists of channels and levels
+        GPIO.output(list(gpio_pins), [GPIO.HIGH if levels >> bit & 1 else GPIO.LOW for bit in range(len(gpio_pins))])
+
+    def add_edge_callback(self, gpio_pin: int, callback: EdgeCallback):
+        GPIO.add_event_detect(gpio_pin, GPIO.BOTH, callback=callback)
+
+    def remove_edge_callback(self, gpio_pin: int):
+        GPIO.remove_event_detect(gpio_pin)
+
+    def cleanup(self, gpio_pin: int | None = None):
+        if gpio_pin is None:
+            GPIO.cleanup()
+        else:
+            GPIO.cleanup(gpio_pin)
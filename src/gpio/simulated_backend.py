@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from typing import Dict, Literal, Sequence
+
+from .backend import EdgeCallback, GpioBackend
+
+type SimulatedPinMode = Literal["input", "output"]
+
+
+class SimulatedBackend(GpioBackend):
+    # deterministic in-memory gpio bank, levels are kept as one bitmask indexed by gpio number
+    _modes: Dict[int, SimulatedPinMode]
+    _levels: int
+    _edge_callbacks: Dict[int, EdgeCallback]
+    _write_count: int
+
+    def __init__(self):
+        self._modes = {}
+        self._levels = 0
+        self._edge_callbacks = {}
+        self._write_count = 0
+
+    # === PROPERTIES ===
+    @property
+    def levels(self):
+        return self._levels
+
+    @property
+    def write_count(self):
+        return self._write_count
+
+    # === SIMULATION ===
+    def set_input(self, gpio_pin: int, level: bool):
+        # drive a simulated input, edge callbacks are called synchronously
+        if self._modes.get(gpio_pin) != "input":
+            raise ValueError(f"gpio {gpio_pin} is not set up as input")
+        if self.read(gpio_pin) == level:
+            return
+
+        self._set_level(gpio_pin, level)
+        callback = self._edge_callbacks.get(gpio_pin)
+        if callback is not None:
+            callback(gpio_pin)
+
+    def _set_level(self, gpio_pin: int, level: bool):
+        if level:
+            self._levels |= 1 << gpio_pin
+        else:
+            self._levels &= ~(1 << gpio_pin)
+
+    # === BACKEND ===
+    def setup_input(self, gpio_pin: int):
+        self._modes[gpio_pin] = "input"
+        # pull down
+        self._set_level(gpio_pin, False)
+
+    def setup_output(self, gpio_pin: int, level: bool = False):
+        self._modes[gpio_pin] = "output"
+        self._set_level(gpio_pin, level)
+
+    def is_setup(self, gpio_pin: int) -> bool:
+        return gpio_pin in self._modes
+
+    def read(self, gpio_pin: int) -> bool:
+        return bool(self._levels >> gpio_pin & 1)
+
+    def write(self, gpio_pin: int, level: bool):
+        if self._modes.get(gpio_pin) != "output":
+            raise ValueError(f"gpio {gpio_pin} is not set up as output")
+        self._write_count += 1
+        self._set_level(gpio_pin, level)
+
+    def read_bank(self, gpio_pins: Sequence[int]) -> int:
+        levels = 0
+        bank = self._levels
+        for bit, gpio_pin in enumerate(gpio_pins):
+            levels |= (bank >> gpio_pin & 1) << bit
+        return levels
+
+    def write_bank(self, gpio_pins: Sequence[int], levels: int):
+        mask = 0
+        bank = 0
+        for bit, gpio_pin in enumerate(gpio_pins):
+            if self._modes.get(gpio_pin) != "output":
+                raise ValueError(f"gpio {gpio_pin} is not set up as output")
+            mask |= 1 << gpio_pin
+            bank |= (levels >> bit & 1) << gpio_pin
+        # all pins of the bank change at once, like a write to the set and clear registers
+        self._write_count += 1
+        self._levels = self._levels & ~mask | bank
+
+    def add_edge_callback(self, gpio_pin: int, callback: EdgeCallback):
+        self._edge_callbacks[gpio_pin] = callback
+
+    def remove_edge_callback(self, gpio_pin: int):
+        self._edge_callbacks.pop(gpio_pin, None)
+
+    def cleanup(self, gpio_pin: int | None = None):
+        if gpio_pin is None:
+            self._modes.clear()
+            self._edge_callbacks.clear()
+            self._levels = 0
+            return
+
+        self._modes.pop(gpio_pin, None)
+        self._edge_callbacks.pop(gpio_pin, None)
+        self._set_level(gpio_pin, False)
@@ -0,0 +1,4 @@
+from .ring_buffer import EventJournal as EventJournal
+from .ring_buffer import JournalRecord as JournalRecord
+from .ring_buffer import default_journal_path as default_journal_path
+from .ring_buffer import read_journal as read_journal
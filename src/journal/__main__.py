@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+from pins.events import PinEvent
+
+from .ring_buffer import default_journal_path, read_journal
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="journal", description="decode the dpt-media-control event journal")
+    parser.add_argument("path", nargs="?", type=Path, default=default_journal_path())
+    parser.add_argument("--pin", action="append", help="only show these pin ids, e.g. I#17")
+    parser.add_argument("--event", action="append", help="only show these events, e.g. activate")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="only show events after this time")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="only show events before this time")
+    parser.add_argument("--last", type=int, help="only show the last n matching events")
+    args = parser.parse_args()
+
+    events = {PinEvent[event.upper()] for event in args.event} if args.event else None
+    since = args.since.timestamp() if args.since else None
+    until = args.until.timestamp() if args.until else None
+
+    records = [
+        record
+        for record in read_journal(args.path)
+        if (args.pin is None or record.pin_id in args.pin)
+        and (events is None or record.event in events)
+        and (since is None or record.wall_time >= since)
+        and (until is None or record.wall_time <= until)
+    ]
+    if args.last is not None:
+        records = records[-args.last :]
+
+    for record in records:
+        wall_time = datetime.fromtimestamp(record.wall_time).isoformat(sep=" ", timespec="microseconds")
+        event = record.event.name.lower()
+        print(f"{record.sequence:>10}  {wall_time}  {record.monotonic:14.6f}  {record.pin_id:<6} {event}")
+
+
+if __name__ == "__main__":
+    main()
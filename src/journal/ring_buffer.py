@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, NamedTuple
+
+from pins.events import PinEvent
+
+if TYPE_CHECKING:
+    from pins import Pin, PinType
+
+MAGIC = b"DPTJ"
+VERSION = 1
+
+# magic, version, record size, capacity, next sequence number
+HEADER = struct.Struct("<4sHHIQ")
+HEADER_SIZE = 32
+# the next sequence number is the only header field that changes, it is the write index and the record count
+NEXT_SEQUENCE = struct.Struct("<Q")
+NEXT_SEQUENCE_OFFSET = HEADER.size - NEXT_SEQUENCE.size
+
+# sequence number (0 = empty slot), gpio pin, pin type, event, monotonic time, wall time
+RECORD = struct.Struct("<QhBB4xdd")
+
+# remote pins have no code, their events are journaled by the node that owns the pin
+PIN_TYPE_CODES: Dict[PinType, int] = {"input": 1, "output": 2, "virtual": 3}
+PIN_ID_PREFIXES = {1: "I", 2: "O", 3: "V"}
+
+
+def default_journal_path() -> Path:
+    # systemd sets RUNTIME_DIRECTORY for the RuntimeDirectory of the service
+    runtime_directory = os.environ.get("RUNTIME_DIRECTORY")
+    if runtime_directory:
+        return Path(runtime_directory) / "events.journal"
+    return Path(tempfile.gettempdir()) / "dptmc" / "events.journal"
+
+
+class JournalRecord(NamedTuple):
+    sequence: int
+    pin_id: str
+    event: PinEvent
+    monotonic: float
+    wall_time: float
+
+
+class EventJournal:
+    # fixed size ring buffer of pin events in a memory mapped file, the page cache keeps it across crashes
+    _path: Path
+    _capacity: int
+    _file_descriptor: int
+    _buffer: mmap.mmap
+    _next_sequence: int
+
+    def __init__(self, path: str | Path, capacity: int = 65536):
+        self._path = Path(path)
+        self._capacity = capacity
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+
+        size = HEADER_SIZE + capacity * RECORD.size
+        self._file_descriptor = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+        if os.fstat(self._file_descriptor).st_size != size:
+            os.ftruncate(self._file_descriptor, 0)
+            os.ftruncate(self._file_descriptor, size)
+        self._buffer = mmap.mmap(self._file_descriptor, size)
+
+        magic, version, record_size, stored_capacity, next_sequence = HEADER.unpack_from(self._buffer, 0)
+        if (magic, version, record_size, stored_capacity) != (MAGIC, VERSION, RECORD.size, capacity):
+            # new or incompatible journal, start over
+            self._buffer[:] = bytes(size)
+            next_sequence = 0
+        self._next_sequence = next_sequence
+        self._write_header()
+
+    # === PROPERTIES ===
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    # === METHODS ===
+    def append(self, pin: Pin, event: PinEvent):
+        pin_type_code = PIN_TYPE_CODES.get(pin.pin_type)
+        if pin_type_code is None:
+            return
+
+        sequence = self._next_sequence + 1
+        offset = HEADER_SIZE + (self._next_sequence % self._capacity) * RECORD.size
+        RECORD.pack_into(
+            self._buffer, offset, sequence, pin.gpio_pin, pin_type_code, event, time.monotonic(), time.time()
+        )
+        self._next_sequence = sequence
+        # the record is complete before the header points past it
+        NEXT_SEQUENCE.pack_into(self._buffer, NEXT_SEQUENCE_OFFSET, sequence)
+
+    def close(self):
+        self._buffer.close()
+        os.close(self._file_descriptor)
+
+    def _write_header(self):
+        HEADER.pack_into(self._buffer, 0, MAGIC, VERSION, RECORD.size, self._capacity, self._next_sequence)
+
+
+def read_journal(path: str | Path) -> list[JournalRecord]:
+    # records in the order they were written, oldest first
+    with open(path, "rb") as f:
+        data = f.read()
+
+    magic, version, record_size, capacity, _ = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path} is not an event journal")
+
+    records: list[JournalRecord] = []
+    for slot in range(capacity):
+        sequence, gpio_pin, pin_type, event, monotonic, wall_time = RECORD.unpack_from(
+            data, HEADER_SIZE + slot * RECORD.size
+        )
+        if sequence == 0:
+            continue
+        prefix = PIN_ID_PREFIXES.get(pin_type, "?")
+        pin_id = f"{prefix}#{abs(gpio_pin)}"
+        records.append(JournalRecord(sequence, pin_id, PinEvent(event), monotonic, wall_time))
+
+    records.sort(key=lambda record: record.sequence)
+    return records
@@ -0,0 +1,4 @@
+from .logger import get_logger as get_logger
+from .logger import get_pin_logger as get_pin_logger
+from .logger import setup_logging as setup_logging
+from .logger import stop_logging as stop_logging
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import logging
+import queue
+import sys
+import time
+from collections import OrderedDict
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Mapping, Tuple
+
+ROOT_LOGGER_NAME = "dptmc"
+
+# structured fields that are added to records via `extra`
+RECORD_FIELDS = ("pin_id", "event")
+
+type RateLimitKey = Tuple[str, str | None, str | None]  # (logger, pin_id, event)
+
+# buckets kept by the rate limit filter, the least recently logged keys are dropped first
+MAX_RATE_LIMIT_KEYS = 1024
+
+LOGFMT_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r"})
+
+_listener: QueueListener | None = None
+_queue_handler: QueueHandler | None = None
+
+
+def logfmt_value(value: object) -> str:
+    # a value can not end its field or the line: quotes, backslashes and line breaks are escaped, values with
+    # spaces are quoted
+    text = str(value)
+    escaped = text.translate(LOGFMT_ESCAPES)
+    if escaped != text or not text or " " in text or "=" in text:
+        return f'"{escaped}"'
+    return text
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+def get_pin_logger(pin_type: str) -> logging.Logger:
+    # one logger per pin class, levels are configured per class
+    return get_logger(f"pins.{pin_type}")
+
+
+class DeferredQueueHandler(QueueHandler):
+    # the default QueueHandler formats in the calling thread, leave all formatting to the listener
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class MonotonicFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.monotonic = time.monotonic()
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    # token bucket per (logger, pin, event), a stuck input must not flood the journal. at most max_keys buckets are
+    # kept, a dropped bucket starts full again
+    _rate: float
+    _burst: float
+    _max_keys: int
+    _buckets: OrderedDict[RateLimitKey, Tuple[float, float]]  # key -> (tokens, last update), least recent first
+    _suppressed: Dict[RateLimitKey, int]
+
+    def __init__(self, rate: float, burst: float, max_keys: int = MAX_RATE_LIMIT_KEYS):
+        super().__init__()
+        self._rate = rate
+        self._burst = burst
+        self._max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._suppressed = {}
+
+    @property
+    def suppressed(self):
+        return self._suppressed
+
+    @property
+    def buckets(self):
+        return self._buckets
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self._rate <= 0 or record.levelno >= logging.WARNING:
+            return True
+
+        key = (record.name, getattr(record, "pin_id", None), getattr(record, "event", None))
+        now = time.monotonic()
+        tokens, last_update = self._buckets.get(key, (self._burst, now))
+        tokens = min(self._burst, tokens + (now - last_update) * self._rate)
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self._max_keys:
+            # the count of suppressed records of a dropped key is lost
+            dropped_key, _ = self._buckets.popitem(last=False)
+            self._suppressed.pop(dropped_key, None)
+
+        if tokens < 1:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return False
+
+        self._buckets[key] = (tokens - 1, now)
+        suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class StructuredFormatter(logging.Formatter):
+    # logfmt style records, journald adds the wall clock time
+    def format(self, record: logging.LogRecord) -> str:
+        fields = [f"level={record.levelname}", f"logger={record.name}"]
+        for field in RECORD_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                fields.append(f"{field}={logfmt_value(value)}")
+        monotonic = getattr(record, "monotonic", None)
+        if monotonic is not None:
+            fields.append(f"mono={monotonic:.6f}")
+        suppressed = getattr(record, "suppressed", None)
+        if suppressed:
+            fields.append(f"suppressed={suppressed}")
+        fields.append(f'msg="{record.getMessage().translate(LOGFMT_ESCAPES)}"')
+
+        line = " ".join(fields)
+        if record.exc_info:
+            line = f"{line}\n{self.formatException(record.exc_info)}"
+        return line
+
+
+def setup_logging(
+    level: str = "INFO", pin_levels: Mapping[str, str] | None = None, rate_limit: float = 5, burst: float = 20
+):
+    # the event loop only enqueues records, formatting and writing happens in the listener thread
+    global _listener, _queue_handler
+
+    root_logger = logging.getLogger(ROOT_LOGGER_NAME)
+    stop_logging()
+
+    record_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(StructuredFormatter())
+
+    _queue_handler = DeferredQueueHandler(record_queue)
+    _queue_handler.addFilter(RateLimitFilter(rate_limit, burst))
+    _queue_handler.addFilter(MonotonicFilter())
+    _listener = QueueListener(record_queue, stream_handler)
+
+    root_logger.addHandler(_queue_handler)
+    root_logger.setLevel(level.upper())
+    root_logger.propagate = False
+    for pin_type in ("input", "output", "virtual"):
+        pin_level = (pin_levels or {}).get(pin_type, level)
+        get_pin_logger(pin_type).setLevel(pin_level.upper())
+
+    _listener.start()
+
+
+def stop_logging():
+    # flushes all queued records
+    global _listener, _queue_handler
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _queue_handler is not None:
+        logging.getLogger(ROOT_LOGGER_NAME).removeHandler(_queue_handler)
+        _queue_handler = None
@@ -1,14 +1,18 @@
-import RPi.GPIO as GPIO
+from startup_timer import StartupTimer
 
-from media_control import MediaControl
+startup_timer = StartupTimer()
 
-GPIO.setmode(GPIO.BCM)
-controller = MediaControl("dpt-media-control")
+from logger import get_logger, stop_logging  # noqa: E402
+from media_control import MediaControl  # noqa: E402
+
+startup_timer.mark("imports")
+controller = MediaControl("dpt-media-control", startup_timer=startup_timer)
 
 try:
     controller.start_event_loop()
 
-except Exception as e:
-    print(e)
+except Exception:
+    get_logger("main").exception("event loop stopped")
     controller.stop_event_loop()
-    GPIO.cleanup()
+    controller.backend.cleanup()
+    stop_logging()
@@ -1,50 +1,242 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import datetime
+import time
 from pathlib import Path
-from typing import TYPE_CHECKING, Dict, Literal, Tuple, Union, cast, overload
-
-import RPi.GPIO as GPIO
-
-from config import ConfigParser
-from pins import InputPin, OutputPin, VirtualPin
+from typing import TYPE_CHECKING, Dict, Literal, Tuple, Union, overload
+
+from cluster import ClusterNode, ClusterProtocol
+from config import ConfigParser, ConfigWatcher, analyze_config, diff_config
+from control import ControlProtocol, ControlServer
+from gpio import GpioBackend, OutputBatch, create_backend
+from journal import EventJournal, default_journal_path
+from logger import get_logger, setup_logging
+from metrics import REGISTRY, MetricsServer, observe_stage
+from pins import (
+    FanOutExecutor,
+    InputPin,
+    OutputPin,
+    PinEvent,
+    PinIndex,
+    PinScheduler,
+    PressResult,
+    TriggerRateLimiter,
+    VirtualPin,
+    is_remote_pin_id,
+)
+from pjlink import DeviceStateCache, PJLinkPool, PJLinkStatusPoller, RetryPolicy, load_protocol
+from realtime import LoopWatchdog, create_event_loop, enter_realtime, notify_systemd
+from scenes import SceneSequencer, compile_scene
+from startup_timer import StartupTimer
+from state import RESTORE_SETTLE_TIME, StateStore, default_state_path
 
 if TYPE_CHECKING:
-    from config import Config, InputPinConfig, OutputPinConfig, VirtualPinConfig
+    from config import Config, InputMode, InputPinConfig, OutputPinConfig, VirtualPinConfig
     from pins import PinType
+    from scenes import Scene
 
 
 type PinUnion = InputPin | OutputPin | VirtualPin
 
 
-type TriggerContext = Tuple[InputPin | VirtualPin, float]  # (pin, timestamp)
+type TriggerContext = Tuple[PinUnion, float]  # (pin, time.monotonic of the input edge)
 
 # Default config path is $HOME/.config/dpt-media-control/config.toml
 DEFAULT_CONFIG_PATH = Path.home() / ".config" / "dpt-media-control" / "config.toml"
 
+logger = get_logger("media_control")
+
 
 class MediaControl:
     prjoct_name: str | Path
     pins: Dict[str, Union[InputPin, VirtualPin, OutputPin]]
+    _pin_index: PinIndex | None
     event_loop: asyncio.AbstractEventLoop
     config_parser: ConfigParser
-
-    def __init__(self, project_name: str, config_path: str | Path = DEFAULT_CONFIG_PATH):
+    config_watcher: ConfigWatcher
+    config: Config
+    startup_timer: StartupTimer | None
+    metrics_server: MetricsServer
+    control_protocol: ControlProtocol
+    control_server: ControlServer
+    cluster_protocol: ClusterProtocol
+    cluster: ClusterNode
+    backend: GpioBackend
+    outputs: OutputBatch
+    pjlink_pool: PJLinkPool
+    device_states: DeviceStateCache
+    status_poller: PJLinkStatusPoller
+    fan_out: FanOutExecutor
+    rate_limiter: TriggerRateLimiter
+    scheduler: PinScheduler
+    sequencer: SceneSequencer
+    scene_triggers: Dict[str, list[str]]
+    journal: EventJournal | None
+    state_store: StateStore
+    input_mode: InputMode
+    scan_interval: float
+    scanned_pins: list[InputPin]
+    scan_levels: int
+    scan_task: asyncio.Task[None] | None
+    loop_watchdog: LoopWatchdog
+
+    def __init__(
+        self,
+        project_name: str,
+        config_path: str | Path = DEFAULT_CONFIG_PATH,
+        backend: GpioBackend | None = None,
+        startup_timer: StartupTimer | None = None,
+    ):
         self.prjoct_name = project_name
+        self.startup_timer = startup_timer
         self.pins = {}
-        self.event_loop = asyncio.new_event_loop()
+        self._pin_index = None
+        self.scanned_pins = []
+        self.scan_levels = 0
+        self.scan_task = None
         self.config_parser = ConfigParser(config_path)
 
         # load config and see if it contains values
         config: Config = self.config_parser.load_config()
+        setup_logging(
+            config["Project"]["log_level"],
+            config["Project"]["log_levels"],
+            config["Project"]["log_rate_limit"],
+            config["Project"]["log_burst"],
+        )
+        self.mark_startup("config")
+        # the loop implementation depends on the config, everything below may bind to the loop
+        self.event_loop = create_event_loop(use_uvloop=config["Project"]["realtime"])
+        self.scheduler = PinScheduler(self.event_loop)
+        self.sequencer = SceneSequencer(self.scheduler)
+        self.scene_triggers = {}
+        self.loop_watchdog = LoopWatchdog(
+            config["Project"]["loop_watchdog_interval"], config["Project"]["loop_lag_warning"]
+        )
+        self.backend = backend if backend is not None else create_backend(config["Project"]["gpio_backend"])
+        self.outputs = OutputBatch(self.backend, self.event_loop)
+        self.mark_startup("gpio backend")
+        self.pjlink_pool = PJLinkPool(
+            config["Project"]["pjlink_keepalive_interval"],
+            config["Project"]["pjlink_idle_timeout"],
+            config["Project"]["pjlink_timeout"],
+            RetryPolicy(
+                config["Project"]["pjlink_retries"] + 1,
+                config["Project"]["pjlink_retry_delay"],
+                config["Project"]["pjlink_retry_max_delay"],
+            ),
+            config["Project"]["pjlink_failure_threshold"],
+            config["Project"]["pjlink_probe_interval"],
+        )
+        self.device_states = DeviceStateCache(config["Project"]["device_state_ttl"])
+        self.status_poller = PJLinkStatusPoller(
+            self.pjlink_pool, self.device_states, config["Project"]["pjlink_status_interval"]
+        )
+        self.fan_out = FanOutExecutor(
+            config["Project"]["max_concurrent_outputs"], config["Project"]["max_concurrent_virtual_pins"]
+        )
+        self.rate_limiter = TriggerRateLimiter(
+            config["Project"]["trigger_rate_limit"],
+            config["Project"]["trigger_burst"],
+            config["Project"]["global_trigger_rate_limit"],
+            config["Project"]["global_trigger_burst"],
+        )
+        self.journal = None
+        if config["Project"]["journal_capacity"] > 0:
+            journal_path = config["Project"]["journal_path"] or default_journal_path()
+            try:
+                self.journal = EventJournal(journal_path, config["Project"]["journal_capacity"])
+            except OSError as e:
+                logger.warning("event journal %s could not be opened: %s", journal_path, e)
+        self.cluster_protocol = ClusterProtocol(self)
+        self.cluster = ClusterNode(
+            self.cluster_protocol,
+            config["Project"]["cluster_node"],
+            config["Project"]["cluster_host"],
+            config["Project"]["cluster_port"],
+            config["Project"]["cluster_peers"],
+            config["Project"]["cluster_secret"],
+            config["Project"]["cluster_timeout"],
+            config["Project"]["cluster_heartbeat_interval"],
+        )
+        self.input_mode = config["Project"]["input_mode"]
+        self.scan_interval = config["Project"]["scan_interval"]
+        self.state_store = StateStore(
+            self, config["Project"]["state_path"] or default_state_path(), config["Project"]["state_interval"]
+        )
+        # loaded before the pins are set up, the outputs start with their restored level
+        self.state_store.load()
+        self.device_states.on_change = self.state_store.mark_changed
         if len(config.keys()) > 0:
             self.apply_config(config)
+        self.mark_startup("pins")
+
+        self.config_watcher = ConfigWatcher(
+            self.config_parser.config_file_path, config["Project"]["config_reload_interval"]
+        )
+        self.config_watcher.start(self.event_loop, self.reload_config)
+        self.metrics_server = MetricsServer(
+            REGISTRY, config["Project"]["metrics_host"], config["Project"]["metrics_port"]
+        )
+        self.metrics_server.start(self.event_loop)
+        self.control_protocol = ControlProtocol(self)
+        self.control_server = ControlServer(
+            self.control_protocol,
+            config["Project"]["control_host"],
+            config["Project"]["control_port"],
+            config["Project"]["control_socket"],
+            config["Project"]["control_http_port"],
+        )
+        self.control_server.start(self.event_loop)
+        self.cluster.start(self.event_loop)
+        # before the loop starts, a blocked input must not trigger when it is read the first time
+        self.state_store.restore_blocks()
+
+    def mark_startup(self, stage: str):
+        if self.startup_timer is not None:
+            self.startup_timer.mark(stage)
+
+    def _on_event_loop_started(self):
+        # inputs are live from here on
+        self.mark_startup("event loop")
+        if self.startup_timer is not None:
+            logger.info(self.startup_timer.report())
+
+        notify_systemd("READY=1")
+
+        if self.state_store.restored is not None:
+            self.state_store.resume()
+            # the inputs that are still held trigger their pins again until then
+            settle_time = RESTORE_SETTLE_TIME + max((pin.activation_delay for pin in self.get_input_pins()), default=0)
+            self.event_loop.call_later(settle_time, self.state_store.settle)
+
+        # the protocol is not needed for the inputs to go live, import it before the first trigger needs it
+        if self.status_poller.devices:
+            self.event_loop.call_soon(load_protocol)
+
+    def _on_pin_event(self, pin: PinUnion, event: PinEvent):
+        # every pin event passes here, keep it cheap
+        if self.journal is not None:
+            self.journal.append(pin, event)
+        self.control_protocol.publish(pin, event)
+        if self.cluster.is_enabled:
+            self.cluster_protocol.publish(pin, event)
+        self.state_store.mark_changed()
+        if event == PinEvent.ACTIVATE and pin.id in self.scene_triggers:
+            # scenes start like triggered pins, after the activation delay and only if the input is not blocked
+            for scene_id in self.scene_triggers[pin.id]:
+                self.sequencer.start(scene_id)
+
+    @property
+    def pin_index(self) -> PinIndex:
+        # compiled lazily after pins changed outside of apply_config
+        if self._pin_index is None:
+            self._pin_index = PinIndex.from_pins(self.pins.values())
+        return self._pin_index
 
     def has_pin_been_setup(self, pin_number: int):
         # check if the gpio_pin has been setup
-        pin_function = GPIO.gpio_function(pin_number)
-        return pin_function != GPIO.UNKNOWN
+        return self.backend.is_setup(pin_number)
 
     @overload
     def register_pin(self, pin_type: Literal["input"], gpio_pin: int, display_name: str | None = None) -> InputPin: ...
@@ -62,109 +254,213 @@ class MediaControl:
     def register_pin(
         self, pin_type: PinType, gpio_pin: int, display_name: str | None = None
     ) -> InputPin | OutputPin | VirtualPin:
-        # if self.has_pin_been_setup(pin_number):
-        #     return
+        pin = self.__create_pin(pin_type, gpio_pin, display_name)
+        self.__install_pin(pin)
+        return pin
 
+    def __create_pin(
+        self, pin_type: PinType, gpio_pin: int, display_name: str | None = None
+    ) -> InputPin | OutputPin | VirtualPin:
+        # only builds the pin, nothing of the running engine or the gpio changes yet
+        pin: InputPin | OutputPin | VirtualPin
         if pin_type == "input":
-            print(f"registering input pin {gpio_pin}")
-            GPIO.setup(gpio_pin, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
-            input_pin_id = f"I#{gpio_pin}"
-            new_input_pin: InputPin = InputPin(input_pin_id, gpio_pin)
-            new_input_pin.display_name = display_name if display_name else input_pin_id
-            self.pins[input_pin_id] = new_input_pin
-
-            self.add_callback_to_eventloop(new_input_pin)
-
-            return new_input_pin
-
-        if pin_type == "output":
-            print(f"registering output pin {gpio_pin}")
-            GPIO.setup(gpio_pin, GPIO.OUT)
-            GPIO.output(gpio_pin, GPIO.LOW)
-            output_pin_id = f"O#{gpio_pin}"
-            new_output_pin: OutputPin = OutputPin(output_pin_id, gpio_pin)
-            new_output_pin.display_name = display_name if display_name else output_pin_id
-
-            self.pins[output_pin_id] = new_output_pin
-
-            return new_output_pin
-
-        if pin_type == "virtual":
+            pin = InputPin(f"I#{gpio_pin}", gpio_pin, self.fan_out, self.scheduler)
+        elif pin_type == "output":
+            pin = OutputPin(f"O#{gpio_pin}", gpio_pin, self.outputs, self.scheduler)
+        elif pin_type == "virtual":
             if gpio_pin > 0:
                 raise ValueError("virtual pin must be negative")
-
-            print(f"registering virtual pin v{abs(gpio_pin)}")
-            virtual_pin_name = f"V#{abs(gpio_pin)}"
-            new_virtual_pin: VirtualPin = VirtualPin(virtual_pin_name, gpio_pin)
-            new_virtual_pin.display_name = display_name if display_name else virtual_pin_name
-
-            self.pins[virtual_pin_name] = new_virtual_pin
-
-            return new_virtual_pin
-
-    def unregister_pin(self, pin: InputPin | OutputPin):
+            pin = VirtualPin(f"V#{abs(gpio_pin)}", gpio_pin, self.pjlink_pool, self.device_states)
+        else:
+            raise ValueError(f"unknown pin type {pin_type}")
+        pin.display_name = display_name if display_name else pin.id
+        return pin
+
+    def __install_pin(self, pin: InputPin | OutputPin | VirtualPin):
+        logger.info("registering pin %s", pin.id)
+        if isinstance(pin, InputPin):
+            self.backend.setup_input(pin.gpio_pin)
+        elif isinstance(pin, OutputPin):
+            self.backend.setup_output(pin.gpio_pin, self.state_store.initial_level(pin.id))
+        pin.add_event_listener(self._on_pin_event)
+        self.pins[pin.id] = pin
+        self._pin_index = None
+        if isinstance(pin, InputPin):
+            self.add_callback_to_eventloop(pin)
+
+    def unregister_pin(self, pin: InputPin | OutputPin | VirtualPin):
+        self._pin_index = None
+        # running activations of the pin must not start anything new
+        pin.block()
+        pin.cancel_activation()
+        self.rate_limiter.forget(pin.id)
+        # pending holds, pulses and delays end now
+        self.scheduler.cancel(pin.id)
         if pin.pin_type == "input":
             del self.pins[pin.id]
-            GPIO.cleanup(pin.gpio_pin)
+            if pin in self.scanned_pins:
+                self.remove_pin_from_scanner(pin)
+            else:
+                self.backend.remove_edge_callback(pin.gpio_pin)
+            self.backend.cleanup(pin.gpio_pin)
 
         if pin.pin_type == "output":
             del self.pins[pin.id]
-            GPIO.cleanup(pin.gpio_pin)
+            self.outputs.discard(pin.gpio_pin)
+            self.backend.cleanup(pin.gpio_pin)
 
         if pin.pin_type == "virtual":
             del self.pins[pin.id]
 
     def get_pin_by_gpio(self, gpio_pin: int) -> InputPin | OutputPin | VirtualPin | None:
-        for pin in self.pins.values():
-            if pin.gpio_pin == gpio_pin:
-                return pin
-        return None
+        return self.pin_index.by_gpio.get(gpio_pin)
 
     def get_pin_by_id(self, pin_id: str) -> InputPin | OutputPin | VirtualPin | None:
-        return self.pins.get(pin_id)
+        return self.pin_index.by_id.get(pin_id)
 
     def get_input_pins(self):
-        input_pins: list[InputPin] = []
-        for pin in self.pins.values():
-            if pin.pin_type == "input":
-                input_pins.append(cast(InputPin, pin))
-        return input_pins
+        return self.pin_index.inputs
 
     def get_output_pins(self):
-        output_pins: list[OutputPin] = []
-        for pin in self.pins.values():
-            if pin.pin_type == "output":
-                output_pins.append(cast(OutputPin, pin))
-        return output_pins
+        return self.pin_index.outputs
 
     def get_virtual_pins(self):
-        virtual_pins: list[VirtualPin] = []
-        for pin in self.pins.values():
-            if pin.pin_type == "virtual":
-                virtual_pins.append(cast(VirtualPin, pin))
-        return virtual_pins
-
-    async def on_input_callback(self, pin: InputPin):
+        return self.pin_index.virtuals
+
+    def allow_trigger(self, pin: PinUnion) -> bool:
+        # presses are rate limited where they enter, the pins and scene steps they trigger are not counted again
+        if self.rate_limiter.allow(pin.id):
+            return True
+        pin.emit_event(PinEvent.DROPPED_TRIGGER)
+        return False
+
+    def press_pin(self, pin: PinUnion) -> PressResult:
+        # presses a pin like a button without a physical contact, e.g. from the control api or another node
+        if not self.allow_trigger(pin):
+            return PressResult("dropped", None)
+        if isinstance(pin, InputPin):
+            pin.log_event("press", "triggered")
+        return pin.press((pin, time.monotonic()))
+
+    def release_pin(self, pin: PinUnion):
+        if isinstance(pin, InputPin):
+            self.on_input_level(pin, False)
+            return
+        pin.untrigger((pin, time.monotonic()))
+
+    def set_outputs(self, levels: Dict[str, bool]):
+        # sets several output pins in one gpio operation, bypasses triggers, e.g. for a state restore or the api
+        gpio_levels: Dict[int, bool] = {}
+        for pin_id, level in levels.items():
+            pin = self.get_pin_by_id(pin_id)
+            if not isinstance(pin, OutputPin):
+                raise ValueError(f"{pin_id} is not an output pin")
+            gpio_levels[pin.gpio_pin] = level
+        self.outputs.write_many(gpio_levels)
+        self.state_store.mark_changed()
+
+    def on_input_level(self, pin: InputPin, level: bool, edge_time: float | None = None):
+        # shared by edge detection and the scanner, dispatches press and release of an input pin
+        if level == pin.is_triggered:
+            return
+
+        if edge_time is None:
+            edge_time = time.monotonic()
+        trigger_context = (pin, edge_time)
+        if level:
+            pin.is_triggered = True
+            pin.log_event("press", "triggered")
+            observe_stage(pin.id, "debounce", edge_time)
+            if self.allow_trigger(pin):
+                pin.start_trigger(trigger_context)
+        else:
+            pin.log_event("release", "released")
+            pin.untrigger(trigger_context)
+
+    def on_input_sample(self, pin: InputPin, level: bool, edge_time: float | None = None):
+        # raw samples pass the debouncer before a press or release is dispatched
+        now = self.event_loop.time()
+        stable_level = pin.debouncer.feed(level, now)
+        if stable_level is not None:
+            self.on_input_level(pin, stable_level, edge_time)
+
+        self.scheduler.cancel(pin.id, "resample")
+        next_sample_time = pin.debouncer.next_sample_time(now, self.scan_interval)
+        if next_sample_time is not None:
+            self.scheduler.call_at(pin.id, "resample", next_sample_time, lambda: self.resample_input(pin))
+
+    def resample_input(self, pin: InputPin):
+        self.on_input_sample(pin, self.backend.read(pin.gpio_pin))
+
+    def on_input_edge(self, gpio_pin: int, edge_time: float | None = None):
+        pin = self.pin_index.by_gpio.get(gpio_pin)
+        if not isinstance(pin, InputPin):
+            return
+        # read the level on the loop, the edge may be stale by the time it is handled
+        self.on_input_sample(pin, self.backend.read(gpio_pin), edge_time)
+
+    def _on_gpio_edge(self, gpio_pin: int):
+        # called from the backend's alert thread, hand the edge over to the event loop
+        self.event_loop.call_soon_threadsafe(self.on_input_edge, gpio_pin, time.monotonic())
+
+    # --- Input Scanner ---
+
+    async def scan_inputs(self):
         while True:
-            trigger_context = (pin, datetime.timestamp(datetime.now()))
-            if GPIO.input(pin.gpio_pin) and not pin.is_triggered:
-                pin.is_triggered = True
-                print(f"Pin {pin.id} triggered")
-                loop = asyncio.get_event_loop()
-                loop.create_task(pin.trigger(trigger_context))
-
-            if not GPIO.input(pin.gpio_pin) and pin.is_triggered:
-                pin.is_triggered = False
-                print(f"Pin {pin.id} released")
-                pin.untrigger(trigger_context)
-
-            await asyncio.sleep(0.1)
+            gpio_pins = [pin.gpio_pin for pin in self.scanned_pins]
+            levels = self.backend.read_bank(gpio_pins)
+            changed = levels ^ self.scan_levels
+
+            if changed:
+                self.scan_levels = levels
+                edge_time = time.monotonic()
+                while changed:
+                    lowest_bit = changed & -changed
+                    pin = self.scanned_pins[lowest_bit.bit_length() - 1]
+                    self.on_input_sample(pin, bool(levels & lowest_bit), edge_time)
+                    changed ^= lowest_bit
+
+            await asyncio.sleep(self.scan_interval)
+
+    def add_pin_to_scanner(self, pin: InputPin):
+        self.scanned_pins.append(pin)
+        if pin.is_triggered:
+            self.scan_levels |= 1 << (len(self.scanned_pins) - 1)
+
+        if self.scan_task is None:
+            self.scan_task = self.event_loop.create_task(self.scan_inputs())
+
+    def remove_pin_from_scanner(self, pin: InputPin):
+        self.scanned_pins.remove(pin)
+        # bits shift with the pin positions, rebuild the mask from the known pin states
+        self.scan_levels = 0
+        for bit, scanned_pin in enumerate(self.scanned_pins):
+            if scanned_pin.is_triggered:
+                self.scan_levels |= 1 << bit
+
+        if not self.scanned_pins and self.scan_task is not None:
+            self.scan_task.cancel()
+            self.scan_task = None
 
     def add_callback_to_eventloop(self, pin: InputPin):
-        task = self.event_loop.create_task(self.on_input_callback(pin))
-        return task
+        if self.input_mode == "edge":
+            try:
+                self.backend.add_edge_callback(pin.gpio_pin, self._on_gpio_edge)
+                # pick up the current level, the pin may already be held while starting
+                self.event_loop.call_soon(self.on_input_edge, pin.gpio_pin)
+                return None
+            except RuntimeError as e:
+                logger.warning("edge detection failed for pin %s, falling back to polling: %s", pin.gpio_pin, e)
+
+        self.add_pin_to_scanner(pin)
+        return self.scan_task
 
     def start_event_loop(self):
+        if self.config["Project"]["realtime"]:
+            # after the config is loaded and all pins are set up, the objects that exist now live until the end
+            enter_realtime(self.config["Project"], self.event_loop)
+        self.loop_watchdog.start(self.event_loop)
+        self.event_loop.call_soon(self._on_event_loop_started)
         self.event_loop.run_forever()
 
     def stop_event_loop(self):
@@ -184,11 +480,12 @@ class MediaControl:
             pin = self.pins[pin_config["id"]]
             assert isinstance(pin, InputPin)
             pin.activation_delay = pin_config["activation_delay"] if pin_config["activation_delay"] else 0
-            # get trigger_pins by id
-            for triggered_pin_id in pin_config["triggered_pins"]:
-                triggered_pin = self.get_pin_by_id(triggered_pin_id)
-                assert isinstance(triggered_pin, (OutputPin, VirtualPin))
-                pin.add_triggered_pin(triggered_pin)
+            pin.wait_for_triggered_pins = pin_config["wait_for_triggered_pins"]
+            pin.retrigger_policy = pin_config["retrigger_policy"]
+            pin.debouncer.settle_time = pin_config["debounce_settle_time"]
+            pin.debouncer.stable_samples = pin_config["debounce_stable_samples"]
+            pin.debouncer.min_press_time = pin_config["min_press_time"]
+            pin.debouncer.min_release_time = pin_config["min_release_time"]
 
     def __update_output_pins_from_config(self, config: list[OutputPinConfig]):
         for pin_config in config:
@@ -196,6 +493,7 @@ class MediaControl:
             assert isinstance(pin, OutputPin)
             pin.hold_time = pin_config["hold_time"] if pin_config["hold_time"] else 0
             pin.trigger_method = pin_config["trigger_method"]
+            pin.retrigger_policy = pin_config["retrigger_policy"]
 
     def __update_virtual_pins_from_config(self, config: list[VirtualPinConfig]):
         for pin_config in config:
@@ -204,28 +502,130 @@ class MediaControl:
             pin.ip_address = pin_config["ip_address"]
             pin.virtual_trigger_method = pin_config["virtual_trigger_method"]
             pin.password = pin_config["password"]
+            pin.retrigger_policy = pin_config["retrigger_policy"]
+            if pin.ip_address and pin.virtual_trigger_method.startswith("pjlink"):
+                self.status_poller.watch(pin.ip_address, pin.password)
+
+    def __link_pins_from_index(self, pin_index: PinIndex):
+        for position, pin in enumerate(pin_index.pins):
+            # lists are cleared in place, running triggers see the new relations
+            pin.clear_block_pins()
+            pin.clear_unblock_pins()
+            if isinstance(pin, InputPin):
+                pin.clear_triggered_pins()
+                for triggered_pin in pin_index.pins_at(pin_index.triggered[position]):
+                    assert isinstance(triggered_pin, (OutputPin, VirtualPin))
+                    pin.add_triggered_pin(triggered_pin)
+            for blocked_pin in pin_index.pins_at(pin_index.blocks[position]):
+                pin.add_block_pin(blocked_pin)
+            for unblocked_pin in pin_index.pins_at(pin_index.unblocks[position]):
+                pin.add_unblock_pin(unblocked_pin)
+
+    def __link_remote_pins(self, config: Config):
+        # pins of other cluster nodes are not indexed, their proxies are added after the local relations
+        for pin_config in config["InputPins"] + config["OutputPins"] + config["VirtualPins"]:
+            pin = self.pins[pin_config["id"]]
+            for pin_id in pin_config.get("triggered_pins", []):  # type: ignore
+                if is_remote_pin_id(pin_id) and isinstance(pin, InputPin):
+                    pin.add_triggered_pin(self.cluster_protocol.remote_pin(pin_id))
+            for pin_id in pin_config["pins_to_block"]:
+                if is_remote_pin_id(pin_id):
+                    pin.add_block_pin(self.cluster_protocol.remote_pin(pin_id))
+            for pin_id in pin_config["pins_to_unblock"]:
+                if is_remote_pin_id(pin_id):
+                    pin.add_unblock_pin(self.cluster_protocol.remote_pin(pin_id))
+
+    def __compile_scenes(self, config: Config, pin_index: PinIndex) -> Tuple[list[Scene], Dict[str, list[str]]]:
+        scenes = [compile_scene(scene_config, pin_index) for scene_config in config["Scenes"]]
+        scene_ids = {scene.id for scene in scenes}
+        scene_triggers: Dict[str, list[str]] = {}
+        for pin_config in config["InputPins"]:
+            for scene_id in pin_config["triggered_scenes"]:
+                if scene_id not in scene_ids:
+                    raise ValueError(f"pin {pin_config['id']} triggers unknown scene {scene_id}")
+            if pin_config["triggered_scenes"]:
+                scene_triggers[pin_config["id"]] = pin_config["triggered_scenes"]
+        return scenes, scene_triggers
+
+    def check_config(self, config: Config):
+        # raises a ValueError before anything of an invalid config is applied
+        report = analyze_config(config)
+        for warning in report.warnings:
+            logger.warning("config: %s", warning)
+        if not report.is_valid:
+            raise ValueError(f"invalid config: {'; '.join(report.errors)}")
 
     def apply_config(self, config: Config):
+        self.check_config(config)
         self.__register_pins_from_config(config)
+        # compile the pin index once, unknown pin ids raise a ValueError here
+        pin_index = PinIndex.from_config(self.pins, config)
+        scenes, self.scene_triggers = self.__compile_scenes(config, pin_index)
+        self.sequencer.set_scenes(scenes)
         self.__update_input_pins_from_config(config["InputPins"])
         self.__update_output_pins_from_config(config["OutputPins"])
         self.__update_virtual_pins_from_config(config["VirtualPins"])
-
-        for pin_config in config["InputPins"] + config["OutputPins"] + config["VirtualPins"]:
-            pin = self.pins[pin_config["id"]]
-            for blocked_pin_id in pin_config["pins_to_block"]:
-                blocked_pin = self.get_pin_by_id(blocked_pin_id)
-                assert isinstance(blocked_pin, (InputPin, OutputPin, VirtualPin))
-                pin.add_block_pin(blocked_pin)
-            for unblocked_pin_id in pin_config["pins_to_unblock"]:
-                unblocked_pin = self.get_pin_by_id(unblocked_pin_id)
-                assert isinstance(unblocked_pin, (InputPin, OutputPin, VirtualPin))
-                pin.add_unblock_pin(unblocked_pin)
+        self.__link_pins_from_index(pin_index)
+        self.__link_remote_pins(config)
+        self._pin_index = pin_index
+        self.config = config
+        self.status_poller.start(self.event_loop)
+
+    def apply_config_diff(self, config: Config):
+        # apply a changed config to the running pins, unchanged pins keep running undisturbed. everything that can
+        # fail is built before the first running pin is touched, an invalid config keeps the old one running
+        diff = diff_config(self.config, config)
+        if diff.is_empty:
+            return
+        self.check_config(config)
+
+        removed_ids = {pin_config["id"] for pin_config in diff.removed}
+        added_pins = [
+            self.__create_pin(pin_config["type"], pin_config["gpio_pin"], pin_config["display_name"])
+            for pin_config in diff.added
+        ]
+        pins = {pin_id: pin for pin_id, pin in self.pins.items() if pin_id not in removed_ids}
+        pins |= {pin.id: pin for pin in added_pins}
+        pin_index = PinIndex.from_config(pins, config)
+        scenes, scene_triggers = self.__compile_scenes(config, pin_index)
+
+        for pin_config in diff.removed:
+            logger.info("removing pin %s", pin_config["id"])
+            self.unregister_pin(self.pins[pin_config["id"]])
+        for pin in added_pins:
+            self.__install_pin(pin)
+        for pin_config in diff.changed:
+            self.pins[pin_config["id"]].display_name = pin_config["display_name"]
+
+        if diff.project_changed:
+            # everything else of the project table is only read at startup
+            self.scan_interval = config["Project"]["scan_interval"]
+            self.device_states.ttl = config["Project"]["device_state_ttl"]
+            logger.warning("project settings changed, some of them are only applied after a restart")
+
+        self.sequencer.set_scenes(scenes)
+        self.scene_triggers = scene_triggers
+        self.status_poller.devices.clear()
+        self.__update_input_pins_from_config(config["InputPins"])
+        self.__update_output_pins_from_config(config["OutputPins"])
+        self.__update_virtual_pins_from_config(config["VirtualPins"])
+        self.__link_pins_from_index(pin_index)
+        self.__link_remote_pins(config)
+        self._pin_index = pin_index
+        self.config = config
+
+    def reload_config(self):
+        # parse and validation errors keep the running config, anything else is a bug and is raised
+        try:
+            config = self.config_parser.load_config()
+            self.apply_config_diff(config)
+        except (OSError, ValueError) as e:
+            logger.error("config reload failed, keeping the running config: %s", e)
+            return
+        logger.info("config reloaded")
 
 
 if __name__ == "__main__":
-    GPIO.setmode(GPIO.BCM)
-
     test_config_file_path = Path(__file__).parent / "config" / "test_config.toml"
 
     controller = MediaControl("dpt-media-control", test_config_file_path)
@@ -235,4 +635,4 @@ if __name__ == "__main__":
 
     except KeyboardInterrupt:
         controller.stop_event_loop()
-        GPIO.cleanup()
+        controller.backend.cleanup()
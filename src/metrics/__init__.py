@@ -0,0 +1,17 @@
+from .pipeline import BLOCKED_TRIGGERS as BLOCKED_TRIGGERS
+from .pipeline import CLUSTER_RETRANSMITS as CLUSTER_RETRANSMITS
+from .pipeline import CLUSTER_ROUND_TRIP as CLUSTER_ROUND_TRIP
+from .pipeline import DROPPED_TRIGGERS as DROPPED_TRIGGERS
+from .pipeline import LOOP_LAG as LOOP_LAG
+from .pipeline import OUTPUT_BATCH_SIZE as OUTPUT_BATCH_SIZE
+from .pipeline import PJLINK_CIRCUIT_OPEN as PJLINK_CIRCUIT_OPEN
+from .pipeline import PJLINK_ERRORS as PJLINK_ERRORS
+from .pipeline import PJLINK_RETRIES as PJLINK_RETRIES
+from .pipeline import REGISTRY as REGISTRY
+from .pipeline import TRIGGER_STAGES as TRIGGER_STAGES
+from .pipeline import TRIGGERS as TRIGGERS
+from .pipeline import observe_stage as observe_stage
+from .registry import Counter as Counter
+from .registry import Histogram as Histogram
+from .registry import MetricsRegistry as MetricsRegistry
+from .server import MetricsServer as MetricsServer
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import time
+
+from .registry import MetricsRegistry
+
+REGISTRY = MetricsRegistry()
+
+# every stage is measured from the input edge that started the trigger chain
+TRIGGER_STAGES = REGISTRY.histogram(
+    "dptmc_trigger_stage_seconds",
+    "Time from the input edge until a stage of the trigger pipeline was reached",
+    ("pin", "stage"),
+)
+TRIGGERS = REGISTRY.counter("dptmc_triggers_total", "Triggers that started an activation", ("pin",))
+BLOCKED_TRIGGERS = REGISTRY.counter(
+    "dptmc_blocked_triggers_total", "Triggers rejected because the pin was blocked", ("pin",)
+)
+DROPPED_TRIGGERS = REGISTRY.counter(
+    "dptmc_dropped_triggers_total", "Triggers dropped by the rate limit of the pin or of all pins", ("pin", "limit")
+)
+OUTPUT_BATCH_SIZE = REGISTRY.histogram(
+    "dptmc_output_batch_size", "Output pins written together in one gpio operation", (), (1, 2, 4, 8, 16, 32)
+)
+PJLINK_ERRORS = REGISTRY.counter("dptmc_pjlink_errors_total", "Failed PJLink commands", ("pin",))
+PJLINK_RETRIES = REGISTRY.counter(
+    "dptmc_pjlink_retries_total", "PJLink commands retried after a network error", ("device",)
+)
+PJLINK_CIRCUIT_OPEN = REGISTRY.counter(
+    "dptmc_pjlink_circuit_open_total", "Times a device was marked unreachable after repeated failures", ("device",)
+)
+
+CLUSTER_RETRANSMITS = REGISTRY.counter(
+    "dptmc_cluster_retransmits_total", "Cluster messages sent again because the ack was missing", ("node",)
+)
+CLUSTER_ROUND_TRIP = REGISTRY.histogram(
+    "dptmc_cluster_round_trip_seconds",
+    "Time from sending a cluster message until its ack arrived",
+    ("node",),
+    (0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+
+LOOP_LAG = REGISTRY.histogram(
+    "dptmc_event_loop_lag_seconds",
+    "Delay of the loop watchdog wakeups, every callback on the loop is delayed as much",
+    (),
+    (0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+
+def observe_stage(pin_id: str, stage: str, edge_time: float):
+    # edge_time is a time.monotonic timestamp
+    TRIGGER_STAGES.observe(time.monotonic() - edge_time, pin_id, stage)
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Dict, Sequence, Tuple
+
+type LabelValues = Tuple[str, ...]
+
+# seconds, tuned for the trigger pipeline: sub millisecond edges up to projector round trips
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    _name: str
+    _help: str
+    _label_names: Tuple[str, ...]
+    _type = "untyped"
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        self._name = name
+        self._help = help
+        self._label_names = tuple(label_names)
+
+    @property
+    def name(self):
+        return self._name
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self._name} {self._help}", f"# TYPE {self._name} {self._type}"]
+
+
+class Counter(Metric):
+    _type = "counter"
+    _values: Dict[LabelValues, float]
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        super().__init__(name, help, label_names)
+        self._values = {}
+
+    def inc(self, *label_values: str, amount: float = 1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def get(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for label_values, value in self._values.items():
+            lines.append(f"{self._name}{_format_labels(self._label_names, label_values)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(Metric):
+    _type = "histogram"
+    _buckets: Tuple[float, ...]
+    _counts: Dict[LabelValues, list[int]]  # per bucket, not cumulative, last entry is +Inf
+    _sums: Dict[LabelValues, float]
+
+    def __init__(
+        self, name: str, help: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, help, label_names)
+        self._buckets = tuple(sorted(buckets))
+        self._counts = {}
+        self._sums = {}
+
+    def observe(self, value: float, *label_values: str):
+        counts = self._counts.get(label_values)
+        if counts is None:
+            counts = [0] * (len(self._buckets) + 1)
+            self._counts[label_values] = counts
+            self._sums[label_values] = 0
+        counts[bisect_left(self._buckets, value)] += 1
+        self._sums[label_values] += value
+
+    def count(self, *label_values: str) -> int:
+        return sum(self._counts.get(label_values, ()))
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for label_values, counts in self._counts.items():
+            cumulative = 0
+            for upper_bound, count in zip((*self._buckets, "+Inf"), counts, strict=True):
+                cumulative += count
+                le = f'le="{upper_bound}"'
+                lines.append(f"{self._name}_bucket{_format_labels(self._label_names, label_values, le)} {cumulative}")
+            labels = _format_labels(self._label_names, label_values)
+            lines.append(f"{self._name}_sum{labels} {_format_value(self._sums[label_values])}")
+            lines.append(f"{self._name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    _metrics: Dict[str, Metric]
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register[M: Metric](self, metric: M) -> M:
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, label_names: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, label_names))
+
+    def histogram(
+        self, name: str, help: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, help, label_names, buckets))
+
+    def render(self) -> str:
+        # prometheus text exposition format 0.0.4
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+
+from logger import get_logger
+
+from .registry import MetricsRegistry
+
+logger = get_logger("metrics")
+
+
+class MetricsServer:
+    # minimal http listener for prometheus scrapes, runs on the media control event loop
+    _registry: MetricsRegistry
+    _host: str
+    _port: int
+    _server: asyncio.Server | None
+
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9478):
+        self._registry = registry
+        self._host = host
+        self._port = port
+        self._server = None
+
+    # === PROPERTIES ===
+    @property
+    def port(self):
+        return self._port
+
+    # === METHODS ===
+    def start(self, loop: asyncio.AbstractEventLoop):
+        if self._port > 0:
+            loop.create_task(self._serve())
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve(self):
+        try:
+            self._server = await asyncio.start_server(self._handle, self._host, self._port)
+        except OSError as e:
+            logger.error("could not start metrics server on %s:%s: %s", self._host, self._port, e)
+            return
+        logger.info("serving metrics on http://%s:%s/metrics", self._host, self._port)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 5)
+            # skip the headers
+            while (await asyncio.wait_for(reader.readline(), 5)) not in (b"\r\n", b"\n", b""):
+                pass
+
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] in ("/", "/metrics"):
+                status = "200 OK"
+                body = self._registry.render().encode()
+            else:
+                status = "404 Not Found"
+                body = b"not found\n"
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
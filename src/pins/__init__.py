@@ -1,11 +1,30 @@
 from typing import Union
 
+from .activation import Activation as Activation
+from .debounce import Debouncer as Debouncer
+from .events import PinEvent as PinEvent
+from .events import PinEventListener as PinEventListener
+from .fan_out import FanOutExecutor as FanOutExecutor
+from .fan_out import FanOutResult as FanOutResult
 from .input_pin import InputPin as InputPin
 from .output_pin import OutputPin as OutputPin
 from .output_pin import OutputTriggerMethods as OutputTriggerMethods
 from .pin import Pin as Pin
 from .pin import PinState as PinState
 from .pin import PinType as PinType
+from .pin import PressResult as PressResult
+from .pin import PressStatus as PressStatus
+from .pin import RetriggerPolicy as RetriggerPolicy
+from .pin_index import PinIndex as PinIndex
+from .rate_limit import TokenBucket as TokenBucket
+from .rate_limit import TriggerRateLimiter as TriggerRateLimiter
+from .remote_pin import NODE_SEPARATOR as NODE_SEPARATOR
+from .remote_pin import RemotePin as RemotePin
+from .remote_pin import is_remote_pin_id as is_remote_pin_id
+from .remote_pin import split_pin_id as split_pin_id
+from .scheduler import PendingAction as PendingAction
+from .scheduler import PinScheduler as PinScheduler
+from .scheduler import ScheduledAction as ScheduledAction
 from .virtual_pin import VirtualPin as VirtualPin
 from .virtual_pin import VirtualTriggerMethod as VirtualTriggerMethod
 
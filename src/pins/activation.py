@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ..media_control import TriggerContext
+    from .pin import Pin
+
+
+class Activation:
+    # handle of one trigger of a pin, from the activation delay until the pin is deactivated again
+    _pin: Pin
+    _trigger_context: TriggerContext
+    _task: asyncio.Task[None]
+    _commanded: asyncio.Future[None]  # the pin wrote its output or sent its command, or the activation ended
+
+    def __init__(self, pin: Pin, trigger_context: TriggerContext, task: asyncio.Task[None]):
+        self._pin = pin
+        self._trigger_context = trigger_context
+        self._task = task
+        self._commanded = task.get_loop().create_future()
+        task.add_done_callback(lambda _: self.mark_commanded())
+
+    # === PROPERTIES ===
+    @property
+    def pin(self):
+        return self._pin
+
+    @property
+    def trigger_context(self):
+        return self._trigger_context
+
+    @property
+    def task(self):
+        return self._task
+
+    @property
+    def is_done(self):
+        return self._task.done()
+
+    @property
+    def is_cancelled(self):
+        return self._task.cancelled()
+
+    @property
+    def is_commanded(self):
+        return self._commanded.done()
+
+    @property
+    def error(self) -> BaseException | None:
+        if not self._task.done() or self._task.cancelled():
+            return None
+        return self._task.exception()
+
+    # === METHODS ===
+    def cancel(self) -> bool:
+        # the pin is deactivated and its blocked pins are released before the activation ends
+        return self._task.cancel()
+
+    def mark_commanded(self):
+        # the rest of the activation only waits, e.g. for the end of a hold or the release of the input
+        if not self._commanded.done():
+            self._commanded.set_result(None)
+
+    async def wait_commanded(self):
+        # cancelling the waiter does not cancel the activation
+        await asyncio.wait((self._commanded,))
+
+    async def wait(self):
+        # errors of the activation are kept in error, only cancelling the waiter raises here
+        try:
+            await asyncio.wait((self._task,))
+        except asyncio.CancelledError:
+            # whoever waits for the activation owns it, e.g. the fan out of a cancelled input
+            self._task.cancel()
+            raise
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+
+class Debouncer:
+    # filters raw input samples, a level change is only accepted once it was stable long enough
+    _settle_time: float
+    _stable_samples: int
+    _min_press_time: float
+    _min_release_time: float
+    _level: bool
+    _candidate: bool | None
+    _candidate_since: float
+    _candidate_samples: int
+
+    def __init__(
+        self, settle_time: float = 0, stable_samples: int = 1, min_press_time: float = 0, min_release_time: float = 0
+    ):
+        self._settle_time = settle_time
+        self._stable_samples = stable_samples
+        self._min_press_time = min_press_time
+        self._min_release_time = min_release_time
+        self._level = False
+        self._candidate = None
+        self._candidate_since = 0
+        self._candidate_samples = 0
+
+    # === PROPERTIES ===
+    # --- Settle Time ---
+    @property
+    def settle_time(self):
+        return self._settle_time
+
+    @settle_time.setter
+    def settle_time(self, value: float):
+        self._settle_time = value
+
+    # --- Stable Samples ---
+    @property
+    def stable_samples(self):
+        return self._stable_samples
+
+    @stable_samples.setter
+    def stable_samples(self, value: int):
+        self._stable_samples = max(1, value)
+
+    # --- Min Press Time ---
+    @property
+    def min_press_time(self):
+        return self._min_press_time
+
+    @min_press_time.setter
+    def min_press_time(self, value: float):
+        self._min_press_time = value
+
+    # --- Min Release Time ---
+    @property
+    def min_release_time(self):
+        return self._min_release_time
+
+    @min_release_time.setter
+    def min_release_time(self, value: float):
+        self._min_release_time = value
+
+    # --- State ---
+    @property
+    def level(self):
+        # last accepted level
+        return self._level
+
+    @property
+    def is_pending(self):
+        return self._candidate is not None
+
+    # === METHODS ===
+    def required_time(self, level: bool) -> float:
+        return max(self._settle_time, self._min_press_time if level else self._min_release_time)
+
+    def feed(self, level: bool, now: float) -> bool | None:
+        # returns the new level once a change is accepted, now is a monotonic timestamp
+        if level == self._level:
+            # glitch, the line went back before the change was accepted
+            self._candidate = None
+            return None
+
+        if self._candidate != level:
+            self._candidate = level
+            self._candidate_since = now
+            self._candidate_samples = 0
+        self._candidate_samples += 1
+
+        if self._candidate_samples < self._stable_samples:
+            return None
+        if now - self._candidate_since < self.required_time(level):
+            return None
+
+        self._level = level
+        self._candidate = None
+        return level
+
+    def next_sample_time(self, now: float, sample_interval: float) -> float | None:
+        # when the pending change should be sampled again, None if nothing is pending
+        if self._candidate is None:
+            return None
+
+        deadline = self._candidate_since + self.required_time(self._candidate)
+        if self._candidate_samples >= self._stable_samples:
+            return max(deadline, now)
+
+        if self._settle_time > 0:
+            sample_interval = self._settle_time / self._stable_samples
+        return now + sample_interval
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from enum import IntEnum
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from .pin import Pin
+
+
+class PinEvent(IntEnum):
+    # values are stored in the event journal, only append new events
+    PRESS = 1
+    RELEASE = 2
+    TRIGGER = 3
+    BLOCKED_TRIGGER = 4
+    BLOCK = 5
+    UNBLOCK = 6
+    ACTIVATE = 7
+    DEACTIVATE = 8
+    NETWORK_ERROR = 9
+    RETRIGGER = 10
+    CANCEL = 11
+    DROPPED_TRIGGER = 12
+
+
+type PinEventListener = Callable[[Pin, PinEvent], None]
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, NamedTuple, Sequence, Union
+
+if TYPE_CHECKING:
+    from ..media_control import TriggerContext
+    from .output_pin import OutputPin
+    from .pin import PressStatus
+    from .remote_pin import RemotePin
+    from .virtual_pin import VirtualPin
+
+type TriggerablePins = Union[OutputPin, VirtualPin, RemotePin]
+
+
+class FanOutResult(NamedTuple):
+    pin_id: str
+    status: PressStatus  # "dropped" is not used, targets of a fan out are not rate limited
+    error: BaseException | None
+    wait_time: float  # seconds spent waiting for a free slot
+    command_time: float  # seconds until the pin wrote its output or sent its command
+    duration: float  # seconds the activation of the pin took
+
+    @property
+    def ok(self):
+        # a blocked target did not run, a retriggered one was taken by its running activation
+        return self.error is None and self.status != "blocked"
+
+
+class FanOutExecutor:
+    # triggers pins concurrently, gpio outputs and network pins have separate limits (0 = unlimited).
+    # a slot is held until the pin wrote its output or sent its command, not while a hold or a press lasts
+    _output_limit: int
+    _virtual_limit: int
+    _output_slots: asyncio.Semaphore | None
+    _virtual_slots: asyncio.Semaphore | None
+
+    def __init__(self, output_limit: int = 0, virtual_limit: int = 8):
+        self._output_limit = output_limit
+        self._virtual_limit = virtual_limit
+        self._output_slots = asyncio.Semaphore(output_limit) if output_limit > 0 else None
+        self._virtual_slots = asyncio.Semaphore(virtual_limit) if virtual_limit > 0 else None
+
+    # === PROPERTIES ===
+    @property
+    def output_limit(self):
+        return self._output_limit
+
+    @property
+    def virtual_limit(self):
+        return self._virtual_limit
+
+    # === METHODS ===
+    async def run(self, pins: Sequence[TriggerablePins], trigger_context: TriggerContext) -> list[FanOutResult]:
+        # pins are started in order, results are returned in the same order
+        return list(await asyncio.gather(*(self._run_pin(pin, trigger_context) for pin in pins)))
+
+    async def _run_pin(self, pin: TriggerablePins, trigger_context: TriggerContext) -> FanOutResult:
+        # virtual and remote pins wait for the network
+        slots = self._output_slots if pin.pin_type == "output" else self._virtual_slots
+        queued = time.monotonic()
+        if slots is not None:
+            await slots.acquire()
+        started = time.monotonic()
+        try:
+            activation = pin.start_trigger(trigger_context)
+            if activation is None:
+                status: PressStatus = "blocked" if pin.is_blocked else "retriggered"
+                return FanOutResult(pin.id, status, None, started - queued, 0, 0)
+            try:
+                await activation.wait_commanded()
+            except asyncio.CancelledError:
+                # the fan out of a cancelled input owns the activation
+                activation.cancel()
+                raise
+        finally:
+            if slots is not None:
+                slots.release()
+        commanded = time.monotonic()
+
+        # the pin logs errors of its activation itself
+        await activation.wait()
+        return FanOutResult(
+            pin.id, "started", activation.error, started - queued, commanded - started, time.monotonic() - started
+        )
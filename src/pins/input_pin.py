@@ -1,27 +1,42 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import datetime
 from typing import TYPE_CHECKING, Union
 
+from .debounce import Debouncer
+from .fan_out import FanOutExecutor, FanOutResult
 from .pin import Pin
 
 if TYPE_CHECKING:
     from ..media_control import TriggerContext
     from .output_pin import OutputPin
+    from .remote_pin import RemotePin
+    from .scheduler import PinScheduler
     from .virtual_pin import VirtualPin
 
-type TriggerablePins = Union[OutputPin, VirtualPin]
+type TriggerablePins = Union[OutputPin, VirtualPin, RemotePin]
 
 
 class InputPin(Pin):
     _triggered_pins: list[TriggerablePins]
     _activation_delay: float
-
-    def __init__(self, id: str, gpio_pin: int):
+    _fan_out: FanOutExecutor
+    _scheduler: PinScheduler
+    _wait_for_triggered_pins: bool
+    _fan_out_task: asyncio.Task[list[FanOutResult]] | None
+    _fan_out_results: list[FanOutResult]
+    _debouncer: Debouncer
+
+    def __init__(self, id: str, gpio_pin: int, fan_out: FanOutExecutor, scheduler: PinScheduler):
         super().__init__(id, gpio_pin, "input")
         self._triggered_pins = []
         self._activation_delay = 0
+        self._fan_out = fan_out
+        self._scheduler = scheduler
+        self._wait_for_triggered_pins = False
+        self._fan_out_task = None
+        self._fan_out_results = []
+        self._debouncer = Debouncer()
 
     # === PROPERTIES ===
     # --- Trigger Pins ---
@@ -35,6 +50,9 @@ class InputPin(Pin):
     def remove_triggered_pin(self, pin: TriggerablePins):
         self._triggered_pins.remove(pin)
 
+    def clear_triggered_pins(self):
+        self._triggered_pins.clear()
+
     # --- Trigger Delay ---
     @property
     def activation_delay(self):
@@ -44,18 +62,64 @@ class InputPin(Pin):
     def activation_delay(self, value: float):
         self._activation_delay = value
 
+    # --- Fan Out ---
+    @property
+    def wait_for_triggered_pins(self):
+        return self._wait_for_triggered_pins
+
+    @wait_for_triggered_pins.setter
+    def wait_for_triggered_pins(self, value: bool):
+        self._wait_for_triggered_pins = value
+
+    @property
+    def fan_out_task(self):
+        return self._fan_out_task
+
+    @property
+    def fan_out_results(self):
+        # results of the last finished fan out
+        return self._fan_out_results
+
+    # --- Scheduler ---
+    @property
+    def scheduler(self):
+        return self._scheduler
+
+    # --- Debounce ---
+    @property
+    def debouncer(self):
+        return self._debouncer
+
     # === METHODS ===
 
     async def on_trigger_start(self, trigger_context: TriggerContext) -> bool:
         if self.activation_delay > 0:
-            await asyncio.sleep(self.activation_delay)
+            # a cancelled delay stops the trigger
+            return not await self._scheduler.sleep(self.id, "activation_delay", self.activation_delay)
 
         return False
 
+    def on_release(self, trigger_context: TriggerContext):
+        # a release before the activation delay ran out cancels the trigger
+        self._scheduler.cancel(self.id, "activation_delay")
+
+    def extend_activation(self):
+        self._scheduler.reschedule_later(self.id, "activation_delay", self.activation_delay)
+
     async def after_activate(self, trigger_context: TriggerContext):
-        activate_time = datetime.timestamp(datetime.now())
-        context = (self, activate_time)
+        # keep the edge time, latencies of the triggered pins are measured from the input edge
+        context = (self, trigger_context[1])
+
+        if self._wait_for_triggered_pins:
+            self._fan_out_results = await self._fan_out.run(self.triggered_pins, context)
+            return
 
         loop = asyncio.get_event_loop()
-        for pin in self.triggered_pins:
-            loop.create_task(pin.trigger(context))
+        self._fan_out_task = loop.create_task(self._fan_out.run(self.triggered_pins, context))
+        self._fan_out_task.add_done_callback(self._on_fan_out_done)
+
+    def _on_fan_out_done(self, task: asyncio.Task[list[FanOutResult]]):
+        if task is self._fan_out_task:
+            self._fan_out_task = None
+        if not task.cancelled():
+            self._fan_out_results = task.result()
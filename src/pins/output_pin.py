@@ -1,27 +1,45 @@
 from __future__ import annotations
 
-import asyncio
+import time
 from typing import TYPE_CHECKING, Literal
 
 from .pin import Pin
 
 if TYPE_CHECKING:
-    from ..media_control import TriggerContext
+    from gpio import OutputBatch
 
-import RPi.GPIO as GPIO
+    from ..media_control import TriggerContext
+    from .activation import Activation
+    from .scheduler import PinScheduler
 
 # type OutputTriggerMethodName = Literal["pulse", "hold"]
 type OutputTriggerMethods = Literal["pulse", "hold", "while_input"]
 
+PULSE_TIME = 0.1
+
 
 class OutputPin(Pin):
     _trigger_method: OutputTriggerMethods
     _hold_time: float
-
-    def __init__(self, id: str, gpio_pin: int, trigger_type: OutputTriggerMethods = "pulse", hold_time: float = 5):
+    _outputs: OutputBatch
+    _scheduler: PinScheduler
+    _resume_deadline: float | None  # event loop time, the next pulse or hold ends then instead of after its time
+
+    def __init__(
+        self,
+        id: str,
+        gpio_pin: int,
+        outputs: OutputBatch,
+        scheduler: PinScheduler,
+        trigger_type: OutputTriggerMethods = "pulse",
+        hold_time: float = 5,
+    ):
         super().__init__(id, gpio_pin, "output")
+        self._outputs = outputs
+        self._scheduler = scheduler
         self._trigger_method = trigger_type
         self._hold_time = hold_time
+        self._resume_deadline = None
 
     # === PROPERTIES ===
     # --- Trigger Method Name ---
@@ -42,7 +60,29 @@ class OutputPin(Pin):
     def hold_time(self, value: float):
         self._hold_time = value
 
+    # --- Outputs ---
+    @property
+    def outputs(self):
+        return self._outputs
+
+    # --- Backend ---
+    @property
+    def backend(self):
+        return self._outputs.backend
+
+    # --- Scheduler ---
+    @property
+    def scheduler(self):
+        return self._scheduler
+
     # === METHODS ===
+    def resume_activation(self, deadline: float) -> Activation | None:
+        # continues the pulse or hold of a previous run of the service until the deadline, the output is already set
+        self._resume_deadline = deadline
+        activation = self.start_trigger((self, time.monotonic()))
+        if activation is None:
+            self._resume_deadline = None
+        return activation
 
     async def after_activate(self, trigger_context: TriggerContext):
         match self._trigger_method:
@@ -53,29 +93,41 @@ class OutputPin(Pin):
             case "while_input":
                 await self._trigger_while_input(trigger_context)
 
+    def extend_activation(self):
+        match self._trigger_method:
+            case "pulse":
+                self._scheduler.reschedule_later(self.id, "pulse", PULSE_TIME)
+            case "hold":
+                self._scheduler.reschedule_later(self.id, "hold", self.hold_time)
+
     async def before_deactivate(self):
-        GPIO.output(self._gpio_pin, GPIO.LOW)
+        self._outputs.write(self._gpio_pin, False)
 
     # --- Trigger Methods ---
 
     async def _trigger_pulse(self):
         # pulse all trigger pins
-        GPIO.output(self._gpio_pin, GPIO.HIGH)
-        await asyncio.sleep(0.1)
-        GPIO.output(self._gpio_pin, GPIO.LOW)
+        self._outputs.write(self._gpio_pin, True)
+        self.mark_commanded()
+        await self._scheduler.sleep(self.id, "pulse", self._take_duration(PULSE_TIME))
+        self._outputs.write(self._gpio_pin, False)
 
     async def _trigger_hold(self):
         # hold all trigger pins
-        GPIO.output(self._gpio_pin, GPIO.HIGH)
-        await asyncio.sleep(self.hold_time)
-        GPIO.output(self._gpio_pin, GPIO.LOW)
+        self._outputs.write(self._gpio_pin, True)
+        self.mark_commanded()
+        # ends early when the hold gets cancelled
+        await self._scheduler.sleep(self.id, "hold", self._take_duration(self.hold_time))
+        self._outputs.write(self._gpio_pin, False)
+
+    def _take_duration(self, duration: float) -> float:
+        deadline, self._resume_deadline = self._resume_deadline, None
+        if deadline is None:
+            return duration
+        return max(0, deadline - self._scheduler.time())
 
     async def _trigger_while_input(self, trigger_context: TriggerContext):
-        GPIO.output(self._gpio_pin, GPIO.HIGH)
-        while True:
-            if not trigger_context[0].is_triggered:
-                break
-
-            await asyncio.sleep(0.2)
-
-        GPIO.output(self._gpio_pin, GPIO.LOW)
+        self._outputs.write(self._gpio_pin, True)
+        self.mark_commanded()
+        await trigger_context[0].wait_for_release()
+        self._outputs.write(self._gpio_pin, False)
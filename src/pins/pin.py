@@ -1,14 +1,35 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Literal, final
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Literal, NamedTuple, final
+
+from logger import get_pin_logger
+from metrics import BLOCKED_TRIGGERS, TRIGGERS, observe_stage
+
+from .activation import Activation
+from .events import PinEvent
 
 if TYPE_CHECKING:
     from ..media_control import TriggerContext
+    from .events import PinEventListener
 
 type PinState = Literal["active", "inactive", "blocked"]
 
 
-type PinType = Literal["input", "output", "virtual"]
+type PinType = Literal["input", "output", "virtual", "remote"]
+
+# what a trigger does while the pin is still active:
+# ignore it, extend the running hold or delay, restart the activation or cancel it
+type RetriggerPolicy = Literal["ignore", "extend", "restart", "toggle"]
+
+# what became of a press: a new activation, taken by the running activation, or rejected
+type PressStatus = Literal["started", "retriggered", "blocked", "dropped"]
+
+
+class PressResult(NamedTuple):
+    status: PressStatus
+    activation: Activation | None  # the started activation
 
 
 class Pin:
@@ -18,6 +39,11 @@ class Pin:
     _display_name: str
     _state: PinState
     _is_triggered: bool
+    _release_event: asyncio.Event | None
+    _retrigger_policy: RetriggerPolicy
+    _activation: Activation | None
+    _logger: logging.Logger
+    _event_listeners: list[PinEventListener]
     _pins_to_block: list[Pin]
     _pins_to_unblock: list[Pin]
 
@@ -36,6 +62,11 @@ class Pin:
         self._display_name = id
         self._state = "inactive"
         self._is_triggered = False
+        self._release_event = None
+        self._retrigger_policy = "ignore"
+        self._activation = None
+        self._logger = get_pin_logger(pin_type)
+        self._event_listeners = []
         # if set to [] if none
         self._pins_to_block = pins_to_block if pins_to_block is not None else []
         self._pins_to_unblock = pins_to_unblock if pins_to_unblock is not None else []
@@ -66,7 +97,36 @@ class Pin:
 
     @is_triggered.setter
     def is_triggered(self, value: bool):
+        if value == self._is_triggered:
+            return
+        if value:
+            # every press gets its own release event
+            self._release_event = asyncio.Event()
+        elif self._release_event is not None:
+            self._release_event.set()
         self._is_triggered = value
+        self.emit_event(PinEvent.PRESS if value else PinEvent.RELEASE)
+
+    async def wait_for_release(self):
+        release_event = self._release_event
+        if not self._is_triggered or release_event is None:
+            return
+        await release_event.wait()
+
+    # --- Retrigger Policy ---
+    @property
+    def retrigger_policy(self):
+        return self._retrigger_policy
+
+    @retrigger_policy.setter
+    def retrigger_policy(self, value: RetriggerPolicy):
+        self._retrigger_policy = value
+
+    # --- Activation ---
+    @property
+    def activation(self):
+        # the running activation, None while the pin is idle
+        return self._activation
 
     # --- Is Blocked ---
     @property
@@ -108,7 +168,29 @@ class Pin:
     def remove_block_pin(self, pin: Pin):
         self._pins_to_block.remove(pin)
 
+    def clear_block_pins(self):
+        self._pins_to_block.clear()
+
+    def clear_unblock_pins(self):
+        self._pins_to_unblock.clear()
+
+    # --- Event Listeners ---
+    def add_event_listener(self, listener: PinEventListener):
+        self._event_listeners.append(listener)
+
+    def remove_event_listener(self, listener: PinEventListener):
+        self._event_listeners.remove(listener)
+
+    def emit_event(self, event: PinEvent):
+        for listener in self._event_listeners:
+            listener(self, event)
+
     # --- Methods ---
+    def log_event(self, event: str, message: str, *args: object, level: int = logging.INFO):
+        # only enqueues a record, formatting happens in the log listener
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, message, *args, extra={"pin_id": self.id, "event": event})
+
     def block_pins(self, pins: list[Pin]):
         for pin in pins:
             pin.block()
@@ -129,53 +211,146 @@ class Pin:
     async def before_deactivate(self):
         pass
 
-    @final
+    def on_release(self, trigger_context: TriggerContext):
+        pass
+
+    def extend_activation(self):
+        # restarts the timers of the running activation, pins without timers ignore the retrigger
+        pass
+
+    def mark_commanded(self):
+        # called by the pin once its output is written or its command is sent, the fan out frees its slot
+        if self._activation is not None:
+            self._activation.mark_commanded()
+
+    # not final, remote pins forward blocks to the node that owns the pin
     def block(self):
         self._state = "blocked"
+        self.emit_event(PinEvent.BLOCK)
 
-    @final
     def unblock(self):
         self._state = "inactive"
+        self.emit_event(PinEvent.UNBLOCK)
 
     @final
     async def activate(self, context: TriggerContext):
         self._state = "active"
 
-        [trigger_pin, timestamp] = context
-        print(f"Pin {self.id} activated. Triggered by {trigger_pin.id} at {timestamp}")
+        [trigger_pin, edge_time] = context
+        self.log_event("activate", "activated by %s", trigger_pin.id)
+        self.emit_event(PinEvent.ACTIVATE)
+        observe_stage(self.id, "activate_start", edge_time)
         await self.after_activate(context)
+        observe_stage(self.id, "activate_done", edge_time)
 
     @final
     async def deactivate(self):
-        print(f"Pin {self.id} deactivated")
+        self.log_event("deactivate", "deactivated")
         self._state = "inactive"
+        self.emit_event(PinEvent.DEACTIVATE)
 
         await self.before_deactivate()
 
     @final
     def untrigger(self, trigger_context: TriggerContext):
-        pass
+        # wakes everything waiting for the release of this press
+        self.is_triggered = False
+        self.on_release(trigger_context)
 
     @final
-    async def trigger(self, trigger_context: TriggerContext):
-        if self._state == "active" or self._state == "blocked":
-            return
+    def cancel_activation(self) -> bool:
+        activation = self._activation
+        if activation is None or activation.is_done:
+            return False
+        self.log_event("cancel", "activation cancelled")
+        self.emit_event(PinEvent.CANCEL)
+        return activation.cancel()
+
+    @final
+    def start_trigger(self, trigger_context: TriggerContext) -> Activation | None:
+        # starts the activation as its own task, None if the pin is blocked or the running activation took the trigger
+        if self._state == "blocked":
+            BLOCKED_TRIGGERS.inc(self.id)
+            self.emit_event(PinEvent.BLOCKED_TRIGGER)
+            return None
+
+        previous = self._activation
+        if previous is not None and not previous.is_done:
+            self.emit_event(PinEvent.RETRIGGER)
+            match self._retrigger_policy:
+                case "restart":
+                    self.cancel_activation()
+                case "extend":
+                    self.extend_activation()
+                    return None
+                case "toggle":
+                    self.cancel_activation()
+                    return None
+                case _:
+                    return None
+        else:
+            previous = None
+
+        task = asyncio.get_running_loop().create_task(self._run_trigger(trigger_context, previous))
+        activation = Activation(self, trigger_context, task)
+        self._activation = activation
+        task.add_done_callback(lambda _: self._on_activation_done(activation))
+        return activation
+
+    @final
+    def press(self, trigger_context: TriggerContext) -> PressResult:
+        # a press without a physical contact, e.g. of the control api. the pin stays triggered until it is released,
+        # a blocked press leaves it as it was, nobody releases a press that started nothing
+        was_triggered = self._is_triggered
+        self.is_triggered = True
+        activation = self.start_trigger(trigger_context)
+        if activation is not None:
+            return PressResult("started", activation)
+        if self.is_blocked:
+            self.is_triggered = was_triggered
+            return PressResult("blocked", None)
+        return PressResult("retriggered", None)
+
+    @final
+    async def trigger(self, trigger_context: TriggerContext) -> Activation | None:
+        activation = self.start_trigger(trigger_context)
+        if activation is not None:
+            await activation.wait()
+        return activation
+
+    def _on_activation_done(self, activation: Activation):
+        if self._activation is activation:
+            self._activation = None
+        if activation.error is not None:
+            self.log_event("error", "trigger failed: %r", activation.error, level=logging.ERROR)
+
+    async def _run_trigger(self, trigger_context: TriggerContext, previous: Activation | None):
+        if previous is not None:
+            # a restart waits until the cancelled activation cleaned up
+            await previous.wait()
+        TRIGGERS.inc(self.id)
+        self.emit_event(PinEvent.TRIGGER)
         # Pin got triggered
         stop = await self.on_trigger_start(trigger_context)
         if stop:
             return
+        observe_stage(self.id, "trigger_start", trigger_context[1])
 
         # Block pins that should be blocked
         self.block_pins(self.pins_to_block)
         # Unblock pins that should be unblocked
         self.unblock_pins(self.pins_to_unblock)
-        # Activate Pin functionality
-        await self.activate(trigger_context)
-        # Deactivate Pin functionality
-        await self.deactivate()
-        # Unblock pins that where blocked
-        self.unblock_pins(self.pins_to_block)
-        # Block pins that where unblocked
-        self.block_pins(self.pins_to_unblock)
-        # Pin trigger ended
-        await self.on_trigger_end(trigger_context)
+        try:
+            # Activate Pin functionality
+            await self.activate(trigger_context)
+        finally:
+            # a cancelled activation cleans up the same way
+            # Deactivate Pin functionality
+            await self.deactivate()
+            observe_stage(self.id, "deactivate", trigger_context[1])
+            # Unblock pins that where blocked
+            self.unblock_pins(self.pins_to_block)
+            # Block pins that where unblocked
+            self.block_pins(self.pins_to_unblock)
+            # Pin trigger ended
+            await self.on_trigger_end(trigger_context)
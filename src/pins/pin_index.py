@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Callable, Iterable, Mapping, Sequence, Tuple, Union
+
+from .input_pin import InputPin
+from .output_pin import OutputPin
+from .remote_pin import is_remote_pin_id
+from .virtual_pin import VirtualPin
+
+if TYPE_CHECKING:
+    from config import Config
+
+type PinUnion = Union[InputPin, OutputPin, VirtualPin]
+type Adjacency = Tuple[Tuple[int, ...], ...]
+type PinRelations = Tuple[Sequence[str], Sequence[str], Sequence[str]]  # (triggered, block, unblock) ids
+
+
+class PinIndex:
+    # frozen lookup tables for the registered pins, relations are stored as positions into `pins`
+    __slots__ = (
+        "pins",
+        "positions",
+        "by_id",
+        "by_gpio",
+        "inputs",
+        "outputs",
+        "virtuals",
+        "triggered",
+        "blocks",
+        "unblocks",
+    )
+
+    pins: Tuple[PinUnion, ...]
+    positions: Mapping[str, int]
+    by_id: Mapping[str, PinUnion]
+    by_gpio: Mapping[int, PinUnion]
+    inputs: Tuple[InputPin, ...]
+    outputs: Tuple[OutputPin, ...]
+    virtuals: Tuple[VirtualPin, ...]
+    triggered: Adjacency
+    blocks: Adjacency
+    unblocks: Adjacency
+
+    def __init__(self, pins: Iterable[PinUnion], relations: Callable[[PinUnion], PinRelations]):
+        self.pins = tuple(pins)
+        self.positions = MappingProxyType({pin.id: position for position, pin in enumerate(self.pins)})
+        self.by_id = MappingProxyType({pin.id: pin for pin in self.pins})
+        self.by_gpio = MappingProxyType({pin.gpio_pin: pin for pin in self.pins})
+        self.inputs = tuple(pin for pin in self.pins if isinstance(pin, InputPin))
+        self.outputs = tuple(pin for pin in self.pins if isinstance(pin, OutputPin))
+        self.virtuals = tuple(pin for pin in self.pins if isinstance(pin, VirtualPin))
+
+        triggered: list[Tuple[int, ...]] = []
+        blocks: list[Tuple[int, ...]] = []
+        unblocks: list[Tuple[int, ...]] = []
+        for pin in self.pins:
+            triggered_ids, block_ids, unblock_ids = relations(pin)
+            triggered.append(self._resolve(pin, "triggered pin", triggered_ids, (OutputPin, VirtualPin)))
+            blocks.append(self._resolve(pin, "pin to block", block_ids))
+            unblocks.append(self._resolve(pin, "pin to unblock", unblock_ids))
+
+        self.triggered = tuple(triggered)
+        self.blocks = tuple(blocks)
+        self.unblocks = tuple(unblocks)
+
+    def __setattr__(self, name: str, value: object):
+        if hasattr(self, "unblocks"):
+            raise AttributeError("PinIndex is frozen")
+        super().__setattr__(name, value)
+
+    @classmethod
+    def from_pins(cls, pins: Iterable[PinUnion]) -> PinIndex:
+        # relations as currently linked on the pins
+        def relations(pin: PinUnion) -> PinRelations:
+            triggered_ids = [p.id for p in pin.triggered_pins] if isinstance(pin, InputPin) else []
+            return (triggered_ids, [p.id for p in pin.pins_to_block], [p.id for p in pin.pins_to_unblock])
+
+        return cls(pins, relations)
+
+    @classmethod
+    def from_config(cls, pins: Mapping[str, PinUnion], config: Config) -> PinIndex:
+        # relations as given by the config, raises ValueError on unknown ids
+        pin_configs = {
+            pin_config["id"]: pin_config
+            for pin_config in config["InputPins"] + config["OutputPins"] + config["VirtualPins"]
+        }
+
+        def relations(pin: PinUnion) -> PinRelations:
+            pin_config = pin_configs.get(pin.id)
+            if pin_config is None:
+                return ([], [], [])
+            triggered_ids = pin_config.get("triggered_pins", [])
+            return (triggered_ids, pin_config["pins_to_block"], pin_config["pins_to_unblock"])  # type: ignore
+
+        return cls(pins.values(), relations)
+
+    def _resolve(
+        self,
+        pin: PinUnion,
+        relation: str,
+        pin_ids: Sequence[str],
+        pin_classes: Tuple[type, ...] = (InputPin, OutputPin, VirtualPin),
+    ) -> Tuple[int, ...]:
+        positions: list[int] = []
+        for pin_id in pin_ids:
+            if is_remote_pin_id(pin_id):
+                # pins of other nodes are not indexed, the cluster links them
+                continue
+            position = self.positions.get(pin_id)
+            if position is None:
+                raise ValueError(f"Pin {pin.id}: {relation} {pin_id} does not exist")
+            if not isinstance(self.pins[position], pin_classes):
+                raise ValueError(f"Pin {pin.id}: {relation} {pin_id} has the wrong pin type")
+            positions.append(position)
+        return tuple(positions)
+
+    # === METHODS ===
+    def pins_at(self, positions: Iterable[int]) -> list[PinUnion]:
+        return [self.pins[position] for position in positions]
+
+    def triggered_pins_of(self, pin_id: str) -> list[PinUnion]:
+        return self.pins_at(self.triggered[self.positions[pin_id]])
+
+    def blocked_pins_of(self, pin_id: str) -> list[PinUnion]:
+        return self.pins_at(self.blocks[self.positions[pin_id]])
+
+    def unblocked_pins_of(self, pin_id: str) -> list[PinUnion]:
+        return self.pins_at(self.unblocks[self.positions[pin_id]])
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import time
+from typing import Dict
+
+from metrics import DROPPED_TRIGGERS
+
+
+class TokenBucket:
+    _rate: float
+    _burst: float
+    _tokens: float
+    _last_update: float
+
+    def __init__(self, rate: float, burst: float):
+        self._rate = rate
+        self._burst = burst
+        self._tokens = burst
+        self._last_update = time.monotonic()
+
+    # === PROPERTIES ===
+    @property
+    def tokens(self):
+        return self._tokens
+
+    # === METHODS ===
+    def has_token(self, now: float) -> bool:
+        # a bucket created after now was taken starts full, not in debt
+        elapsed = max(0.0, now - self._last_update)
+        self._tokens = min(self._burst, self._tokens + elapsed * self._rate)
+        self._last_update = max(now, self._last_update)
+        return self._tokens >= 1
+
+    def take(self, now: float) -> bool:
+        if not self.has_token(now):
+            return False
+        self._tokens -= 1
+        return True
+
+
+class TriggerRateLimiter:
+    # token buckets per pin and for all pins together, a chattering input or a trigger storm is cut off early.
+    # only presses are counted: input edges, the control api and other nodes, not the pins a press triggers
+    _pin_rate: float
+    _pin_burst: float
+    _global_bucket: TokenBucket | None
+    _pin_buckets: Dict[str, TokenBucket]
+
+    def __init__(self, pin_rate: float = 0, pin_burst: float = 1, global_rate: float = 0, global_burst: float = 1):
+        self._pin_rate = pin_rate
+        self._pin_burst = max(1, pin_burst)
+        self._global_bucket = TokenBucket(global_rate, max(1, global_burst)) if global_rate > 0 else None
+        self._pin_buckets = {}
+
+    # === METHODS ===
+    def allow(self, pin_id: str) -> bool:
+        now = time.monotonic()
+        pin_bucket: TokenBucket | None = None
+        if self._pin_rate > 0:
+            pin_bucket = self._pin_buckets.get(pin_id)
+            if pin_bucket is None:
+                pin_bucket = TokenBucket(self._pin_rate, self._pin_burst)
+                self._pin_buckets[pin_id] = pin_bucket
+            if not pin_bucket.has_token(now):
+                DROPPED_TRIGGERS.inc(pin_id, "pin")
+                return False
+
+        # both buckets are checked first, a trigger dropped by one does not use up a token of the other
+        if self._global_bucket is not None:
+            if not self._global_bucket.take(now):
+                DROPPED_TRIGGERS.inc(pin_id, "global")
+                return False
+        if pin_bucket is not None:
+            pin_bucket.take(now)
+        return True
+
+    def forget(self, pin_id: str):
+        self._pin_buckets.pop(pin_id, None)
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Tuple
+
+from .pin import Pin
+
+if TYPE_CHECKING:
+    from cluster import ClusterNode
+
+    from ..media_control import TriggerContext
+
+# pins of other controllers are addressed as <node>:<pin id>, e.g. node2:O#17
+NODE_SEPARATOR = ":"
+
+
+def is_remote_pin_id(pin_id: str) -> bool:
+    return NODE_SEPARATOR in pin_id
+
+
+def split_pin_id(pin_id: str) -> Tuple[str, str]:
+    # (node, pin id on that node), the node is empty for local pins
+    node, _, local_id = pin_id.rpartition(NODE_SEPARATOR)
+    return node, local_id
+
+
+class RemotePin(Pin):
+    # stands in for a pin of another controller, triggers, releases and blocks are forwarded over the cluster.
+    # the blocked state mirrors the state replicated by the node that owns the pin
+    _node: str
+    _remote_id: str
+    _cluster: ClusterNode
+    _is_held: bool
+
+    def __init__(self, node: str, remote_id: str, cluster: ClusterNode):
+        super().__init__(f"{node}{NODE_SEPARATOR}{remote_id}", 0, "remote")
+        self._node = node
+        self._remote_id = remote_id
+        self._cluster = cluster
+        self._is_held = False
+
+    # === PROPERTIES ===
+    # --- Node ---
+    @property
+    def node(self):
+        return self._node
+
+    @property
+    def remote_id(self):
+        return self._remote_id
+
+    # --- Is Held ---
+    @property
+    def is_held(self):
+        # blocked by this controller, the block is sent again when the node restarts
+        return self._is_held
+
+    # === METHODS ===
+    def block(self):
+        self._is_held = True
+        super().block()
+        self._cluster.send(self._node, {"kind": "block", "pin": self._remote_id})
+
+    def unblock(self):
+        self._is_held = False
+        super().unblock()
+        self._cluster.send(self._node, {"kind": "unblock", "pin": self._remote_id})
+
+    def apply_remote_state(self, is_blocked: bool):
+        # state replicated by the owning node, not sent back
+        if is_blocked == self.is_blocked:
+            return
+        if is_blocked:
+            super().block()
+        else:
+            # the owner unblocked it after us, our block is not asserted again
+            self._is_held = False
+            super().unblock()
+
+    async def after_activate(self, trigger_context: TriggerContext):
+        reply = await self._cluster.request(self._node, {"kind": "trigger", "pin": self._remote_id})
+        self.mark_commanded()
+        if not reply.get("result", {}).get("started"):
+            return
+        try:
+            # while_input pins on the other node follow the input of this one
+            await trigger_context[0].wait_for_release()
+        finally:
+            self._cluster.send(self._node, {"kind": "release", "pin": self._remote_id})
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+from typing import Callable, Dict, NamedTuple
+
+type ScheduledCallback = Callable[[], None]
+
+
+class PendingAction(NamedTuple):
+    pin_id: str
+    name: str
+    deadline: float  # event loop time
+
+
+class ScheduledAction:
+    # handle of a timed action, the scheduler owns it until it fired or got cancelled
+    _pin_id: str
+    _name: str
+    _deadline: float
+    _callback: ScheduledCallback
+    _on_cancel: ScheduledCallback | None
+    _is_done: bool
+
+    def __init__(
+        self,
+        pin_id: str,
+        name: str,
+        deadline: float,
+        callback: ScheduledCallback,
+        on_cancel: ScheduledCallback | None = None,
+    ):
+        self._pin_id = pin_id
+        self._name = name
+        self._deadline = deadline
+        self._callback = callback
+        self._on_cancel = on_cancel
+        self._is_done = False
+
+    # === PROPERTIES ===
+    @property
+    def pin_id(self):
+        return self._pin_id
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def deadline(self):
+        return self._deadline
+
+    @property
+    def is_done(self):
+        return self._is_done
+
+
+class PinScheduler:
+    # all timed pin actions share one heap and one loop timer for the earliest deadline.
+    # rescheduled and cancelled actions stay in the heap until they come up and are skipped then
+    _loop: asyncio.AbstractEventLoop
+    _heap: list[tuple[float, int, ScheduledAction]]
+    _counter: itertools.count[int]
+    _actions: Dict[str, list[ScheduledAction]]
+    _timer: asyncio.TimerHandle | None
+    _timer_deadline: float | None
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._heap = []
+        self._counter = itertools.count()
+        self._actions = {}
+        self._timer = None
+        self._timer_deadline = None
+
+    # === PROPERTIES ===
+    @property
+    def loop(self):
+        return self._loop
+
+    @property
+    def next_deadline(self) -> float | None:
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    # === METHODS ===
+    def time(self):
+        return self._loop.time()
+
+    def call_at(
+        self,
+        pin_id: str,
+        name: str,
+        deadline: float,
+        callback: ScheduledCallback,
+        on_cancel: ScheduledCallback | None = None,
+    ) -> ScheduledAction:
+        action = ScheduledAction(pin_id, name, deadline, callback, on_cancel)
+        self._actions.setdefault(pin_id, []).append(action)
+        self._push(action)
+        return action
+
+    def call_later(
+        self,
+        pin_id: str,
+        name: str,
+        delay: float,
+        callback: ScheduledCallback,
+        on_cancel: ScheduledCallback | None = None,
+    ) -> ScheduledAction:
+        return self.call_at(pin_id, name, self._loop.time() + delay, callback, on_cancel)
+
+    async def sleep(self, pin_id: str, name: str, delay: float) -> bool:
+        # True once the deadline passed, False if the action got cancelled before
+        waiter: asyncio.Future[bool] = self._loop.create_future()
+
+        def wake(result: bool):
+            if not waiter.done():
+                waiter.set_result(result)
+
+        action = self.call_later(pin_id, name, delay, lambda: wake(True), lambda: wake(False))
+        try:
+            return await waiter
+        finally:
+            # the sleeping task itself got cancelled
+            self._cancel_action(action, notify=False)
+
+    def pending(self, pin_id: str | None = None) -> list[PendingAction]:
+        # exact view of what fires next, ordered by deadline
+        actions = self._actions.get(pin_id, []) if pin_id is not None else itertools.chain(*self._actions.values())
+        return sorted(
+            (PendingAction(action.pin_id, action.name, action.deadline) for action in actions),
+            key=lambda pending_action: pending_action.deadline,
+        )
+
+    def cancel(self, pin_id: str, name: str | None = None) -> int:
+        # cancels the pending actions of a pin, all of them or only those with the given name
+        cancelled = 0
+        for action in list(self._actions.get(pin_id, [])):
+            if name is None or action.name == name:
+                self._cancel_action(action)
+                cancelled += 1
+        return cancelled
+
+    def reschedule(self, pin_id: str, name: str, deadline: float) -> int:
+        # moves the pending actions with the given name to a new deadline, sleeping tasks keep sleeping
+        rescheduled = 0
+        for action in self._actions.get(pin_id, []):
+            if action.name == name:
+                action._deadline = deadline
+                self._push(action)
+                rescheduled += 1
+        return rescheduled
+
+    def reschedule_later(self, pin_id: str, name: str, delay: float) -> int:
+        return self.reschedule(pin_id, name, self._loop.time() + delay)
+
+    def close(self):
+        for pin_id in list(self._actions):
+            self.cancel(pin_id)
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+            self._timer_deadline = None
+
+    def _push(self, action: ScheduledAction):
+        heapq.heappush(self._heap, (action.deadline, next(self._counter), action))
+        if self._timer_deadline is None or action.deadline < self._timer_deadline:
+            self._arm(action.deadline)
+
+    def _arm(self, deadline: float):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = self._loop.call_at(deadline, self._run_due)
+        self._timer_deadline = deadline
+
+    def _drop_stale(self):
+        # heap entries of finished actions and the old deadlines of rescheduled ones
+        while self._heap:
+            deadline, _, action = self._heap[0]
+            if not action.is_done and deadline == action.deadline:
+                return
+            heapq.heappop(self._heap)
+
+    def _run_due(self):
+        # the loop may run a timer a clock resolution early
+        now = max(self._loop.time(), self._timer_deadline or 0)
+        self._timer = None
+        self._timer_deadline = None
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            _, _, action = heapq.heappop(self._heap)
+            self._finish(action)
+            try:
+                action._callback()
+            except Exception as e:
+                self._loop.call_exception_handler(
+                    {"message": f"scheduled action {action.name} of {action.pin_id} failed", "exception": e}
+                )
+
+        if self._heap:
+            self._arm(self._heap[0][0])
+
+    def _cancel_action(self, action: ScheduledAction, notify: bool = True):
+        if action.is_done:
+            return
+        self._finish(action)
+        if notify and action._on_cancel is not None:
+            action._on_cancel()
+
+    def _finish(self, action: ScheduledAction):
+        action._is_done = True
+        pin_actions = self._actions.get(action.pin_id)
+        if pin_actions is not None:
+            pin_actions.remove(action)
+            if not pin_actions:
+                del self._actions[action.pin_id]
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+import logging
 from typing import TYPE_CHECKING, Literal
 
-from aiopjlink import PJLink  # type: ignore
+from metrics import PJLINK_ERRORS
+from pjlink import CircuitOpenError
 
+from .events import PinEvent
 from .pin import Pin
 
 if TYPE_CHECKING:
+    from pjlink import DeviceStateCache, PJLinkPool
+
     from .output_pin import TriggerContext
 
 type VirtualTriggerMethod = Literal["pjlink_power_on", "pjlink_power_off", "nothing"]
@@ -16,12 +21,23 @@ class VirtualPin(Pin):
     _ip_address: str
     _virtual_trigger_method: VirtualTriggerMethod
     _password: str
-
-    def __init__(self, id: str, virtual_gpio_pin: int, password: str = ""):
+    _pjlink_pool: PJLinkPool
+    _device_states: DeviceStateCache
+
+    def __init__(
+        self,
+        id: str,
+        virtual_gpio_pin: int,
+        pjlink_pool: PJLinkPool,
+        device_states: DeviceStateCache,
+        password: str = "",
+    ):
         super().__init__(id, virtual_gpio_pin, "virtual")
         self._ip_address = ""
         self._virtual_trigger_method = "nothing"
         self._password = password
+        self._pjlink_pool = pjlink_pool
+        self._device_states = device_states
 
     # === PROPERTIES ===
     # --- Pin Address ---
@@ -51,6 +67,21 @@ class VirtualPin(Pin):
     def password(self, value: str):
         self._password = value
 
+    # --- PJLink Pool ---
+    @property
+    def pjlink_pool(self):
+        return self._pjlink_pool
+
+    # --- Device State ---
+    @property
+    def device_states(self):
+        return self._device_states
+
+    @property
+    def power_state(self):
+        # cached power state of the device, None if unknown
+        return self._device_states.get(self._ip_address)
+
     # === METHODS ===
 
     def set_pin_address(self, pin_address: str):
@@ -67,14 +98,26 @@ class VirtualPin(Pin):
 
                 case "pjlink_power_off":
                     await self._trigger_pjlink_power_off(trigger_context)
+        except CircuitOpenError as e:
+            # the device did not answer the last commands, do not hold up the trigger
+            PJLINK_ERRORS.inc(self.id)
+            self.emit_event(PinEvent.NETWORK_ERROR)
+            self.log_event("network_error", "%s skipped: %s", self._virtual_trigger_method, e, level=logging.WARNING)
         except Exception as e:
-            print(e)
+            PJLINK_ERRORS.inc(self.id)
+            self.emit_event(PinEvent.NETWORK_ERROR)
+            self.log_event("network_error", "%s failed: %r", self._virtual_trigger_method, e, level=logging.ERROR)
 
     # --- Trigger Methods ---
     async def _trigger_pjlink_power_on(self, trigger_context: TriggerContext):
-        async with PJLink(address=self.ip_address, password=self.password) as link:  # type: ignore
-            await link.power.turn_on()
+        # projectors answer an "on" while warming up with an error or a long stall
+        if self.power_state in ("on", "warming"):
+            return
+        await self._pjlink_pool.run(self.ip_address, self.password, lambda link: link.power.turn_on())
+        self._device_states.set(self.ip_address, "warming")
 
     async def _trigger_pjlink_power_off(self, trigger_context: TriggerContext):
-        async with PJLink(address=self.ip_address, password=self.password) as link:  # type: ignore
-            await link.power.turn_off()
+        if self.power_state in ("off", "cooling"):
+            return
+        await self._pjlink_pool.run(self.ip_address, self.password, lambda link: link.power.turn_off())
+        self._device_states.set(self.ip_address, "cooling")
@@ -0,0 +1,10 @@
+from .pool import PJLinkPool as PJLinkPool
+from .pool import PJLinkSession as PJLinkSession
+from .pool import load_protocol as load_protocol
+from .resilience import CircuitBreaker as CircuitBreaker
+from .resilience import CircuitOpenError as CircuitOpenError
+from .resilience import RetryPolicy as RetryPolicy
+from .state_cache import DeviceState as DeviceState
+from .state_cache import DeviceStateCache as DeviceStateCache
+from .state_cache import PowerState as PowerState
+from .status_poller import PJLinkStatusPoller as PJLinkStatusPoller
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from functools import cache
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Tuple
+
+from logger import get_logger
+from metrics import PJLINK_CIRCUIT_OPEN, PJLINK_RETRIES
+
+from .resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+
+if TYPE_CHECKING:
+    from aiopjlink import PJLink  # type: ignore
+
+type SessionKey = Tuple[str, str]  # (ip_address, password)
+type PJLinkCommand[T] = Callable[[PJLink], Awaitable[T]]
+
+logger = get_logger("pjlink")
+
+
+@cache
+def load_protocol():
+    # aiopjlink is only imported once a projector is actually used, it is not needed for a gpio only setup
+    import aiopjlink  # type: ignore
+
+    return aiopjlink
+
+
+@cache
+def stale_connection_errors() -> Tuple[type[BaseException], ...]:
+    # errors that mean a warm connection went stale and is worth a reconnect
+    aiopjlink = load_protocol()
+    return (aiopjlink.PJLinkConnectionClosed, aiopjlink.PJLinkNoConnection, ConnectionError, asyncio.TimeoutError)
+
+
+@cache
+def network_errors() -> Tuple[type[BaseException], ...]:
+    # errors worth a retry, protocol errors of a reachable projector are not
+    return (*stale_connection_errors(), OSError)
+
+
+class PJLinkSession:
+    _key: SessionKey
+    _link: PJLink | None
+    _lock: asyncio.Lock
+    _last_used: float
+
+    def __init__(self, key: SessionKey):
+        self._key = key
+        self._link = None
+        self._lock = asyncio.Lock()
+        self._last_used = time.monotonic()
+
+    # === PROPERTIES ===
+    @property
+    def key(self):
+        return self._key
+
+    @property
+    def is_connected(self):
+        return self._link is not None
+
+    @property
+    def is_busy(self):
+        return self._lock.locked()
+
+    @property
+    def idle_time(self):
+        return time.monotonic() - self._last_used
+
+    # === METHODS ===
+    async def run[T](self, command: PJLinkCommand[T], timeout: float = 0) -> T:
+        # commands for the same projector are serialized by the session lock. the timeout starts once the lock is
+        # held, waiting behind the commands of a fan out is not a failure of the device
+        async with self._lock:
+            async with asyncio.timeout(timeout if timeout > 0 else None):
+                return await self._run_locked(command)
+
+    async def _run_locked[T](self, command: PJLinkCommand[T]) -> T:
+        self._last_used = time.monotonic()
+        was_connected = self.is_connected
+        link = await self._connect()
+        try:
+            return await command(link)
+        except stale_connection_errors():
+            await self._disconnect()
+            if not was_connected:
+                raise
+        except asyncio.CancelledError:
+            # timed out in the middle of a command, the connection is in an unknown state
+            await self._disconnect()
+            raise
+
+        # the warm connection was closed by the projector, reconnect once
+        link = await self._connect()
+        try:
+            return await command(link)
+        except (*stale_connection_errors(), asyncio.CancelledError):
+            await self._disconnect()
+            raise
+
+    async def keepalive(self):
+        if not self.is_connected or self.is_busy:
+            return
+
+        async with self._lock:
+            if self._link is None:
+                return
+            try:
+                await self._link.power.get()
+            except Exception:
+                # reconnect lazily with the next command
+                await self._disconnect()
+
+    async def close(self):
+        async with self._lock:
+            await self._disconnect()
+
+    async def _connect(self) -> PJLink:
+        if self._link is None:
+            ip_address, password = self._key
+            link = load_protocol().PJLink(address=ip_address, password=password)
+            await link.__aenter__()
+            self._link = link
+        return self._link
+
+    async def _disconnect(self):
+        link = self._link
+        self._link = None
+        if link is None:
+            return
+        try:
+            await link.__aexit__(None, None, None)
+        except Exception:
+            pass
+
+
+class PJLinkPool:
+    _sessions: Dict[SessionKey, PJLinkSession]
+    _keepalive_interval: float
+    _idle_timeout: float
+    _timeout: float
+    _retry_policy: RetryPolicy
+    _failure_threshold: int
+    _probe_interval: float
+    _breakers: Dict[str, CircuitBreaker]
+    _probes: Dict[str, asyncio.Task[None]]
+    _maintenance_task: asyncio.Task[None] | None
+
+    def __init__(
+        self,
+        keepalive_interval: float = 20,
+        idle_timeout: float = 3600,
+        timeout: float = 5,
+        retry_policy: RetryPolicy | None = None,
+        failure_threshold: int = 3,
+        probe_interval: float = 30,
+    ):
+        self._sessions = {}
+        self._keepalive_interval = keepalive_interval
+        self._idle_timeout = idle_timeout
+        self._timeout = timeout
+        self._retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self._failure_threshold = failure_threshold
+        self._probe_interval = probe_interval
+        self._breakers = {}
+        self._probes = {}
+        self._maintenance_task = None
+
+    # === PROPERTIES ===
+    @property
+    def sessions(self):
+        return self._sessions
+
+    @property
+    def breakers(self):
+        return self._breakers
+
+    # === METHODS ===
+    def session(self, ip_address: str, password: str) -> PJLinkSession:
+        key = (ip_address, password)
+        session = self._sessions.get(key)
+        if session is None:
+            session = PJLinkSession(key)
+            self._sessions[key] = session
+
+        if self._maintenance_task is None and self._keepalive_interval > 0:
+            self._maintenance_task = asyncio.get_running_loop().create_task(self._maintain())
+
+        return session
+
+    def breaker(self, ip_address: str) -> CircuitBreaker:
+        breaker = self._breakers.get(ip_address)
+        if breaker is None:
+            breaker = CircuitBreaker(self._failure_threshold, self._probe_interval)
+            self._breakers[ip_address] = breaker
+        return breaker
+
+    async def run[T](self, ip_address: str, password: str, command: PJLinkCommand[T], attempts: int | None = None) -> T:
+        # fails fast while the device is known to be unreachable, network errors are retried with backoff
+        breaker = self.breaker(ip_address)
+        if breaker.is_open:
+            raise CircuitOpenError(ip_address, breaker.retry_in)
+
+        session = self.session(ip_address, password)
+        attempts = max(1, attempts if attempts is not None else self._retry_policy.attempts)
+        attempt = 0
+        while True:
+            try:
+                result = await session.run(command, self._timeout)
+            except network_errors():
+                attempt += 1
+                # another command may have opened the circuit meanwhile
+                if attempt < attempts and not breaker.is_open:
+                    PJLINK_RETRIES.inc(ip_address)
+                    await asyncio.sleep(self._retry_policy.delay(attempt - 1))
+                    continue
+                # one failure per command that used up its retries, a short outage must not open the circuit
+                if breaker.record_failure():
+                    self._open_circuit(ip_address, password)
+                raise
+            else:
+                breaker.record_success()
+                return result
+
+    def _open_circuit(self, ip_address: str, password: str):
+        PJLINK_CIRCUIT_OPEN.inc(ip_address)
+        logger.warning("%s is unreachable, commands fail fast until it answers again", ip_address)
+        if ip_address not in self._probes:
+            probe = asyncio.get_running_loop().create_task(self._probe(ip_address, password))
+            self._probes[ip_address] = probe
+            probe.add_done_callback(lambda _: self._probes.pop(ip_address, None))
+
+    async def _probe(self, ip_address: str, password: str):
+        breaker = self.breaker(ip_address)
+        while breaker.is_open:
+            await asyncio.sleep(breaker.retry_in)
+            try:
+                await self.session(ip_address, password).run(lambda link: link.power.get(), self._timeout)
+            except Exception:
+                breaker.record_failure()
+                continue
+            breaker.record_success()
+            logger.info("%s is reachable again", ip_address)
+
+    async def close(self):
+        if self._maintenance_task is not None:
+            self._maintenance_task.cancel()
+            self._maintenance_task = None
+        for probe in list(self._probes.values()):
+            probe.cancel()
+
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        await asyncio.gather(*(session.close() for session in sessions))
+
+    async def _maintain(self):
+        while True:
+            await asyncio.sleep(self._keepalive_interval)
+
+            for key, session in list(self._sessions.items()):
+                if self._idle_timeout > 0 and session.idle_time > self._idle_timeout and not session.is_busy:
+                    del self._sessions[key]
+                    await session.close()
+
+            # projectors drop connections that stay silent for too long
+            await asyncio.gather(*(session.keepalive() for session in self._sessions.values()))
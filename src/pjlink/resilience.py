@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import random
+import time
+from typing import Literal, NamedTuple
+
+type CircuitState = Literal["closed", "open"]
+
+
+class CircuitOpenError(Exception):
+    # raised instead of waiting for a device that is known to be unreachable
+    def __init__(self, address: str, retry_in: float):
+        super().__init__(f"{address} is unreachable, next probe in {retry_in:.1f}s")
+        self.address = address
+        self.retry_in = retry_in
+
+
+class RetryPolicy(NamedTuple):
+    attempts: int = 3  # tries of one command, 1 disables retries
+    base_delay: float = 0.5
+    max_delay: float = 5
+
+    def delay(self, attempt: int) -> float:
+        # full jitter, retries of several devices that failed together do not run in lockstep
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+class CircuitBreaker:
+    # opens after a number of consecutive failed commands, each counted once after its retries. the pool probes the
+    # device until it answers again
+    _failure_threshold: int
+    _probe_interval: float
+    _failures: int
+    _state: CircuitState
+    _opened_at: float
+
+    def __init__(self, failure_threshold: int = 3, probe_interval: float = 30):
+        self._failure_threshold = failure_threshold
+        self._probe_interval = probe_interval
+        self._failures = 0
+        self._state = "closed"
+        self._opened_at = 0
+
+    # === PROPERTIES ===
+    @property
+    def state(self):
+        return self._state
+
+    @property
+    def is_open(self):
+        return self._state == "open"
+
+    @property
+    def failures(self):
+        return self._failures
+
+    @property
+    def probe_interval(self):
+        return self._probe_interval
+
+    @property
+    def retry_in(self):
+        # seconds until the next background probe is due
+        if not self.is_open:
+            return 0
+        return max(0, self._opened_at + self._probe_interval - time.monotonic())
+
+    # === METHODS ===
+    def record_success(self):
+        self._failures = 0
+        self._state = "closed"
+
+    def record_failure(self) -> bool:
+        # True if this failure opened the circuit
+        self._failures += 1
+        if self._failure_threshold <= 0:
+            return False
+        self._opened_at = time.monotonic()
+        if self._state == "closed" and self._failures >= self._failure_threshold:
+            self._state = "open"
+            return True
+        return False
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import time
+from typing import Callable, Dict, Literal, Mapping, NamedTuple
+
+type PowerState = Literal["off", "on", "cooling", "warming"]
+
+# PJLink POWR response values
+PJLINK_POWER_STATES: Dict[str, PowerState] = {"0": "off", "1": "on", "2": "cooling", "3": "warming"}
+
+
+class DeviceState(NamedTuple):
+    power: PowerState
+    updated: float  # monotonic timestamp
+
+
+class DeviceStateCache:
+    # last known power state per device address, entries older than ttl are treated as unknown
+    _ttl: float
+    _states: Dict[str, DeviceState]
+    _on_change: Callable[[], None] | None
+
+    def __init__(self, ttl: float = 10):
+        self._ttl = ttl
+        self._states = {}
+        self._on_change = None
+
+    # === PROPERTIES ===
+    @property
+    def ttl(self):
+        return self._ttl
+
+    @ttl.setter
+    def ttl(self, value: float):
+        self._ttl = value
+
+    @property
+    def on_change(self):
+        return self._on_change
+
+    @on_change.setter
+    def on_change(self, value: Callable[[], None] | None):
+        self._on_change = value
+
+    @property
+    def states(self):
+        # fresh entries only
+        now = time.monotonic()
+        return {address: state for address, state in self._states.items() if now - state.updated <= self._ttl}
+
+    # === METHODS ===
+    def get(self, address: str) -> PowerState | None:
+        state = self._states.get(address)
+        if state is None or time.monotonic() - state.updated > self._ttl:
+            return None
+        return state.power
+
+    def set(self, address: str, power: PowerState):
+        self._states[address] = DeviceState(power, time.monotonic())
+        self._changed()
+
+    def invalidate(self, address: str):
+        if self._states.pop(address, None) is not None:
+            self._changed()
+
+    def restore(self, states: Mapping[str, DeviceState]):
+        # states of a previous run, they keep their update time and age out as if the service never stopped
+        self._states.update(states)
+
+    def _changed(self):
+        if self._on_change is not None:
+            self._on_change()
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Dict
+
+from .state_cache import PJLINK_POWER_STATES
+
+if TYPE_CHECKING:
+    from .pool import PJLinkPool
+    from .state_cache import DeviceStateCache
+
+
+class PJLinkStatusPoller:
+    # keeps the device state cache fresh by querying the power state of all watched devices
+    _pool: PJLinkPool
+    _cache: DeviceStateCache
+    _interval: float
+    _devices: Dict[str, str]  # address -> password
+    _task: asyncio.Task[None] | None
+
+    def __init__(self, pool: PJLinkPool, cache: DeviceStateCache, interval: float):
+        self._pool = pool
+        self._cache = cache
+        self._interval = interval
+        self._devices = {}
+        self._task = None
+
+    # === PROPERTIES ===
+    @property
+    def devices(self):
+        return self._devices
+
+    @property
+    def is_running(self):
+        return self._task is not None
+
+    # === METHODS ===
+    def watch(self, address: str, password: str):
+        self._devices[address] = password
+
+    def unwatch(self, address: str):
+        self._devices.pop(address, None)
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        if self._task is None and self._interval > 0:
+            self._task = loop.create_task(self._poll())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def poll_device(self, address: str, password: str):
+        try:
+            # no retries, the next poll comes soon enough
+            power = await self._pool.run(address, password, lambda link: link.power.get(), attempts=1)
+        except Exception:
+            self._cache.invalidate(address)
+            return
+        self._cache.set(address, PJLINK_POWER_STATES[power.value])
+
+    async def _poll(self):
+        while True:
+            await asyncio.gather(*(self.poll_device(address, password) for address, password in self._devices.items()))
+            await asyncio.sleep(self._interval)
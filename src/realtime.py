@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import asyncio
+import ctypes
+import ctypes.util
+import gc
+import os
+import resource
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Sequence
+
+from logger import get_logger
+from metrics import LOOP_LAG
+
+if TYPE_CHECKING:
+    from config import Project
+
+logger = get_logger("realtime")
+
+# fewer young collections, objects that survive the startup are frozen and never scanned again
+GC_THRESHOLDS = (10_000, 50, 100)
+
+# mlockall flags from <sys/mman.h>
+MCL_CURRENT = 1
+MCL_FUTURE = 2
+
+
+# === EVENT LOOP ===
+def create_event_loop(use_uvloop: bool = False) -> asyncio.AbstractEventLoop:
+    if use_uvloop:
+        try:
+            import uvloop  # type: ignore
+
+            return uvloop.new_event_loop()
+        except ImportError:
+            logger.info("uvloop is not installed, using the asyncio event loop")
+    return asyncio.new_event_loop()
+
+
+# === PROCESS ===
+def enter_realtime(project: Project, loop: asyncio.AbstractEventLoop):
+    # every step is best effort, the service keeps running without the permissions for it
+    tune_gc()
+    if project["realtime_cpus"]:
+        set_cpu_affinity(project["realtime_cpus"])
+    if project["realtime_lock_memory"]:
+        lock_memory()
+    if project["realtime_priority"] > 0:
+        loop.set_default_executor(create_executor())
+        set_fifo_priority(project["realtime_priority"])
+
+
+def tune_gc():
+    gc.collect()
+    gc.freeze()
+    gc.set_threshold(*GC_THRESHOLDS)
+    logger.info("garbage collector tuned, %s objects frozen", gc.get_freeze_count())
+
+
+def set_cpu_affinity(cpus: Sequence[int]):
+    try:
+        os.sched_setaffinity(0, cpus)
+        logger.info("pinned to cpus %s", sorted(os.sched_getaffinity(0)))
+    except (OSError, ValueError) as e:
+        logger.warning("could not pin to cpus %s: %s", list(cpus), e)
+
+
+def lock_memory():
+    # page faults of swapped or evicted pages would stall the loop, MCL_FUTURE is only safe without a memlock limit
+    soft_limit, _ = resource.getrlimit(resource.RLIMIT_MEMLOCK)
+    if soft_limit != resource.RLIM_INFINITY:
+        logger.warning("memory not locked, LimitMEMLOCK=infinity is needed for realtime mode")
+        return
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    if libc.mlockall(MCL_CURRENT | MCL_FUTURE) != 0:
+        logger.warning("could not lock memory: %s", os.strerror(ctypes.get_errno()))
+        return
+    logger.info("memory locked")
+
+
+def set_fifo_priority(priority: int):
+    # only the calling thread, the loop thread, is scheduled SCHED_FIFO. the log listener stays a normal thread
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+        logger.info("scheduled SCHED_FIFO with priority %s", priority)
+    except (OSError, AttributeError) as e:
+        logger.warning("could not switch to SCHED_FIFO, LimitRTPRIO is needed for realtime mode: %s", e)
+
+
+def create_executor() -> ThreadPoolExecutor:
+    # threads inherit the policy of the thread that starts them, the executor threads are started by the loop thread
+    # on demand. blocking work like dns lookups must not run SCHED_FIFO next to the loop
+    return ThreadPoolExecutor(thread_name_prefix="dptmc-executor", initializer=reset_thread_scheduler)
+
+
+def reset_thread_scheduler():
+    try:
+        if os.sched_getscheduler(0) != os.SCHED_OTHER:
+            os.sched_setscheduler(0, os.SCHED_OTHER, os.sched_param(0))
+    except (OSError, AttributeError) as e:
+        logger.warning("could not reset an executor thread to SCHED_OTHER: %s", e)
+
+
+# === SYSTEMD ===
+def notify_systemd(state: str) -> bool:
+    # sd_notify without libsystemd, does nothing when not started by a Type=notify unit
+    address = os.environ.get("NOTIFY_SOCKET")
+    if not address:
+        return False
+    if address.startswith("@"):
+        address = "\0" + address[1:]
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as notify_socket:
+            notify_socket.sendto(state.encode(), address)
+    except OSError as e:
+        logger.debug("could not notify systemd: %s", e)
+        return False
+    return True
+
+
+def systemd_watchdog_interval() -> float:
+    # seconds between watchdog pings that systemd expects, 0 without WatchdogSec
+    watchdog_usec = os.environ.get("WATCHDOG_USEC")
+    if not watchdog_usec or os.environ.get("WATCHDOG_PID", str(os.getpid())) != str(os.getpid()):
+        return 0
+    return int(watchdog_usec) / 1_000_000
+
+
+# === WATCHDOG ===
+class LoopWatchdog:
+    # wakes up every interval and measures how late it was woken, the lag every other callback waits as well.
+    # pings the systemd watchdog, a stalled loop stops the pings and systemd restarts the service
+    _interval: float
+    _lag_warning: float
+    _systemd_interval: float
+    _last_ping: float
+    _max_lag: float
+    _task: asyncio.Task[None] | None
+
+    def __init__(self, interval: float = 0.1, lag_warning: float = 0.05):
+        self._interval = interval
+        self._lag_warning = lag_warning
+        self._systemd_interval = systemd_watchdog_interval()
+        self._last_ping = 0
+        self._max_lag = 0
+        self._task = None
+
+    # === PROPERTIES ===
+    @property
+    def interval(self):
+        return self._interval
+
+    @property
+    def max_lag(self):
+        # largest lag since the start
+        return self._max_lag
+
+    # === METHODS ===
+    def start(self, loop: asyncio.AbstractEventLoop):
+        if self._interval > 0 or self._systemd_interval > 0:
+            self._task = loop.create_task(self._watch())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _watch(self):
+        loop = asyncio.get_running_loop()
+        # without lag measurement the loop is only woken for the systemd pings
+        interval = self._interval if self._interval > 0 else self._systemd_interval / 2
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            lag = max(0, loop.time() - expected)
+            if self._interval > 0:
+                self._observe(lag)
+            self._ping()
+
+    def _observe(self, lag: float):
+        LOOP_LAG.observe(lag)
+        self._max_lag = max(self._max_lag, lag)
+        if self._lag_warning > 0 and lag >= self._lag_warning:
+            logger.warning("event loop lagged %.1f ms behind", lag * 1000)
+
+    def _ping(self):
+        if self._systemd_interval <= 0:
+            return
+        now = time.monotonic()
+        if now - self._last_ping >= self._systemd_interval / 2:
+            self._last_ping = now
+            notify_systemd("WATCHDOG=1")
@@ -0,0 +1,7 @@
+from .scene import PreemptPolicy as PreemptPolicy
+from .scene import Scene as Scene
+from .scene import SceneStep as SceneStep
+from .scene import SceneStepAction as SceneStepAction
+from .scene import compile_scene as compile_scene
+from .sequencer import SceneRun as SceneRun
+from .sequencer import SceneSequencer as SceneSequencer
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Literal, NamedTuple
+
+if TYPE_CHECKING:
+    from config import SceneConfig
+    from pins import Activation, OutputPin, PinIndex, VirtualPin
+
+type SceneStepAction = Literal["trigger", "press", "release", "cancel"]
+type PreemptPolicy = Literal["abort", "pause"]
+
+
+class SceneStep(NamedTuple):
+    pin: OutputPin | VirtualPin
+    action: SceneStepAction
+    delay: float  # seconds after the previous step was started, 0 runs it together with the previous step
+    wait: bool  # the next steps wait until the activation of this step finished
+
+    def execute(self) -> Activation | None:
+        match self.action:
+            case "trigger":
+                return self.pin.start_trigger((self.pin, time.monotonic()))
+            case "press":
+                # like a press of the control api, a blocked pin is left released
+                return self.pin.press((self.pin, time.monotonic())).activation
+            case "release":
+                self.pin.untrigger((self.pin, time.monotonic()))
+            case "cancel":
+                self.pin.cancel_activation()
+        return None
+
+
+class Scene(NamedTuple):
+    id: str
+    display_name: str
+    group: str  # starting a scene preempts the running scenes of its group, "" runs it alongside all others
+    on_preempt: PreemptPolicy
+    steps: tuple[SceneStep, ...]
+
+    @property
+    def duration(self):
+        # planned time until the last step starts, waits for activations not included
+        return sum(step.delay for step in self.steps)
+
+
+def compile_scene(scene_config: SceneConfig, pin_index: PinIndex) -> Scene:
+    # resolves the step pins once at load, unknown pins and input pins raise a ValueError
+    steps: list[SceneStep] = []
+    for step_config in scene_config["steps"]:
+        pin = pin_index.by_id.get(step_config["pin"])
+        if pin is None:
+            raise ValueError(f"scene {scene_config['id']} references unknown pin {step_config['pin']}")
+        if pin.pin_type == "input":
+            raise ValueError(f"scene {scene_config['id']} can not trigger input pin {pin.id}")
+        if step_config["action"] not in ("trigger", "press", "release", "cancel"):
+            raise ValueError(f"scene {scene_config['id']} has an unknown step action {step_config['action']}")
+        steps.append(SceneStep(pin, step_config["action"], step_config["delay"], step_config["wait"]))  # type: ignore
+
+    return Scene(
+        scene_config["id"],
+        scene_config["display_name"] or scene_config["id"],
+        scene_config["group"],
+        scene_config["on_preempt"],
+        tuple(steps),
+    )
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, Dict
+
+from logger import get_logger
+
+if TYPE_CHECKING:
+    from pins import Activation, OutputPin, PinScheduler, VirtualPin
+
+    from .scene import Scene
+
+logger = get_logger("scenes")
+
+
+class SceneRun:
+    # progress of one scene, kept while the scene runs or is paused
+    _scene: Scene
+    _task: asyncio.Task[None] | None
+    _next_step: int
+    _deadline: float | None  # loop time the next step is due, None while no step is pending
+    _remaining: float | None  # delay left of the next step when the run was paused
+    _waiting_for: Activation | None
+    _activations: list[Activation]
+    _pressed_pins: list[OutputPin | VirtualPin]  # pressed by a press step and not released by a release step yet
+
+    def __init__(self, scene: Scene):
+        self._scene = scene
+        self._task = None
+        self._next_step = 0
+        self._deadline = None
+        self._remaining = None
+        self._waiting_for = None
+        self._activations = []
+        self._pressed_pins = []
+
+    # === PROPERTIES ===
+    @property
+    def scene(self):
+        return self._scene
+
+    @property
+    def is_paused(self):
+        return self._task is None
+
+    @property
+    def next_step(self):
+        return self._next_step
+
+    @property
+    def deadline(self):
+        return self._deadline
+
+    @property
+    def activations(self):
+        return self._activations
+
+    @property
+    def pressed_pins(self):
+        return self._pressed_pins
+
+
+class SceneSequencer:
+    # every scene runs as one task walking its compiled steps, delays are timed by the pin scheduler
+    _scheduler: PinScheduler
+    _scenes: Dict[str, Scene]
+    _runs: Dict[str, SceneRun]
+
+    def __init__(self, scheduler: PinScheduler):
+        self._scheduler = scheduler
+        self._scenes = {}
+        self._runs = {}
+
+    # === PROPERTIES ===
+    @property
+    def scenes(self):
+        return self._scenes
+
+    @property
+    def runs(self):
+        # running and paused scenes
+        return self._runs
+
+    # === METHODS ===
+    def set_scenes(self, scenes: list[Scene]):
+        # running scenes keep their compiled steps, removed scenes are aborted
+        self._scenes = {scene.id: scene for scene in scenes}
+        for scene_id in [scene_id for scene_id in self._runs if scene_id not in self._scenes]:
+            self.abort(scene_id)
+
+    def start(self, scene_id: str) -> SceneRun:
+        scene = self._scenes.get(scene_id)
+        if scene is None:
+            raise KeyError(scene_id)
+
+        # a running scene starts over
+        self.abort(scene_id)
+        if scene.group:
+            for run in list(self._runs.values()):
+                if run.scene.group == scene.group and not run.is_paused:
+                    self._preempt(run)
+
+        run = SceneRun(scene)
+        self._runs[scene_id] = run
+        self._run(run)
+        logger.info("scene %s started", scene_id)
+        return run
+
+    def abort(self, scene_id: str) -> bool:
+        run = self._runs.pop(scene_id, None)
+        if run is None:
+            return False
+        if run._task is not None:
+            run._task.cancel()
+            run._task = None
+        # a press of the scene must not outlive it, waiters for the release and the api see the pin released
+        for pin in run.pressed_pins:
+            if pin.is_triggered:
+                pin.untrigger((pin, time.monotonic()))
+        run.pressed_pins.clear()
+        # no wasted work after the operator changed their mind
+        for activation in run.activations:
+            activation.cancel()
+        logger.info("scene %s aborted", scene_id)
+        return True
+
+    def pause(self, scene_id: str) -> bool:
+        run = self._runs.get(scene_id)
+        if run is None or run._task is None:
+            return False
+        if run._deadline is not None:
+            run._remaining = max(0, run._deadline - self._scheduler.time())
+            run._deadline = None
+        run._task.cancel()
+        run._task = None
+        # keeps the paused runs in the order they were paused
+        self._runs[scene_id] = self._runs.pop(scene_id)
+        logger.info("scene %s paused before step %s", scene_id, run.next_step)
+        return True
+
+    def resume(self, scene_id: str) -> bool:
+        run = self._runs.get(scene_id)
+        if run is None or run._task is not None:
+            return False
+        if run.scene.group:
+            for other_run in list(self._runs.values()):
+                if other_run is not run and other_run.scene.group == run.scene.group and not other_run.is_paused:
+                    self._preempt(other_run)
+        self._run(run)
+        logger.info("scene %s resumed at step %s", scene_id, run.next_step)
+        return True
+
+    def close(self):
+        for scene_id in list(self._runs):
+            self.abort(scene_id)
+
+    def _preempt(self, run: SceneRun):
+        if run.scene.on_preempt == "pause":
+            self.pause(run.scene.id)
+        else:
+            self.abort(run.scene.id)
+
+    def _run(self, run: SceneRun):
+        task = self._scheduler.loop.create_task(self._run_steps(run))
+        run._task = task
+        task.add_done_callback(lambda _: self._on_run_done(run, task))
+
+    async def _run_steps(self, run: SceneRun):
+        steps = run.scene.steps
+        if run._waiting_for is not None:
+            # paused while waiting for an activation, it kept running meanwhile
+            await asyncio.wait((run._waiting_for.task,))
+            run._waiting_for = None
+
+        while run._next_step < len(steps):
+            step = steps[run._next_step]
+            delay = run._remaining if run._remaining is not None else step.delay
+            run._remaining = None
+            if delay > 0:
+                run._deadline = self._scheduler.time() + delay
+                if not await self._scheduler.sleep(run.scene.id, "step", delay):
+                    return
+                run._deadline = None
+
+            # steps without delay are started in the same loop iteration and run in parallel
+            activation = step.execute()
+            run._next_step += 1
+            if step.action == "press" and step.pin.is_triggered and step.pin not in run._pressed_pins:
+                run._pressed_pins.append(step.pin)
+            elif step.action == "release" and step.pin in run._pressed_pins:
+                run._pressed_pins.remove(step.pin)
+            if activation is None:
+                continue
+            run._activations.append(activation)
+            if step.wait:
+                run._waiting_for = activation
+                await asyncio.wait((activation.task,))
+                run._waiting_for = None
+
+    def _on_run_done(self, run: SceneRun, task: asyncio.Task[None]):
+        if task.cancelled() or self._runs.get(run.scene.id) is not run or run._task is not task:
+            return
+        del self._runs[run.scene.id]
+        if task.exception() is not None:
+            logger.error("scene %s failed: %r", run.scene.id, task.exception())
+            return
+        logger.info("scene %s finished", run.scene.id)
+
+        # the scene that was preempted last continues
+        paused_runs = [
+            paused_run
+            for paused_run in self._runs.values()
+            if paused_run.is_paused and paused_run.scene.group and paused_run.scene.group == run.scene.group
+        ]
+        if paused_runs:
+            self.resume(paused_runs[-1].scene.id)
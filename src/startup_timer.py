@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import time
+
+
+class StartupTimer:
+    # collects the duration of the startup stages, time until inputs are live is downtime after a restart
+    _start: float
+    _last: float
+    _stages: list[tuple[str, float]]
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self._last = self._start
+        self._stages = []
+
+    # === PROPERTIES ===
+    @property
+    def stages(self):
+        return self._stages
+
+    @property
+    def total(self):
+        return self._last - self._start
+
+    # === METHODS ===
+    def mark(self, stage: str):
+        # ends the current stage
+        now = time.perf_counter()
+        self._stages.append((stage, now - self._last))
+        self._last = now
+
+    def report(self) -> str:
+        lines = ["startup timings:"]
+        for stage, duration in self._stages:
+            lines.append(f"  {stage:<16}{duration * 1000:8.1f} ms")
+        lines.append(f"  {'total':<16}{self.total * 1000:8.1f} ms")
+        return "\n".join(lines)
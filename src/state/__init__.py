@@ -0,0 +1,4 @@
+from .snapshot import RESTORE_SETTLE_TIME as RESTORE_SETTLE_TIME
+from .snapshot import StateSnapshot as StateSnapshot
+from .snapshot import StateStore as StateStore
+from .snapshot import default_state_path as default_state_path
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, NamedTuple, Tuple
+
+from logger import get_logger
+from pins import OutputPin
+from pjlink import DeviceState
+
+if TYPE_CHECKING:
+    from media_control import MediaControl
+    from pjlink import PowerState
+
+logger = get_logger("state")
+
+VERSION = 1
+# output timers that continue after a restart, the timers of inputs start over when the inputs are read again
+RESUMABLE_TIMERS = ("hold", "pulse")
+# inputs are read, debounced and have triggered their pins by then, restored outputs nobody drives are switched off
+RESTORE_SETTLE_TIME = 1
+
+
+def default_state_path() -> Path:
+    # the RuntimeDirectory is a tmpfs, kept across restarts of the service but not across reboots
+    runtime_directory = os.environ.get("RUNTIME_DIRECTORY")
+    if runtime_directory:
+        return Path(runtime_directory) / "state.json"
+    return Path(tempfile.gettempdir()) / "dptmc" / "state.json"
+
+
+def read_boot_id() -> str:
+    # time.monotonic deadlines are only comparable within one boot
+    try:
+        return Path("/proc/sys/kernel/random/boot_id").read_text().strip()
+    except OSError:
+        return ""
+
+
+class StateSnapshot(NamedTuple):
+    outputs: Dict[str, bool]  # output pin id -> level, only outputs that are on
+    blocked: Dict[str, list[str]]  # pin id -> active pins holding the block, empty for blocks of the api or cluster
+    timers: Dict[str, Tuple[str, float]]  # output pin id -> (timer name, time.monotonic deadline)
+    devices: Dict[str, DeviceState]
+
+
+class StateStore:
+    # snapshot of the output levels, blocks, output timers and device states. changes of one interval are written
+    # together to a temporary file that replaces the snapshot, a crash leaves the previous snapshot behind
+    _media_control: MediaControl
+    _path: Path
+    _interval: float
+    _boot_id: str
+    _handle: asyncio.TimerHandle | None
+    _last_snapshot: StateSnapshot | None  # unchanged states are not written again
+    _restored: StateSnapshot | None
+
+    def __init__(self, media_control: MediaControl, path: str | Path, interval: float = 0.1):
+        self._media_control = media_control
+        self._path = Path(path)
+        self._interval = interval
+        self._boot_id = read_boot_id()
+        self._handle = None
+        self._last_snapshot = None
+        self._restored = None
+
+    # === PROPERTIES ===
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def is_enabled(self):
+        return self._interval > 0
+
+    @property
+    def restored(self):
+        # the loaded snapshot until the restore settled
+        return self._restored
+
+    # === METHODS ===
+    def load(self) -> StateSnapshot | None:
+        if not self.is_enabled:
+            return None
+        try:
+            with open(self._path, "r") as f:
+                self._restored = self._decode(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("state snapshot %s could not be read: %s", self._path, e)
+        return self._restored
+
+    def initial_level(self, pin_id: str) -> bool:
+        # outputs are set up with their restored level, they do not drop for the time until the restore
+        return self._restored is not None and self._restored.outputs.get(pin_id, False)
+
+    def restore_blocks(self):
+        if self._restored is None:
+            return
+        pins = self._media_control.pins
+        for pin_id in self._restored.blocked:
+            pin = pins.get(pin_id)
+            if pin is not None and not pin.is_blocked:
+                pin.block()
+        self._media_control.device_states.restore(self._restored.devices)
+
+    def resume(self):
+        # on the running loop: set all restored outputs in one write and continue their pulses and holds
+        if self._restored is None:
+            return
+        media_control = self._media_control
+        offset = media_control.scheduler.time() - time.monotonic()
+        levels: Dict[str, bool] = {}
+        for pin_id in self._restored.outputs:
+            pin = media_control.pins.get(pin_id)
+            if not isinstance(pin, OutputPin):
+                continue
+            levels[pin_id] = True
+            timer = self._restored.timers.get(pin_id)
+            if timer is not None:
+                name, deadline = timer
+                # ended while the service was down, or the pin is configured differently now
+                levels[pin_id] = name == pin.trigger_method and deadline + offset > media_control.scheduler.time()
+        if levels:
+            media_control.set_outputs(levels)
+        for pin_id, on in levels.items():
+            pin = media_control.pins[pin_id]
+            if on and pin_id in self._restored.timers and isinstance(pin, OutputPin):
+                pin.resume_activation(self._restored.timers[pin_id][1] + offset)
+
+    def settle(self):
+        # outputs and blocks of activations that did not come back, e.g. of an input released during the restart
+        restored, self._restored = self._restored, None
+        if restored is None:
+            return
+        pins = self._media_control.pins
+        idle = {
+            pin_id: False
+            for pin_id in restored.outputs
+            if isinstance(pin := pins.get(pin_id), OutputPin) and pin.activation is None
+        }
+        if idle:
+            self._media_control.set_outputs(idle)
+        for pin_id, holders in restored.blocked.items():
+            pin = pins.get(pin_id)
+            if pin is None or not holders or not pin.is_blocked:
+                continue
+            if not any(holder in pins and pins[holder].activation is not None for holder in holders):
+                pin.unblock()
+        logger.info(
+            "state restored: %s outputs on, %s switched off, %s pins blocked",
+            len(restored.outputs) - len(idle),
+            len(idle),
+            sum(pin.is_blocked for pin in pins.values()),
+        )
+        self.mark_changed()
+
+    def mark_changed(self):
+        # cheap enough for every pin event, the snapshot is written once per interval
+        if self._handle is None and self.is_enabled:
+            self._handle = self._media_control.event_loop.call_later(self._interval, self.flush)
+
+    def flush(self):
+        self._handle = None
+        snapshot = self.capture()
+        if snapshot == self._last_snapshot:
+            return
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            # write to a temporary file first, a crash must not leave a half written snapshot
+            tmp_path = self._path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self._encode(snapshot), f, separators=(",", ":"))
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            logger.warning("could not save state snapshot: %s", e)
+            return
+        self._last_snapshot = snapshot
+
+    def capture(self) -> StateSnapshot:
+        media_control = self._media_control
+        backend = media_control.backend
+        offset = time.monotonic() - media_control.scheduler.time()
+        pins = media_control.pins.values()
+
+        outputs = {pin.id: True for pin in pins if isinstance(pin, OutputPin) and backend.read(pin.gpio_pin)}
+        blocked: Dict[str, list[str]] = {pin.id: [] for pin in pins if pin.is_blocked}
+        for pin in pins:
+            if pin.activation is None:
+                continue
+            for blocked_pin in pin.pins_to_block:
+                if blocked_pin.id in blocked:
+                    blocked[blocked_pin.id].append(pin.id)
+        # in ms, the offset between the clocks jitters and would make every snapshot look changed
+        timers = {
+            action.pin_id: (action.name, round(action.deadline + offset, 3))
+            for action in media_control.scheduler.pending()
+            if action.name in RESUMABLE_TIMERS and isinstance(media_control.pins.get(action.pin_id), OutputPin)
+        }
+        return StateSnapshot(outputs, blocked, timers, media_control.device_states.states)
+
+    # --- Encoding ---
+
+    def _encode(self, snapshot: StateSnapshot) -> Dict[str, Any]:
+        return {
+            "version": VERSION,
+            "boot_id": self._boot_id,
+            "saved_at": time.time(),
+            "state": {
+                "outputs": sorted(snapshot.outputs),
+                "blocked": snapshot.blocked,
+                "timers": snapshot.timers,
+                "devices": snapshot.devices,
+            },
+        }
+
+    def _decode(self, data: Dict[str, Any]) -> StateSnapshot | None:
+        if data["version"] != VERSION or data["boot_id"] != self._boot_id:
+            logger.info("state snapshot of another version or boot is not restored")
+            return None
+        logger.info("restoring state snapshot of %s", time.strftime("%H:%M:%S", time.localtime(data["saved_at"])))
+        state = data["state"]
+        devices: Dict[str, DeviceState] = {}
+        for address, (power, updated) in state["devices"].items():
+            power_state: PowerState = power
+            devices[address] = DeviceState(power_state, float(updated))
+        return StateSnapshot(
+            dict.fromkeys(state["outputs"], True),
+            {pin_id: list(holders) for pin_id, holders in state["blocked"].items()},
+            {pin_id: (name, float(deadline)) for pin_id, (name, deadline) in state["timers"].items()},
+            devices,
+        )
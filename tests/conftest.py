@@ -0,0 +1,128 @@
+import asyncio
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Coroutine, Dict, Iterator, Sequence
+
+import pytest
+
+# the config snapshot and the journal paths are read from the environment on import
+_home = tempfile.mkdtemp(prefix="dptmc-tests-")
+os.environ["HOME"] = _home
+os.environ["RUNTIME_DIRECTORY"] = _home
+
+import tomlkit  # noqa: E402
+
+from gpio import SimulatedBackend  # noqa: E402
+from logger import stop_logging  # noqa: E402
+from media_control import MediaControl  # noqa: E402
+
+# settings every test starts from, a test passes what it is about
+TEST_PROJECT: Dict[str, Any] = {
+    "name": "tests",
+    "gpio_backend": "simulated",
+    "input_mode": "edge",
+    "config_reload_interval": 0,
+    "log_level": "ERROR",
+    "metrics_port": 0,
+    "journal_capacity": 0,
+    "device_state_ttl": 0,
+    "trigger_rate_limit": 0,
+    "global_trigger_rate_limit": 0,
+    "loop_watchdog_interval": 0,
+    "loop_lag_warning": 0,
+    "state_interval": 0,
+}
+
+
+def input_pin(gpio_pin: int, triggered_pins: Sequence[str] = (), **options: Any) -> Dict[str, Any]:
+    pin = {"id": f"I#{gpio_pin}", "type": "input", "gpio_pin": gpio_pin, "triggered_pins": list(triggered_pins)}
+    return pin | options
+
+
+def output_pin(gpio_pin: int, trigger_method: str = "while_input", **options: Any) -> Dict[str, Any]:
+    pin = {"id": f"O#{gpio_pin}", "type": "output", "gpio_pin": gpio_pin, "trigger_method": trigger_method}
+    return pin | options
+
+
+def write_config(
+    config_path: Path, pins: Dict[str, list[Dict[str, Any]]], scenes: Sequence[Dict[str, Any]] = (), **project: Any
+):
+    document: Dict[str, Any] = {"Project": TEST_PROJECT | project}
+    document |= {section: configs for section, configs in pins.items() if configs}
+    if scenes:
+        document["Scenes"] = list(scenes)
+    config_path.write_text(tomlkit.dumps(document))
+
+
+class Controller:
+    # a media control on the simulated gpio bank, the test drives it from coroutines on its event loop
+    _media_control: MediaControl
+    _backend: SimulatedBackend
+
+    def __init__(self, config_path: Path):
+        self._backend = SimulatedBackend()
+        self._media_control = MediaControl("tests", config_path, backend=self._backend)
+
+    # === PROPERTIES ===
+    @property
+    def config_path(self):
+        return self._media_control.config_parser.config_file_path
+
+    @property
+    def media_control(self):
+        return self._media_control
+
+    @property
+    def backend(self):
+        return self._backend
+
+    @property
+    def pins(self):
+        return self._media_control.pins
+
+    # === METHODS ===
+    def run[T](self, coroutine: Coroutine[Any, Any, T]) -> T:
+        return self._media_control.event_loop.run_until_complete(coroutine)
+
+    def close(self):
+        if self._media_control.event_loop.is_closed():
+            return
+        self.run(self._shutdown())
+        self._media_control.event_loop.close()
+        stop_logging()
+
+    async def _shutdown(self):
+        self._media_control.status_poller.stop()
+        await self._media_control.pjlink_pool.close()
+        await self._media_control.cluster.stop()
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+type ControllerFactory = Callable[..., Controller]
+
+
+@pytest.fixture
+def controller_factory(tmp_path: Path) -> Iterator[ControllerFactory]:
+    # controller_factory(pins, scenes=[...], **project), every controller is closed after the test
+    controllers: list[Controller] = []
+
+    def create(pins: Dict[str, list[Dict[str, Any]]], scenes: Sequence[Dict[str, Any]] = (), **project: Any):
+        config_path = tmp_path / f"config_{len(controllers)}.toml"
+        write_config(config_path, pins, scenes, **({"state_path": str(tmp_path / "state.json")} | project))
+        controller = Controller(config_path)
+        controllers.append(controller)
+        return controller
+
+    yield create
+    for controller in controllers:
+        controller.close()
+
+
+async def settle(seconds: float = 0.01):
+    # lets the activations started by the last edges run
+    await asyncio.sleep(seconds)
@@ -0,0 +1,134 @@
+import pytest
+from conftest import ControllerFactory, input_pin, output_pin, settle
+
+from cluster import ClusterError, ClusterMessage, ClusterNode
+from cluster.messages import decode_message, encode_message
+
+PEER_ADDRESS = ("127.0.0.1", 7451)
+
+
+def test_trigger_reports_the_press_status(controller_factory: ControllerFactory):
+    controller = controller_factory({"OutputPins": [output_pin(100)]})
+    protocol = controller.media_control.cluster_protocol
+
+    async def scenario():
+        first = protocol.handle("b", {"kind": "trigger", "pin": "O#100", "seq": 1})
+        await settle()
+        second = protocol.handle("b", {"kind": "trigger", "pin": "O#100", "seq": 2})
+        await settle()
+        return first, second
+
+    first, second = controller.run(scenario())
+    assert first == {"started": True, "status": "started"}
+    assert second == {"started": False, "status": "retriggered"}
+    # the retrigger must not release the press of the first trigger
+    assert controller.pins["O#100"].is_triggered
+    assert controller.backend.read(100)
+
+
+def test_blocked_trigger_keeps_an_existing_press(controller_factory: ControllerFactory):
+    controller = controller_factory({"OutputPins": [output_pin(100)]})
+    protocol = controller.media_control.cluster_protocol
+    pin = controller.pins["O#100"]
+
+    async def scenario():
+        protocol.handle("b", {"kind": "trigger", "pin": "O#100", "seq": 1})
+        await settle()
+        pin.block()
+        result = protocol.handle("b", {"kind": "trigger", "pin": "O#100", "seq": 2})
+        await settle()
+        return result
+
+    assert controller.run(scenario()) == {"started": False, "status": "blocked"}
+    assert pin.is_triggered
+    assert controller.backend.read(100)
+
+
+def test_older_command_does_not_undo_a_newer_one(controller_factory: ControllerFactory):
+    controller = controller_factory({"OutputPins": [output_pin(100)]})
+    protocol = controller.media_control.cluster_protocol
+
+    async def scenario():
+        protocol.handle("b", {"kind": "release", "pin": "O#100", "seq": 2})
+        stale = protocol.handle("b", {"kind": "trigger", "pin": "O#100", "seq": 1})
+        await settle()
+        return stale
+
+    assert controller.run(scenario()) == {"stale": True}
+    assert not controller.backend.read(100)
+
+
+def test_inputs_can_not_be_triggered(controller_factory: ControllerFactory):
+    controller = controller_factory({"InputPins": [input_pin(1, ["O#100"])], "OutputPins": [output_pin(100)]})
+    protocol = controller.media_control.cluster_protocol
+
+    async def scenario():
+        protocol.handle("b", {"kind": "trigger", "pin": "I#1", "seq": 1})
+
+    with pytest.raises(ClusterError):
+        controller.run(scenario())
+
+
+class RecordingProtocol:
+    # stands in for the protocol of the media control, counts the commands the node runs
+    handled: list[ClusterMessage]
+
+    def __init__(self):
+        self.handled = []
+
+    def handle(self, node: str, message: ClusterMessage):
+        self.handled.append(message)
+        return {"count": len(self.handled)}
+
+    def on_peer_restart(self, node: str):
+        pass
+
+
+class RecordingTransport:
+    sent: list[ClusterMessage]
+
+    def __init__(self):
+        self.sent = []
+
+    def sendto(self, datagram: bytes, address):
+        self.sent.append(decode_message(datagram, b"secret"))
+
+    def close(self):
+        pass
+
+
+def test_duplicate_datagram_is_answered_from_the_reply_window():
+    protocol = RecordingProtocol()
+    node = ClusterNode(protocol, "a", peers={"b": "127.0.0.1:7451"}, secret="secret")  # type: ignore
+    transport = RecordingTransport()
+    node._transport = transport  # type: ignore
+    datagram = encode_message({"kind": "trigger", "pin": "O#100", "node": "b", "epoch": 1, "seq": 7}, b"secret")
+
+    node.datagram_received(datagram, PEER_ADDRESS)
+    node.datagram_received(datagram, PEER_ADDRESS)
+
+    assert len(protocol.handled) == 1
+    assert [reply["seq"] for reply in transport.sent] == [7, 7]
+    assert transport.sent[0] == transport.sent[1]
+    assert transport.sent[0]["result"] == {"count": 1}
+
+
+def test_restarted_peer_runs_its_sequence_numbers_again():
+    protocol = RecordingProtocol()
+    node = ClusterNode(protocol, "a", peers={"b": "127.0.0.1:7451"}, secret="secret")  # type: ignore
+    node._transport = RecordingTransport()  # type: ignore
+    for epoch in (1, 2):
+        message = {"kind": "trigger", "pin": "O#100", "node": "b", "epoch": epoch, "seq": 1}
+        node.datagram_received(encode_message(message, b"secret"), PEER_ADDRESS)
+
+    assert len(protocol.handled) == 2
+
+
+def test_datagram_with_a_bad_signature_is_dropped():
+    protocol = RecordingProtocol()
+    node = ClusterNode(protocol, "a", peers={"b": "127.0.0.1:7451"}, secret="secret")  # type: ignore
+    node._transport = RecordingTransport()  # type: ignore
+    message = {"kind": "trigger", "pin": "O#100", "node": "b", "epoch": 1, "seq": 1}
+    node.datagram_received(encode_message(message, b"other"), PEER_ADDRESS)
+
+    assert protocol.handled == []
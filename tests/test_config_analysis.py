@@ -0,0 +1,46 @@
+from pathlib import Path
+from typing import Any, Dict, Sequence
+
+import tomlkit
+from conftest import input_pin, output_pin
+
+from config import ConfigParser, ConfigReport, analyze_config
+
+
+def analyze(
+    tmp_path: Path, pins: Dict[str, list[Dict[str, Any]]], scenes: Sequence[Dict[str, Any]] = ()
+) -> ConfigReport:
+    parser = ConfigParser(tmp_path / "config.toml", snapshot_directory=None)
+    return analyze_config(parser.parse_config(tomlkit.dumps(pins | {"Scenes": list(scenes)}).encode()))
+
+
+PINS = {"InputPins": [input_pin(1, ["O#100"])], "OutputPins": [output_pin(100), output_pin(101, "pulse")]}
+
+
+def test_scene_waiting_for_its_own_release_is_an_error(tmp_path: Path):
+    steps = [{"pin": "O#100", "action": "press", "wait": True}, {"pin": "O#100", "action": "release"}]
+    report = analyze(tmp_path, PINS, [{"id": "show", "steps": steps}])
+
+    assert report.errors == ["scene show waits in step 1 for O#100, which is only released by its own step 2"]
+
+
+def test_scene_waiting_for_an_api_release_is_a_warning(tmp_path: Path):
+    report = analyze(tmp_path, PINS, [{"id": "show", "steps": [{"pin": "O#100", "action": "press", "wait": True}]}])
+
+    assert report.is_valid
+    assert "scene show waits in step 1 until O#100 is released over the api" in report.warnings
+
+
+def test_scene_waiting_for_a_pulse_is_valid(tmp_path: Path):
+    steps = [{"pin": "O#101", "action": "press", "wait": True}, {"pin": "O#101", "action": "release"}]
+    report = analyze(tmp_path, PINS, [{"id": "show", "steps": steps}])
+
+    assert report.is_valid
+    assert not any(warning.startswith("scene") for warning in report.warnings)
+
+
+def test_pin_never_triggered_is_a_warning(tmp_path: Path):
+    report = analyze(tmp_path, PINS)
+
+    assert report.is_valid
+    assert report.warnings == ["pin O#101 is never triggered by an input or a scene"]
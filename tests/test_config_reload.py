@@ -0,0 +1,90 @@
+import pytest
+from conftest import ControllerFactory, input_pin, output_pin, settle, write_config
+
+import media_control
+from config import diff_config
+
+PINS = {"InputPins": [input_pin(1, ["O#100"])], "OutputPins": [output_pin(100), output_pin(101, "pulse")]}
+# O#101 is removed, O#102 is added and I#1 triggers it instead of O#100
+CHANGED_PINS = {"InputPins": [input_pin(1, ["O#102"])], "OutputPins": [output_pin(100), output_pin(102)]}
+
+
+def test_diff_lists_added_removed_and_changed_pins(controller_factory: ControllerFactory):
+    old = controller_factory(PINS).media_control.config
+    new = controller_factory(CHANGED_PINS).media_control.config
+    diff = diff_config(old, new)
+
+    assert [pin["id"] for pin in diff.added] == ["O#102"]
+    assert [pin["id"] for pin in diff.removed] == ["O#101"]
+    assert [pin["id"] for pin in diff.changed] == ["I#1"]
+    assert diff_config(old, old).is_empty
+
+
+def test_reload_applies_the_diff(controller_factory: ControllerFactory):
+    controller = controller_factory(PINS)
+    unchanged_pin = controller.pins["O#100"]
+
+    async def scenario():
+        write_config(controller.config_path, CHANGED_PINS)
+        controller.media_control.reload_config()
+        controller.backend.set_input(1, True)
+        await settle()
+        return controller.backend.read(100), controller.backend.read(102)
+
+    assert controller.run(scenario()) == (False, True)
+    assert set(controller.pins) == {"I#1", "O#100", "O#102"}
+    # unchanged pins keep running, they are not set up again
+    assert controller.pins["O#100"] is unchanged_pin
+    assert not controller.backend.is_setup(101)
+
+
+def test_invalid_config_keeps_the_running_one(controller_factory: ControllerFactory):
+    controller = controller_factory(PINS)
+    config = controller.media_control.config
+
+    async def scenario():
+        write_config(controller.config_path, {"InputPins": [input_pin(1, ["O#999"])], "OutputPins": [output_pin(100)]})
+        controller.media_control.reload_config()
+        controller.backend.set_input(1, True)
+        await settle()
+        return controller.backend.read(100)
+
+    assert controller.run(scenario())
+    assert controller.media_control.config is config
+    assert set(controller.pins) == {"I#1", "O#100", "O#101"}
+
+
+def test_failed_scene_compile_leaves_the_engine_untouched(
+    controller_factory: ControllerFactory, monkeypatch: pytest.MonkeyPatch
+):
+    controller = controller_factory(PINS)
+    pin_index = controller.media_control.pin_index
+
+    def broken_compile(scene_config, pin_index):
+        raise ValueError("scene does not compile")
+
+    monkeypatch.setattr(media_control, "compile_scene", broken_compile)
+    write_config(controller.config_path, CHANGED_PINS, [{"id": "show", "steps": [{"pin": "O#102"}]}])
+    controller.media_control.reload_config()
+
+    # nothing of the new config was applied before the scenes failed
+    assert set(controller.pins) == {"I#1", "O#100", "O#101"}
+    assert controller.backend.is_setup(101)
+    assert not controller.backend.is_setup(102)
+    assert controller.media_control.pin_index is pin_index
+    assert [pin.id for pin in controller.pins["I#1"].triggered_pins] == ["O#100"]
+
+
+def test_engine_bug_is_not_taken_for_an_invalid_config(
+    controller_factory: ControllerFactory, monkeypatch: pytest.MonkeyPatch
+):
+    controller = controller_factory(PINS)
+
+    def broken_compile(scene_config, pin_index):
+        raise RuntimeError("bug")
+
+    monkeypatch.setattr(media_control, "compile_scene", broken_compile)
+    write_config(controller.config_path, CHANGED_PINS, [{"id": "show", "steps": [{"pin": "O#102"}]}])
+
+    with pytest.raises(RuntimeError):
+        controller.media_control.reload_config()
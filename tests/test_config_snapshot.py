@@ -0,0 +1,69 @@
+from pathlib import Path
+
+from conftest import input_pin, output_pin, write_config
+
+from config import ConfigParser
+
+PINS = {"InputPins": [input_pin(1, ["O#100"])], "OutputPins": [output_pin(100)]}
+INVALID_PINS = {"InputPins": [input_pin(1, ["O#999"])], "OutputPins": [output_pin(100)]}
+
+
+def test_unchanged_config_is_loaded_from_the_snapshot(tmp_path: Path):
+    config_path = tmp_path / "config.toml"
+    write_config(config_path, PINS)
+    parser = ConfigParser(config_path, tmp_path / "snapshots")
+    config = parser.load_config()
+    assert parser.snapshot_path is not None and parser.snapshot_path.exists()
+
+    # the snapshot is used if it matches the file, tomlkit is not needed
+    parser.parse_config = None  # type: ignore
+    assert parser.load_config() == config
+
+
+def test_changed_config_is_parsed_again(tmp_path: Path):
+    config_path = tmp_path / "config.toml"
+    write_config(config_path, PINS)
+    parser = ConfigParser(config_path, tmp_path / "snapshots")
+    parser.load_config()
+
+    write_config(config_path, PINS | {"OutputPins": [output_pin(100), output_pin(101)]})
+    assert [pin["id"] for pin in parser.load_config()["OutputPins"]] == ["O#100", "O#101"]
+
+
+def test_invalid_config_keeps_the_last_valid_snapshot(tmp_path: Path):
+    config_path = tmp_path / "config.toml"
+    write_config(config_path, PINS)
+    parser = ConfigParser(config_path, tmp_path / "snapshots")
+    parser.load_config()
+    assert parser.snapshot_path is not None
+    snapshot = parser.snapshot_path.read_bytes()
+
+    write_config(config_path, INVALID_PINS)
+    parser.load_config()
+    assert parser.snapshot_path.read_bytes() == snapshot
+
+
+def test_configs_have_their_own_snapshots(tmp_path: Path):
+    parsers = []
+    for name, pins in (("a", PINS), ("b", PINS | {"OutputPins": [output_pin(100), output_pin(101)]})):
+        config_path = tmp_path / name / "config.toml"
+        config_path.parent.mkdir()
+        write_config(config_path, pins)
+        parser = ConfigParser(config_path, tmp_path / "snapshots")
+        parser.load_config()
+        parsers.append(parser)
+
+    [a, b] = parsers
+    assert a.snapshot_path != b.snapshot_path
+    assert len(a.load_config()["OutputPins"]) == 1
+    assert len(b.load_config()["OutputPins"]) == 2
+
+
+def test_disabled_snapshot_writes_nothing(tmp_path: Path):
+    config_path = tmp_path / "config.toml"
+    write_config(config_path, PINS)
+    parser = ConfigParser(config_path, None)
+    parser.load_config()
+
+    assert parser.snapshot_path is None
+    assert list(tmp_path.iterdir()) == [config_path]
@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+import pytest
+from conftest import ControllerFactory, output_pin
+
+from control import ControlServer
+
+# a regression must fail the test, not hang it
+READ_TIMEOUT = 5
+
+PINS = {"OutputPins": [output_pin(100), output_pin(101)]}
+
+
+async def serve(handler) -> tuple[asyncio.StreamReader, asyncio.StreamWriter, asyncio.Server]:
+    server = await asyncio.start_server(handler, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    return reader, writer, server
+
+
+async def close(writer: asyncio.StreamWriter, server: asyncio.Server):
+    writer.close()
+    server.close()
+    await server.wait_closed()
+
+
+def test_url_encoded_pin_id_is_one_argument(controller_factory: ControllerFactory):
+    controller = controller_factory(PINS)
+    server: ControlServer = controller.media_control.control_server
+
+    async def scenario():
+        return [
+            server._route_http("POST", "/pins/O%23100%20O%23101/trigger", b""),
+            server._route_http("GET", "/pins/O%23100%20O%23101", b""),
+            server._route_http("GET", "/pins/O%23100", b""),
+        ]
+
+    [(trigger_status, _), (state_status, _), (status, body)] = controller.run(scenario())
+    assert (trigger_status, state_status, status) == (404, 404, 200)
+    assert json.loads(body)["result"][0]["id"] == "O#100"
+    assert not controller.pins["O#100"].is_triggered
+    assert not controller.pins["O#101"].is_triggered
+
+
+def test_unexpected_error_is_answered(controller_factory: ControllerFactory, monkeypatch: pytest.MonkeyPatch):
+    controller = controller_factory(PINS)
+
+    def broken_press(pin):
+        raise RuntimeError("broken")
+
+    monkeypatch.setattr(controller.media_control, "press_pin", broken_press)
+    reply = controller.media_control.control_protocol.execute("trigger O#100")
+
+    assert reply == {"ok": False, "command": "trigger", "error": "internal error"}
+
+
+def test_line_client_stays_connected_after_an_unexpected_error(
+    controller_factory: ControllerFactory, monkeypatch: pytest.MonkeyPatch
+):
+    controller = controller_factory(PINS)
+    server: ControlServer = controller.media_control.control_server
+    monkeypatch.setattr(controller.media_control, "press_pin", lambda pin: 1 / 0)
+
+    async def scenario():
+        reader, writer, tcp_server = await serve(server._handle_line_client)
+        writer.write(b"trigger O#100\nping\n")
+        replies = [json.loads(await asyncio.wait_for(reader.readline(), READ_TIMEOUT)) for _ in range(2)]
+        await close(writer, tcp_server)
+        return replies
+
+    [error, pong] = controller.run(scenario())
+    assert not error["ok"]
+    assert pong == {"ok": True, "command": "ping", "result": "pong"}
+
+
+def test_line_over_the_stream_limit_closes_the_client(controller_factory: ControllerFactory):
+    controller = controller_factory(PINS)
+    server: ControlServer = controller.media_control.control_server
+    loop = controller.media_control.event_loop
+    errors: list[dict] = []
+    loop.set_exception_handler(lambda loop, context: errors.append(context))
+
+    async def scenario():
+        reader, writer, tcp_server = await serve(server._handle_line_client)
+        writer.write(b"x" * (1 << 17) + b"\n")
+        try:
+            closed = await asyncio.wait_for(reader.read(), READ_TIMEOUT) == b""
+        except ConnectionResetError:
+            # closed with the rest of the line unread
+            closed = True
+        await close(writer, tcp_server)
+        return closed
+
+    assert controller.run(scenario())
+    assert errors == []
+
+
+def test_large_http_body_is_rejected(controller_factory: ControllerFactory):
+    controller = controller_factory(PINS)
+    server: ControlServer = controller.media_control.control_server
+
+    async def scenario():
+        reader, writer, tcp_server = await serve(server._handle_http_client)
+        writer.write(b"POST /commands HTTP/1.1\r\nContent-Length: 1000000\r\n\r\n")
+        status_line = await asyncio.wait_for(reader.readline(), READ_TIMEOUT)
+        await close(writer, tcp_server)
+        return status_line
+
+    assert controller.run(scenario()).startswith(b"HTTP/1.1 413")
@@ -0,0 +1,72 @@
+from conftest import ControllerFactory, input_pin, output_pin, settle
+
+from pins.debounce import Debouncer
+
+
+def test_change_is_accepted_after_the_settle_time():
+    debouncer = Debouncer(settle_time=0.01)
+
+    assert debouncer.feed(True, 0) is None
+    assert debouncer.is_pending
+    assert debouncer.next_sample_time(0, 0.1) == 0.01
+    assert debouncer.feed(True, 0.005) is None
+    assert debouncer.feed(True, 0.01) is True
+    assert debouncer.level and not debouncer.is_pending
+
+
+def test_glitch_is_dropped():
+    debouncer = Debouncer(settle_time=0.01)
+
+    debouncer.feed(True, 0)
+    assert debouncer.feed(False, 0.002) is None
+    assert not debouncer.is_pending
+    assert debouncer.next_sample_time(0.002, 0.1) is None
+    assert debouncer.feed(True, 0.02) is None
+
+
+def test_change_needs_the_stable_samples():
+    debouncer = Debouncer(stable_samples=3)
+
+    assert [debouncer.feed(True, now) for now in (0, 0.001, 0.002)] == [None, None, True]
+
+
+def test_press_and_release_have_their_own_minimum_time():
+    debouncer = Debouncer(min_press_time=0.05, min_release_time=0.01)
+
+    debouncer.feed(True, 0)
+    assert debouncer.feed(True, 0.02) is None
+    assert debouncer.feed(True, 0.05) is True
+    debouncer.feed(False, 0.25)
+    assert debouncer.feed(False, 0.25 + 0.01) is False
+
+
+PINS = {"InputPins": [input_pin(1, ["O#100"], debounce_settle_time=0.02)], "OutputPins": [output_pin(100)]}
+
+
+def test_bouncing_input_presses_once_it_settled(controller_factory: ControllerFactory):
+    controller = controller_factory(PINS)
+
+    async def scenario():
+        for level in (True, False, True, False, True):
+            controller.backend.set_input(1, level)
+        await settle(0.005)
+        bouncing = controller.backend.read(100)
+        # the pending change is sampled again once the settle time is over, no further edge is needed
+        await settle(0.04)
+        return bouncing, controller.backend.read(100)
+
+    assert controller.run(scenario()) == (False, True)
+
+
+def test_short_glitch_does_not_press(controller_factory: ControllerFactory):
+    controller = controller_factory(PINS)
+
+    async def scenario():
+        controller.backend.set_input(1, True)
+        await settle(0.005)
+        controller.backend.set_input(1, False)
+        await settle(0.04)
+        return controller.backend.read(100)
+
+    assert controller.run(scenario()) is False
+    assert not controller.pins["I#1"].is_triggered
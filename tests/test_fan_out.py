@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+from conftest import ControllerFactory, input_pin, output_pin, settle
+
+from pins import FanOutExecutor
+
+HOLD_TIME = 0.2
+
+
+def test_output_slot_is_not_held_for_the_hold_time(controller_factory: ControllerFactory):
+    outputs = [100, 101, 102]
+    controller = controller_factory(
+        {
+            "InputPins": [input_pin(1, [f"O#{gpio}" for gpio in outputs])],
+            "OutputPins": [output_pin(gpio, "hold", hold_time=HOLD_TIME) for gpio in outputs],
+        },
+        max_concurrent_outputs=1,
+    )
+
+    async def scenario():
+        controller.backend.set_input(1, True)
+        await settle()
+        return [controller.backend.read(gpio) for gpio in outputs]
+
+    assert controller.run(scenario()) == [True, True, True]
+
+
+def test_while_input_pin_frees_its_slot_before_the_release(controller_factory: ControllerFactory):
+    controller = controller_factory(
+        {
+            "InputPins": [input_pin(1, ["O#100"]), input_pin(2, ["O#101"])],
+            "OutputPins": [output_pin(100), output_pin(101)],
+        },
+        max_concurrent_outputs=1,
+    )
+
+    async def scenario():
+        controller.backend.set_input(1, True)
+        await settle()
+        controller.backend.set_input(2, True)
+        await settle()
+        return controller.backend.read(100), controller.backend.read(101)
+
+    assert controller.run(scenario()) == (True, True)
+
+
+def test_results_report_the_activation_duration(controller_factory: ControllerFactory):
+    controller = controller_factory(
+        {"InputPins": [input_pin(1, ["O#100"])], "OutputPins": [output_pin(100, "hold", hold_time=HOLD_TIME)]},
+        max_concurrent_outputs=1,
+    )
+    fan_out = FanOutExecutor(output_limit=1)
+    pin = controller.pins["O#100"]
+
+    async def scenario():
+        return await fan_out.run([pin], (controller.pins["I#1"], time.monotonic()))
+
+    [result] = controller.run(scenario())
+    assert result.status == "started"
+    assert result.ok
+    assert result.command_time < HOLD_TIME / 2
+    assert result.duration >= HOLD_TIME
+
+
+def test_blocked_target_is_not_ok(controller_factory: ControllerFactory):
+    controller = controller_factory({"InputPins": [input_pin(1, ["O#100"])], "OutputPins": [output_pin(100, "pulse")]})
+    pin = controller.pins["O#100"]
+
+    async def scenario():
+        pin.block()
+        results = await FanOutExecutor(output_limit=1).run([pin], (controller.pins["I#1"], time.monotonic()))
+        await asyncio.sleep(0)
+        return results
+
+    [result] = controller.run(scenario())
+    assert result.status == "blocked"
+    assert not result.ok
+    assert result.duration == 0
+    assert not controller.backend.read(100)
+
+
+def test_retriggered_target_is_told_apart_from_a_blocked_one(controller_factory: ControllerFactory):
+    controller = controller_factory(
+        {"InputPins": [input_pin(1, ["O#100"])], "OutputPins": [output_pin(100, "hold", hold_time=HOLD_TIME)]}
+    )
+    pin = controller.pins["O#100"]
+    fan_out = FanOutExecutor(output_limit=1)
+
+    async def scenario():
+        context = (controller.pins["I#1"], time.monotonic())
+        first = asyncio.create_task(fan_out.run([pin], context))
+        await settle()
+        [second] = await fan_out.run([pin], context)
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        return second
+
+    result = controller.run(scenario())
+    assert result.status == "retriggered"
+    assert result.ok
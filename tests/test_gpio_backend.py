@@ -0,0 +1,83 @@
+from typing import Sequence
+
+import pytest
+
+from gpio import GpioBackend, SimulatedBackend, create_backend
+
+
+def test_backend_missing_a_method_fails_when_it_is_created():
+    class ReadOnlyBackend(GpioBackend):
+        def setup_input(self, gpio_pin: int):
+            pass
+
+        def setup_output(self, gpio_pin: int, level: bool = False):
+            pass
+
+        def is_setup(self, gpio_pin: int) -> bool:
+            return True
+
+        def read(self, gpio_pin: int) -> bool:
+            return False
+
+    with pytest.raises(TypeError):
+        ReadOnlyBackend()  # type: ignore
+
+
+def test_outputs_start_with_their_setup_level():
+    backend = SimulatedBackend()
+    backend.setup_output(5, True)
+    backend.setup_output(6)
+    assert backend.read(5)
+    assert not backend.read(6)
+    assert backend.is_setup(5)
+    assert not backend.is_setup(7)
+
+
+def test_write_of_an_input_is_rejected():
+    backend = SimulatedBackend()
+    backend.setup_input(5)
+    with pytest.raises(ValueError):
+        backend.write(5, True)
+    with pytest.raises(ValueError):
+        backend.write_bank([5], 1)
+
+
+def test_bank_read_and_write_map_bits_to_the_given_pins():
+    backend = SimulatedBackend()
+    gpio_pins: Sequence[int] = [17, 4, 27]
+    for gpio_pin in gpio_pins:
+        backend.setup_output(gpio_pin)
+
+    backend.write_bank(gpio_pins, 0b101)
+    assert [backend.read(gpio_pin) for gpio_pin in gpio_pins] == [True, False, True]
+    assert backend.read_bank(gpio_pins) == 0b101
+    # one group write, not one write per pin
+    assert backend.write_count == 1
+
+
+def test_edge_callback_is_called_for_level_changes_only():
+    backend = SimulatedBackend()
+    backend.setup_input(5)
+    edges: list[int] = []
+    backend.add_edge_callback(5, edges.append)
+
+    backend.set_input(5, True)
+    backend.set_input(5, True)
+    backend.set_input(5, False)
+    backend.remove_edge_callback(5)
+    backend.set_input(5, True)
+
+    assert edges == [5, 5]
+
+
+def test_cleanup_releases_the_pin():
+    backend = SimulatedBackend()
+    backend.setup_output(5, True)
+    backend.cleanup(5)
+    assert not backend.is_setup(5)
+    assert not backend.read(5)
+
+
+def test_unknown_backend_name_is_rejected():
+    with pytest.raises(ValueError):
+        create_backend("spi")  # type: ignore
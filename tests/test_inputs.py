@@ -0,0 +1,71 @@
+from conftest import ControllerFactory, input_pin, output_pin, settle
+
+PINS = {
+    "InputPins": [input_pin(1, ["O#100"]), input_pin(2, ["O#101"])],
+    "OutputPins": [output_pin(100), output_pin(101)],
+}
+
+
+def test_edge_presses_without_a_scanner(controller_factory: ControllerFactory):
+    controller = controller_factory(PINS, input_mode="edge")
+
+    async def scenario():
+        controller.backend.set_input(1, True)
+        await settle()
+        pressed = controller.backend.read(100)
+        controller.backend.set_input(1, False)
+        await settle()
+        return pressed, controller.backend.read(100)
+
+    assert controller.run(scenario()) == (True, False)
+    assert controller.media_control.scan_task is None
+
+
+def test_input_held_at_startup_is_picked_up(controller_factory: ControllerFactory):
+    controller = controller_factory(PINS, input_mode="edge")
+    # the line is already high when the loop starts, no edge is reported for it
+    controller.backend._set_level(2, True)
+
+    async def scenario():
+        await settle()
+        return controller.backend.read(101)
+
+    assert controller.run(scenario())
+    assert controller.pins["I#2"].is_triggered
+
+
+def test_scanner_dispatches_every_changed_input(controller_factory: ControllerFactory):
+    controller = controller_factory(PINS, input_mode="poll", scan_interval=0.002)
+
+    async def scenario():
+        controller.backend.set_input(1, True)
+        controller.backend.set_input(2, True)
+        await settle(0.02)
+        pressed = controller.backend.read(100), controller.backend.read(101)
+        controller.backend.set_input(1, False)
+        await settle(0.02)
+        return pressed, (controller.backend.read(100), controller.backend.read(101))
+
+    assert controller.run(scenario()) == ((True, True), (False, True))
+    assert controller.media_control.scan_task is not None
+
+
+def test_scanner_reads_all_inputs_in_one_bank_read(controller_factory: ControllerFactory):
+    controller = controller_factory(PINS, input_mode="poll", scan_interval=0.002)
+    backend = controller.backend
+    reads: list[tuple[int, ...]] = []
+
+    def read(gpio_pin: int) -> bool:
+        reads.append((gpio_pin,))
+        return False
+
+    def read_bank(gpio_pins):
+        reads.append(tuple(gpio_pins))
+        return 0
+
+    backend.read = read  # type: ignore
+    backend.read_bank = read_bank  # type: ignore
+    controller.run(settle(0.02))
+
+    assert reads
+    assert set(reads) == {(1, 2)}
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+from conftest import ControllerFactory, input_pin, output_pin, settle
+
+from journal import EventJournal, read_journal
+from pins import PinEvent, RemotePin
+
+PINS = {"InputPins": [input_pin(1, ["O#100"])], "OutputPins": [output_pin(100)]}
+
+
+def test_pin_events_are_journaled(controller_factory: ControllerFactory, tmp_path: Path):
+    journal_path = tmp_path / "events.journal"
+    controller = controller_factory(PINS, journal_path=str(journal_path), journal_capacity=64)
+
+    async def scenario():
+        controller.backend.set_input(1, True)
+        await settle()
+
+    controller.run(scenario())
+    records = read_journal(journal_path)
+
+    assert [record.sequence for record in records] == list(range(1, len(records) + 1))
+    assert ("I#1", PinEvent.PRESS) in [(record.pin_id, record.event) for record in records]
+    assert ("O#100", PinEvent.ACTIVATE) in [(record.pin_id, record.event) for record in records]
+
+
+def test_full_journal_overwrites_the_oldest_records(controller_factory: ControllerFactory, tmp_path: Path):
+    pin = controller_factory(PINS).pins["I#1"]
+    journal = EventJournal(tmp_path / "events.journal", capacity=4)
+    for _ in range(6):
+        journal.append(pin, PinEvent.PRESS)
+    journal.close()
+
+    assert [record.sequence for record in read_journal(journal.path)] == [3, 4, 5, 6]
+
+
+def test_reopened_journal_continues_the_sequence(controller_factory: ControllerFactory, tmp_path: Path):
+    pin = controller_factory(PINS).pins["O#100"]
+    journal = EventJournal(tmp_path / "events.journal", capacity=4)
+    journal.append(pin, PinEvent.ACTIVATE)
+    journal.close()
+
+    journal = EventJournal(tmp_path / "events.journal", capacity=4)
+    journal.append(pin, PinEvent.DEACTIVATE)
+    journal.close()
+
+    records = read_journal(journal.path)
+    assert [(record.sequence, record.pin_id, record.event) for record in records] == [
+        (1, "O#100", PinEvent.ACTIVATE),
+        (2, "O#100", PinEvent.DEACTIVATE),
+    ]
+
+
+def test_remote_pins_are_not_journaled(tmp_path: Path):
+    journal = EventJournal(tmp_path / "events.journal", capacity=4)
+    journal.append(RemotePin("stage", "O#100", None), PinEvent.TRIGGER)  # type: ignore
+    journal.close()
+
+    assert read_journal(journal.path) == []
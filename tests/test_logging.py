@@ -0,0 +1,58 @@
+import logging
+
+import pytest
+
+from logger import get_logger, setup_logging, stop_logging
+from logger.logger import RateLimitFilter, StructuredFormatter
+
+
+def make_record(message: str, level: int = logging.INFO, **fields) -> logging.LogRecord:
+    record = logging.LogRecord("dptmc.test", level, __file__, 1, message, (), None)
+    record.__dict__.update(fields)
+    return record
+
+
+def test_message_can_not_break_the_line():
+    line = StructuredFormatter().format(make_record('startup\n  "pins" took 3 ms\\'))
+    assert "\n" not in line
+    assert line.endswith('msg="startup\\n  \\"pins\\" took 3 ms\\\\"')
+
+
+def test_field_values_are_quoted_and_escaped():
+    line = StructuredFormatter().format(make_record("pressed", pin_id="O#1", event='a "b"'))
+    assert 'pin_id=O#1 event="a \\"b\\""' in line
+
+
+def test_rate_limit_reports_the_suppressed_records():
+    rate_limit = RateLimitFilter(rate=0.001, burst=2)
+    passed = [rate_limit.filter(make_record("edge", pin_id="I#1")) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert rate_limit.suppressed == {("dptmc.test", "I#1", None): 3}
+    # other pins and warnings are not limited
+    assert rate_limit.filter(make_record("edge", pin_id="I#2"))
+    assert rate_limit.filter(make_record("stuck", logging.WARNING, pin_id="I#1"))
+
+
+def test_rate_limit_keeps_a_bounded_number_of_keys():
+    rate_limit = RateLimitFilter(rate=1, burst=1, max_keys=3)
+    for gpio_pin in range(10):
+        rate_limit.filter(make_record("edge", pin_id=f"I#{gpio_pin}"))
+    assert [pin_id for _, pin_id, _ in rate_limit.buckets] == ["I#7", "I#8", "I#9"]
+
+
+def test_dropped_key_forgets_its_suppressed_records():
+    rate_limit = RateLimitFilter(rate=0.001, burst=1, max_keys=1)
+    rate_limit.filter(make_record("edge", pin_id="I#1"))
+    rate_limit.filter(make_record("edge", pin_id="I#1"))
+    rate_limit.filter(make_record("edge", pin_id="I#2"))
+    assert rate_limit.suppressed == {}
+
+
+def test_records_are_written_by_the_listener(capsys: pytest.CaptureFixture[str]):
+    setup_logging("INFO", rate_limit=0)
+    get_logger("test").info("value %s", 1, extra={"pin_id": "I#1"})
+    stop_logging()
+
+    [line] = capsys.readouterr().out.splitlines()
+    assert line.startswith("level=INFO logger=dptmc.test pin_id=I#1 mono=")
+    assert line.endswith('msg="value 1"')
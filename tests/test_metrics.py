@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+from conftest import ControllerFactory, input_pin, output_pin, settle
+
+from metrics import TRIGGER_STAGES, TRIGGERS, MetricsRegistry, MetricsServer
+
+READ_TIMEOUT = 5
+
+
+def test_registry_renders_the_text_format():
+    registry = MetricsRegistry()
+    presses = registry.counter("presses_total", "Presses", ("pin",))
+    latency = registry.histogram("latency_seconds", "Latency", (), (0.01, 0.1))
+    presses.inc("I#1")
+    presses.inc("I#1", amount=2)
+    latency.observe(0.005)
+    latency.observe(0.05)
+    latency.observe(1)
+
+    assert registry.render().splitlines() == [
+        "# HELP presses_total Presses",
+        "# TYPE presses_total counter",
+        'presses_total{pin="I#1"} 3',
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.01"} 1',
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_sum 1.055",
+        "latency_seconds_count 3",
+    ]
+
+
+def test_metric_names_are_unique():
+    registry = MetricsRegistry()
+    registry.counter("presses_total", "Presses")
+
+    with pytest.raises(ValueError):
+        registry.counter("presses_total", "Presses")
+
+
+def test_server_answers_scrapes():
+    registry = MetricsRegistry()
+    registry.counter("presses_total", "Presses").inc()
+    metrics_server = MetricsServer(registry)
+
+    async def scrape(path: str) -> bytes:
+        server = await asyncio.start_server(metrics_server._handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        response = await asyncio.wait_for(reader.read(), READ_TIMEOUT)
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response
+
+    metrics = asyncio.run(scrape("/metrics"))
+    assert metrics.startswith(b"HTTP/1.1 200 OK\r\n")
+    assert metrics.endswith(b"presses_total 1\n")
+    assert asyncio.run(scrape("/other")).startswith(b"HTTP/1.1 404 Not Found\r\n")
+
+
+def test_trigger_records_every_pipeline_stage(controller_factory: ControllerFactory):
+    # the registry is shared by the process, compare against the counts before the press
+    controller = controller_factory({"InputPins": [input_pin(1, ["O#100"])], "OutputPins": [output_pin(100)]})
+    stages = [
+        ("I#1", "debounce"),
+        ("I#1", "trigger_start"),
+        ("O#100", "activate_start"),
+        ("O#100", "activate_done"),
+        ("O#100", "deactivate"),
+    ]
+    before = [TRIGGER_STAGES.count(*stage) for stage in stages]
+    triggers = TRIGGERS.get("O#100")
+
+    async def scenario():
+        controller.backend.set_input(1, True)
+        await settle()
+        # the output is held until the input is released
+        controller.backend.set_input(1, False)
+        await settle()
+
+    controller.run(scenario())
+    assert [TRIGGER_STAGES.count(*stage) - count for stage, count in zip(stages, before, strict=True)] == [
+        1,
+        1,
+        1,
+        1,
+        1,
+    ]
+    assert TRIGGERS.get("O#100") == triggers + 1
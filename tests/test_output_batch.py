@@ -0,0 +1,79 @@
+import asyncio
+
+from conftest import ControllerFactory, input_pin, output_pin, settle
+
+from gpio import OutputBatch, SimulatedBackend
+
+
+def simulated_outputs(*gpio_pins: int) -> SimulatedBackend:
+    backend = SimulatedBackend()
+    for gpio_pin in gpio_pins:
+        backend.setup_output(gpio_pin)
+    return backend
+
+
+def test_writes_of_one_iteration_are_one_bank_write():
+    backend = simulated_outputs(100, 101, 102)
+
+    async def scenario():
+        outputs = OutputBatch(backend, asyncio.get_running_loop())
+        outputs.write(100, True)
+        outputs.write(101, True)
+        outputs.write(102, True)
+        outputs.write(102, False)
+        pending = dict(outputs.pending)
+        await settle(0)
+        return pending
+
+    assert asyncio.run(scenario()) == {100: True, 101: True, 102: False}
+    assert backend.write_count == 1
+    assert (backend.read(100), backend.read(101), backend.read(102)) == (True, True, False)
+
+
+def test_failed_bank_write_falls_back_to_single_writes():
+    # gpio 101 is not an output, the bank write fails and the other pins still switch
+    backend = simulated_outputs(100, 102)
+
+    async def scenario():
+        outputs = OutputBatch(backend, asyncio.get_running_loop())
+        outputs.write(100, True)
+        outputs.write(101, True)
+        outputs.write(102, True)
+        await settle(0)
+
+    asyncio.run(scenario())
+    assert (backend.read(100), backend.read(101), backend.read(102)) == (True, False, True)
+    assert backend.write_count == 2
+
+
+def test_discarded_pin_is_not_written():
+    backend = simulated_outputs(100, 101)
+
+    async def scenario():
+        outputs = OutputBatch(backend, asyncio.get_running_loop())
+        outputs.write(100, True)
+        outputs.write(101, True)
+        outputs.discard(101)
+        await settle(0)
+
+    asyncio.run(scenario())
+    assert (backend.read(100), backend.read(101)) == (True, False)
+    assert backend.write_count == 1
+
+
+def test_outputs_of_one_input_switch_together(controller_factory: ControllerFactory):
+    controller = controller_factory(
+        {
+            "InputPins": [input_pin(1, ["O#100", "O#101", "O#102"])],
+            "OutputPins": [output_pin(100), output_pin(101), output_pin(102)],
+        }
+    )
+
+    async def scenario():
+        write_count = controller.backend.write_count
+        controller.backend.set_input(1, True)
+        await settle()
+        return controller.backend.write_count - write_count
+
+    assert controller.run(scenario()) == 1
+    assert all(controller.backend.read(gpio_pin) for gpio_pin in (100, 101, 102))
@@ -0,0 +1,64 @@
+import copy
+
+import pytest
+from conftest import ControllerFactory, input_pin, output_pin
+
+from pins import PinIndex
+
+PINS = {
+    "InputPins": [input_pin(1, ["O#100", "O#101"], pins_to_block=["O#102"], pins_to_unblock=["O#103"])],
+    "OutputPins": [output_pin(100), output_pin(101), output_pin(102), output_pin(103)],
+}
+
+
+def test_relations_resolve_to_the_registered_pins(controller_factory: ControllerFactory):
+    controller = controller_factory(PINS)
+    index = PinIndex.from_config(controller.pins, controller.media_control.config)
+
+    assert [pin.id for pin in index.triggered_pins_of("I#1")] == ["O#100", "O#101"]
+    assert [pin.id for pin in index.blocked_pins_of("I#1")] == ["O#102"]
+    assert [pin.id for pin in index.unblocked_pins_of("I#1")] == ["O#103"]
+    assert index.by_gpio[101] is controller.pins["O#101"]
+    assert index.by_id["I#1"] is controller.pins["I#1"]
+    assert [pin.id for pin in index.inputs] == ["I#1"]
+    assert len(index.outputs) == 4
+
+
+def test_index_matches_the_linked_pins(controller_factory: ControllerFactory):
+    controller = controller_factory(PINS)
+    index = PinIndex.from_pins(controller.pins.values())
+
+    assert index.triggered == PinIndex.from_config(controller.pins, controller.media_control.config).triggered
+
+
+@pytest.mark.parametrize(
+    ("relation", "pin_id", "error"),
+    [
+        ("triggered_pins", "O#999", "does not exist"),
+        ("pins_to_block", "O#999", "does not exist"),
+        ("triggered_pins", "I#1", "wrong pin type"),
+    ],
+)
+def test_bad_relations_are_rejected(controller_factory: ControllerFactory, relation: str, pin_id: str, error: str):
+    controller = controller_factory(PINS)
+    config = copy.deepcopy(controller.media_control.config)
+    config["InputPins"][0][relation] = [pin_id]  # type: ignore
+
+    with pytest.raises(ValueError, match=error):
+        PinIndex.from_config(controller.pins, config)
+
+
+def test_remote_pins_are_left_to_the_cluster(controller_factory: ControllerFactory):
+    controller = controller_factory(PINS)
+    config = copy.deepcopy(controller.media_control.config)
+    config["InputPins"][0]["triggered_pins"] = ["O#100", "stage:O#100"]
+
+    index = PinIndex.from_config(controller.pins, config)
+    assert [pin.id for pin in index.triggered_pins_of("I#1")] == ["O#100"]
+
+
+def test_index_is_frozen(controller_factory: ControllerFactory):
+    index = controller_factory(PINS).media_control.pin_index
+
+    with pytest.raises(AttributeError):
+        index.by_id = {}
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from pjlink import CircuitOpenError, PJLinkPool, PJLinkSession, RetryPolicy
+
+COMMAND_TIME = 0.05
+
+
+class FakeLink:
+    # answers every command after a fixed time, like a projector on the lan
+    commands: int
+
+    def __init__(self):
+        self.commands = 0
+
+    async def command(self, seconds: float = COMMAND_TIME):
+        await asyncio.sleep(seconds)
+        self.commands += 1
+        return self.commands
+
+
+def fake_session() -> tuple[PJLinkSession, FakeLink]:
+    session = PJLinkSession(("10.0.0.1", ""))
+    link = FakeLink()
+
+    async def connect():
+        session._link = link
+        return link
+
+    session._connect = connect  # type: ignore
+    return session, link
+
+
+def test_waiting_for_the_lock_does_not_count_against_the_timeout():
+    async def scenario():
+        session, link = fake_session()
+        # each command fits the timeout, all of them together do not
+        commands = [session.run(lambda link: link.command(), COMMAND_TIME * 2) for _ in range(4)]
+        return await asyncio.gather(*commands)
+
+    assert asyncio.run(scenario()) == [1, 2, 3, 4]
+
+
+def test_slow_command_times_out_and_drops_the_connection():
+    async def scenario():
+        session, _ = fake_session()
+        with pytest.raises(TimeoutError):
+            await session.run(lambda link: link.command(COMMAND_TIME * 4), COMMAND_TIME)
+        return session.is_connected
+
+    assert asyncio.run(scenario()) is False
+
+
+class UnreachableSession:
+    # stands in for the session of a projector that does not answer
+    calls: int
+    failures: int
+
+    def __init__(self, failures: int):
+        self.calls = 0
+        self.failures = failures
+
+    async def run(self, command, timeout: float = 0):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionRefusedError("projector is down")
+        return "on"
+
+    async def close(self):
+        return
+
+
+def unreachable_pool(failures: int) -> tuple[PJLinkPool, UnreachableSession]:
+    pool = PJLinkPool(keepalive_interval=0, retry_policy=RetryPolicy(attempts=3, base_delay=0), failure_threshold=3)
+    session = UnreachableSession(failures)
+    pool.sessions[("10.0.0.1", "")] = session  # type: ignore
+    return pool, session
+
+
+def test_failed_command_counts_once_against_the_breaker():
+    async def scenario():
+        pool, session = unreachable_pool(failures=3)
+        with pytest.raises(ConnectionError):
+            await pool.run("10.0.0.1", "", lambda link: link.power.get())
+        await pool.close()
+        return session.calls, pool.breaker("10.0.0.1")
+
+    calls, breaker = asyncio.run(scenario())
+    assert calls == 3
+    assert breaker.failures == 1
+    assert not breaker.is_open
+
+
+def test_retry_that_succeeds_resets_the_breaker():
+    async def scenario():
+        pool, session = unreachable_pool(failures=2)
+        result = await pool.run("10.0.0.1", "", lambda link: link.power.get())
+        await pool.close()
+        return result, pool.breaker("10.0.0.1").failures
+
+    assert asyncio.run(scenario()) == ("on", 0)
+
+
+def test_breaker_opens_after_the_threshold_of_failed_commands():
+    async def scenario():
+        pool, session = unreachable_pool(failures=100)
+        for _ in range(3):
+            with pytest.raises(ConnectionError):
+                await pool.run("10.0.0.1", "", lambda link: link.power.get())
+        calls = session.calls
+        with pytest.raises(CircuitOpenError):
+            await pool.run("10.0.0.1", "", lambda link: link.power.get())
+        await pool.close()
+        return calls, session.calls
+
+    # the command after the circuit opened fails without a connection attempt
+    assert asyncio.run(scenario()) == (9, 9)
@@ -0,0 +1,74 @@
+import json
+
+from conftest import ControllerFactory, output_pin, settle
+
+
+def test_retrigger_keeps_the_pin_triggered(controller_factory: ControllerFactory):
+    controller = controller_factory({"OutputPins": [output_pin(100)]})
+    pin = controller.pins["O#100"]
+
+    async def scenario():
+        first = controller.media_control.press_pin(pin)
+        await settle()
+        second = controller.media_control.press_pin(pin)
+        await settle()
+        return first.status, second.status, controller.backend.read(100)
+
+    assert controller.run(scenario()) == ("started", "retriggered", True)
+    assert pin.is_triggered
+
+
+def test_blocked_press_keeps_a_running_press(controller_factory: ControllerFactory):
+    controller = controller_factory({"OutputPins": [output_pin(100)]})
+    pin = controller.pins["O#100"]
+
+    async def scenario():
+        controller.media_control.press_pin(pin)
+        await settle()
+        pin.block()
+        result = controller.media_control.press_pin(pin)
+        await settle()
+        return result.status, controller.backend.read(100)
+
+    assert controller.run(scenario()) == ("blocked", True)
+    assert pin.is_triggered
+
+
+def test_api_trigger_reports_the_press_status(controller_factory: ControllerFactory):
+    controller = controller_factory({"OutputPins": [output_pin(100)]})
+    protocol = controller.media_control.control_protocol
+
+    async def scenario():
+        controller.pins["O#100"].block()
+        return protocol.execute("trigger O#100")
+
+    reply = controller.run(scenario())
+    assert reply["ok"]
+    assert reply["result"] == [{"id": "O#100", "started": False, "status": "blocked"}]
+    assert not controller.pins["O#100"].is_triggered
+
+
+def test_commands_accept_only_a_list_of_strings(controller_factory: ControllerFactory):
+    controller = controller_factory({"OutputPins": [output_pin(100, "pulse")]})
+    server = controller.media_control.control_server
+
+    async def scenario():
+        return [
+            server._route_http("POST", "/commands", body)
+            for body in (b"[1]", b'["state O#100", null]', b"[[]]", b'["state O#100"]', b"state O#100\n")
+        ]
+
+    statuses = [status for status, _ in controller.run(scenario())]
+    assert statuses == [400, 400, 400, 200, 200]
+
+
+def test_commands_run_every_command(controller_factory: ControllerFactory):
+    controller = controller_factory({"OutputPins": [output_pin(100, "pulse"), output_pin(101, "pulse")]})
+    server = controller.media_control.control_server
+
+    async def scenario():
+        return server._route_http("POST", "/commands", b'["trigger O#100", "trigger O#101"]')
+
+    status, body = controller.run(scenario())
+    assert status == 200
+    assert all(reply["ok"] for reply in json.loads(body))
@@ -0,0 +1,103 @@
+from conftest import ControllerFactory, input_pin, output_pin, settle
+
+from pins import PinEvent, TokenBucket, TriggerRateLimiter
+
+
+def test_token_bucket_refills_with_its_rate():
+    bucket = TokenBucket(rate=10, burst=2)
+    now = bucket._last_update
+    assert bucket.take(now)
+    assert bucket.take(now)
+    assert not bucket.take(now)
+    assert bucket.take(now + 0.2)
+
+
+def test_pin_limit_drops_only_the_chattering_pin():
+    limiter = TriggerRateLimiter(pin_rate=1, pin_burst=2)
+    assert limiter.allow("I#1")
+    assert limiter.allow("I#1")
+    assert not limiter.allow("I#1")
+    assert limiter.allow("I#2")
+
+
+def test_global_rejection_keeps_the_pin_token():
+    limiter = TriggerRateLimiter(pin_rate=1, pin_burst=1, global_rate=1, global_burst=1)
+    assert limiter.allow("I#1")
+    # the global bucket is empty now, the pin bucket of I#2 must not pay for the dropped trigger
+    assert not limiter.allow("I#2")
+    assert limiter._pin_buckets["I#2"].tokens == 1
+
+
+def test_fan_out_targets_are_not_rate_limited(controller_factory: ControllerFactory):
+    # one press of an "all off" with more targets than the global burst
+    outputs = list(range(100, 130))
+    controller = controller_factory(
+        {
+            "InputPins": [input_pin(1, [f"O#{gpio}" for gpio in outputs])],
+            "OutputPins": [output_pin(gpio) for gpio in outputs],
+        },
+        trigger_rate_limit=1,
+        trigger_burst=1,
+        global_trigger_rate_limit=1,
+        global_trigger_burst=5,
+    )
+
+    async def scenario():
+        controller.backend.set_input(1, True)
+        await settle()
+        return [controller.backend.read(gpio) for gpio in outputs]
+
+    assert all(controller.run(scenario()))
+
+
+def test_shared_output_is_not_limited_per_input(controller_factory: ControllerFactory):
+    inputs = list(range(1, 6))
+    controller = controller_factory(
+        {"InputPins": [input_pin(gpio, ["O#100"]) for gpio in inputs], "OutputPins": [output_pin(100, "pulse")]},
+        trigger_rate_limit=1,
+        trigger_burst=1,
+    )
+    triggers: list[str] = []
+    controller.pins["O#100"].add_event_listener(
+        lambda pin, event: triggers.append(pin.id) if event == PinEvent.TRIGGER else None
+    )
+
+    async def scenario():
+        for gpio in inputs:
+            controller.backend.set_input(gpio, True)
+            await settle(0.15)
+            controller.backend.set_input(gpio, False)
+            await settle()
+
+    controller.run(scenario())
+    assert len(triggers) == len(inputs)
+
+
+def test_chattering_input_is_dropped(controller_factory: ControllerFactory):
+    controller = controller_factory(
+        {"InputPins": [input_pin(1, ["O#100"])], "OutputPins": [output_pin(100)]}, trigger_rate_limit=1, trigger_burst=2
+    )
+    events: list[PinEvent] = []
+    controller.pins["I#1"].add_event_listener(lambda pin, event: events.append(event))
+
+    async def scenario():
+        for _ in range(5):
+            controller.backend.set_input(1, True)
+            await settle()
+            controller.backend.set_input(1, False)
+            await settle()
+
+    controller.run(scenario())
+    assert events.count(PinEvent.TRIGGER) == 2
+    assert events.count(PinEvent.DROPPED_TRIGGER) == 3
+
+
+def test_api_press_is_rate_limited(controller_factory: ControllerFactory):
+    controller = controller_factory({"OutputPins": [output_pin(100, "pulse")]}, trigger_rate_limit=1, trigger_burst=1)
+
+    async def scenario():
+        first = controller.media_control.press_pin(controller.pins["O#100"])
+        second = controller.media_control.press_pin(controller.pins["O#100"])
+        return first.status, second.status
+
+    assert controller.run(scenario()) == ("started", "dropped")
@@ -0,0 +1,28 @@
+import os
+import threading
+
+import pytest
+
+from realtime import create_executor
+
+
+def test_executor_threads_do_not_inherit_sched_fifo():
+    # the loop thread runs SCHED_FIFO, the executor threads it starts run SCHED_OTHER
+    policies: list[int] = []
+
+    def loop_thread():
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(1))
+        except (OSError, AttributeError):
+            return
+        with create_executor() as executor:
+            policies.append(os.sched_getscheduler(0))
+            policies.append(executor.submit(os.sched_getscheduler, 0).result())
+
+    thread = threading.Thread(target=loop_thread)
+    thread.start()
+    thread.join()
+    if not policies:
+        pytest.skip("SCHED_FIFO is not permitted")
+
+    assert policies == [os.SCHED_FIFO, os.SCHED_OTHER]
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+from conftest import ControllerFactory, output_pin, settle
+
+from pins import PinEvent
+
+HOLD_TIME = 0.1
+
+
+def hold_output(policy: str):
+    return {"OutputPins": [output_pin(100, "hold", hold_time=HOLD_TIME, retrigger_policy=policy)]}
+
+
+def test_ignore_keeps_the_running_hold(controller_factory: ControllerFactory):
+    controller = controller_factory(hold_output("ignore"))
+    pin = controller.pins["O#100"]
+
+    async def scenario():
+        first = controller.media_control.press_pin(pin)
+        await settle(HOLD_TIME / 2)
+        second = controller.media_control.press_pin(pin)
+        await settle(HOLD_TIME / 2 + 0.02)
+        return first, second, controller.backend.read(100)
+
+    first, second, level = controller.run(scenario())
+    assert first.status == "started"
+    assert second.status == "retriggered"
+    assert not level
+
+
+def test_extend_moves_the_end_of_the_hold(controller_factory: ControllerFactory):
+    controller = controller_factory(hold_output("extend"))
+    pin = controller.pins["O#100"]
+
+    async def scenario():
+        controller.media_control.press_pin(pin)
+        await settle(HOLD_TIME * 0.6)
+        controller.media_control.press_pin(pin)
+        # past the end of the first hold, before the end of the extended one
+        await settle(HOLD_TIME * 0.6)
+        extended = controller.backend.read(100)
+        await settle(HOLD_TIME)
+        return extended, controller.backend.read(100)
+
+    assert controller.run(scenario()) == (True, False)
+
+
+def test_restart_starts_a_new_activation(controller_factory: ControllerFactory):
+    controller = controller_factory(hold_output("restart"))
+    pin = controller.pins["O#100"]
+    events: list[PinEvent] = []
+    pin.add_event_listener(lambda _, event: events.append(event))
+
+    async def scenario():
+        first = controller.media_control.press_pin(pin).activation
+        await settle(HOLD_TIME / 2)
+        second = controller.media_control.press_pin(pin).activation
+        await settle()
+        return first, second, controller.backend.read(100)
+
+    first, second, level = controller.run(scenario())
+    assert first is not None and first.is_cancelled
+    assert second is not None and not second.is_done
+    assert level
+    assert events.count(PinEvent.TRIGGER) == 2
+
+
+def test_toggle_cancels_the_running_activation(controller_factory: ControllerFactory):
+    controller = controller_factory(hold_output("toggle"))
+    pin = controller.pins["O#100"]
+
+    async def scenario():
+        first = controller.media_control.press_pin(pin).activation
+        await settle()
+        second = controller.media_control.press_pin(pin)
+        await settle()
+        return first, second, controller.backend.read(100)
+
+    first, second, level = controller.run(scenario())
+    assert first is not None and first.is_cancelled
+    assert second.status == "retriggered"
+    assert not level
+    assert pin.activation is None
+
+
+@pytest.mark.parametrize("policy", ["ignore", "extend", "toggle"])
+def test_blocked_press_leaves_the_pin_released(controller_factory: ControllerFactory, policy: str):
+    controller = controller_factory(hold_output(policy))
+    pin = controller.pins["O#100"]
+
+    async def scenario():
+        pin.block()
+        result = controller.media_control.press_pin(pin)
+        await asyncio.sleep(0)
+        return result
+
+    assert controller.run(scenario()).status == "blocked"
+    assert not pin.is_triggered
+    assert pin.activation is None
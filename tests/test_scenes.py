@@ -0,0 +1,98 @@
+import asyncio
+
+from conftest import ControllerFactory, output_pin, settle
+
+
+def test_scene_press_of_a_blocked_pin_leaves_it_released(controller_factory: ControllerFactory):
+    controller = controller_factory(
+        {"OutputPins": [output_pin(100)]}, scenes=[{"id": "show", "steps": [{"pin": "O#100", "action": "press"}]}]
+    )
+    pin = controller.pins["O#100"]
+
+    async def scenario():
+        pin.block()
+        controller.media_control.sequencer.start("show")
+        await settle()
+        return controller.backend.read(100)
+
+    assert not controller.run(scenario())
+    assert not pin.is_triggered
+
+
+def test_scene_press_holds_the_pin_until_released(controller_factory: ControllerFactory):
+    controller = controller_factory(
+        {"OutputPins": [output_pin(100)]}, scenes=[{"id": "show", "steps": [{"pin": "O#100", "action": "press"}]}]
+    )
+    pin = controller.pins["O#100"]
+
+    async def scenario():
+        controller.media_control.sequencer.start("show")
+        await settle()
+        pressed = controller.backend.read(100)
+        controller.media_control.release_pin(pin)
+        await settle()
+        return pressed, controller.backend.read(100)
+
+    assert controller.run(scenario()) == (True, False)
+
+
+def test_abort_releases_the_pins_the_scene_pressed(controller_factory: ControllerFactory):
+    steps = [{"pin": "O#100", "action": "press"}, {"pin": "O#101", "action": "trigger", "delay": 10}]
+    controller = controller_factory(
+        {"OutputPins": [output_pin(100), output_pin(101)]}, scenes=[{"id": "show", "steps": steps}]
+    )
+    pin = controller.pins["O#100"]
+    sequencer = controller.media_control.sequencer
+
+    async def scenario():
+        sequencer.start("show")
+        await settle()
+        waiter = asyncio.create_task(pin.wait_for_release())
+        await settle()
+        sequencer.abort("show")
+        await asyncio.wait_for(waiter, 1)
+        await settle()
+        return controller.backend.read(100)
+
+    assert not controller.run(scenario())
+    assert not pin.is_triggered
+
+
+def test_abort_leaves_pins_the_scene_released_itself(controller_factory: ControllerFactory):
+    steps = [
+        {"pin": "O#100", "action": "press"},
+        {"pin": "O#100", "action": "release", "delay": 0.01},
+        {"pin": "O#101", "action": "trigger", "delay": 10},
+    ]
+    controller = controller_factory(
+        {"OutputPins": [output_pin(100), output_pin(101)]}, scenes=[{"id": "show", "steps": steps}]
+    )
+    pin = controller.pins["O#100"]
+    sequencer = controller.media_control.sequencer
+
+    async def scenario():
+        run = sequencer.start("show")
+        await settle(0.05)
+        pressed_pins = list(run.pressed_pins)
+        # pressed again over the api after the scene released it
+        controller.media_control.press_pin(pin)
+        sequencer.abort("show")
+        await settle()
+        return pressed_pins
+
+    assert controller.run(scenario()) == []
+    assert pin.is_triggered
+
+
+def test_finished_scene_keeps_its_press(controller_factory: ControllerFactory):
+    controller = controller_factory(
+        {"OutputPins": [output_pin(100)]}, scenes=[{"id": "show", "steps": [{"pin": "O#100", "action": "press"}]}]
+    )
+    sequencer = controller.media_control.sequencer
+
+    async def scenario():
+        sequencer.start("show")
+        await settle()
+        return "show" in sequencer.runs, controller.backend.read(100)
+
+    assert controller.run(scenario()) == (False, True)
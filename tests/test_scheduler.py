@@ -0,0 +1,71 @@
+import asyncio
+
+from pins import PinScheduler
+
+
+def run[T](coroutine_function) -> T:
+    return asyncio.run(coroutine_function())
+
+
+def test_actions_fire_in_deadline_order():
+    async def scenario():
+        scheduler = PinScheduler(asyncio.get_running_loop())
+        fired: list[str] = []
+        scheduler.call_later("O#2", "hold", 0.03, lambda: fired.append("O#2"))
+        scheduler.call_later("O#1", "pulse", 0.01, lambda: fired.append("O#1"))
+        scheduler.call_later("O#3", "hold", 0.02, lambda: fired.append("O#3"))
+        assert [action.pin_id for action in scheduler.pending()] == ["O#1", "O#3", "O#2"]
+        await asyncio.sleep(0.05)
+        return fired, scheduler.pending()
+
+    fired, pending = run(scenario)
+    assert fired == ["O#1", "O#3", "O#2"]
+    assert pending == []
+
+
+def test_sleep_returns_false_when_cancelled():
+    async def scenario():
+        scheduler = PinScheduler(asyncio.get_running_loop())
+        sleeper = asyncio.create_task(scheduler.sleep("I#1", "activation_delay", 1))
+        await asyncio.sleep(0)
+        assert scheduler.cancel("I#1", "activation_delay") == 1
+        return await sleeper
+
+    assert run(scenario) is False
+
+
+def test_cancel_by_name_keeps_other_actions():
+    async def scenario():
+        scheduler = PinScheduler(asyncio.get_running_loop())
+        scheduler.call_later("I#1", "activation_delay", 1, lambda: None)
+        scheduler.call_later("I#1", "resample", 1, lambda: None)
+        scheduler.cancel("I#1", "resample")
+        return [action.name for action in scheduler.pending("I#1")]
+
+    assert run(scenario) == ["activation_delay"]
+
+
+def test_reschedule_moves_a_sleeping_deadline():
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        scheduler = PinScheduler(loop)
+        started = loop.time()
+        sleeper = asyncio.create_task(scheduler.sleep("O#1", "hold", 0.02))
+        await asyncio.sleep(0.01)
+        scheduler.reschedule_later("O#1", "hold", 0.05)
+        assert await sleeper
+        return loop.time() - started
+
+    assert run(scenario) >= 0.06
+
+
+def test_cancelled_sleeper_removes_its_action():
+    async def scenario():
+        scheduler = PinScheduler(asyncio.get_running_loop())
+        sleeper = asyncio.create_task(scheduler.sleep("O#1", "pulse", 1))
+        await asyncio.sleep(0)
+        sleeper.cancel()
+        await asyncio.gather(sleeper, return_exceptions=True)
+        return scheduler.pending(), scheduler.next_deadline
+
+    assert run(scenario) == ([], None)
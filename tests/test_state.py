@@ -0,0 +1,76 @@
+from conftest import ControllerFactory, output_pin, settle
+
+HOLD_TIME = 1
+# long enough that only the explicit flush of a test writes the snapshot
+STATE_INTERVAL = 60
+
+PINS = {"OutputPins": [output_pin(100, "hold", hold_time=HOLD_TIME), output_pin(101), output_pin(102)]}
+
+
+def save_running_state(controller_factory: ControllerFactory):
+    controller = controller_factory(PINS, state_interval=STATE_INTERVAL)
+
+    async def scenario():
+        controller.media_control.press_pin(controller.pins["O#100"])
+        controller.media_control.press_pin(controller.pins["O#101"])
+        controller.pins["O#102"].block()
+        await settle()
+        controller.media_control.state_store.flush()
+
+    controller.run(scenario())
+    controller.close()
+
+
+def test_outputs_start_with_their_restored_level(controller_factory: ControllerFactory):
+    save_running_state(controller_factory)
+    controller = controller_factory(PINS, state_interval=STATE_INTERVAL)
+
+    assert controller.backend.read(100)
+    assert controller.backend.read(101)
+    assert not controller.backend.read(102)
+    # blocks are restored before the loop runs
+    assert controller.pins["O#102"].is_blocked
+
+
+def test_hold_continues_until_its_saved_deadline(controller_factory: ControllerFactory):
+    save_running_state(controller_factory)
+    controller = controller_factory(PINS, state_interval=STATE_INTERVAL)
+    scheduler = controller.media_control.scheduler
+
+    async def scenario():
+        controller.media_control.state_store.resume()
+        await settle()
+        [action] = [action for action in scheduler.pending("O#100") if action.name == "hold"]
+        return action.deadline - scheduler.time()
+
+    remaining = controller.run(scenario())
+    assert 0 < remaining < HOLD_TIME
+    assert controller.pins["O#100"].activation is not None
+    assert controller.backend.read(100)
+
+
+def test_settle_switches_off_outputs_nobody_drives(controller_factory: ControllerFactory):
+    save_running_state(controller_factory)
+    controller = controller_factory(PINS, state_interval=STATE_INTERVAL)
+    state_store = controller.media_control.state_store
+
+    async def scenario():
+        state_store.resume()
+        await settle()
+        state_store.settle()
+        await settle()
+
+    controller.run(scenario())
+    # the while_input press ended with the old process, the hold is still running
+    assert not controller.backend.read(101)
+    assert controller.backend.read(100)
+    assert state_store.restored is None
+
+
+def test_disabled_store_restores_nothing(controller_factory: ControllerFactory):
+    save_running_state(controller_factory)
+    controller = controller_factory(PINS, state_interval=0)
+
+    assert controller.media_control.state_store.restored is None
+    assert not controller.backend.read(100)
+    assert not controller.pins["O#102"].is_blocked